@@ -0,0 +1,300 @@
+"""Benchmark the recording pipeline against synthetic screen and audio sources.
+
+Needs FFmpeg but no display, Zoom client, microphone or network. For each
+recording mode a live sample is recorded through the real capture, convert,
+encode and mux path to measure sustained fps, CPU time per frame, peak memory
+and output bitrate. The finalize latency (the time from the end of a meeting
+until its MP4 is ready) is then measured for simulated meetings of each
+requested length, using inputs generated by FFmpeg in the layout the mode
+leaves behind when a meeting ends.
+
+Results are printed as JSON (or written with --output) so runs of different
+versions can be compared:
+
+    python benchmark.py --resolution 1920x1080 --change-interval 5 --durations 10,60,240
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import datetime
+import tempfile
+import threading
+import subprocess
+
+import zoom_recorder
+
+
+MODES = ["direct", "direct-segmented", "two-pass", "two-pass-segmented"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the zoom_recorder pipeline with synthetic sources")
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help=f"comma separated recording modes (default: all of {', '.join(MODES)})")
+    parser.add_argument("--resolution", default="1920x1080", help="synthetic screen size (default 1920x1080)")
+    parser.add_argument("--fps", type=int, default=15, help="target capture frame rate (default 15)")
+    parser.add_argument("--change-interval", type=float, default=0,
+                        help="seconds the synthetic screen stays static; 0 changes every frame (default 0)")
+    parser.add_argument("--skip-duplicate-frames", action="store_true", help="drop unchanged frames")
+    parser.add_argument("--capture-processes", default="0",
+                        help='capture in this many separate processes, or "auto" (default 0, a capture thread)')
+    parser.add_argument("--sample-seconds", type=float, default=30,
+                        help="length of the live recording sample per mode (default 30)")
+    parser.add_argument("--durations", default="10,60,240",
+                        help="simulated meeting lengths in minutes for the finalize benchmark (default 10,60,240)")
+    parser.add_argument("--segment-minutes", type=float, default=5, help="segment length for segmented modes")
+    parser.add_argument("--encode-profile", type=json.loads, default=None,
+                        help='encode profile as JSON, e.g. \'{"preset": "slow", "crf": 28}\'')
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    return parser.parse_args(argv)
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def run_ffmpeg(args):
+    result = subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace')[-2000:]}")
+
+
+def cpu_seconds():
+    """CPU time of this process and its finished children (ffmpeg)"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def version_info():
+    try:
+        result = subprocess.run(["git", "describe", "--always", "--dirty"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.decode().strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class MemorySampler:
+    """Samples the resident memory of this process in the background and keeps the peak"""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.peak = max(self.peak, zoom_recorder.process_rss() or 0)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+
+
+def run_jobs(jobs):
+    """Run post-processing jobs in order, returning the time they took"""
+    start = time.monotonic()
+    for job in jobs:
+        returncode, stderr = zoom_recorder.run_postprocess_job(job)
+        if returncode != 0:
+            raise RuntimeError(f"Post-processing of {job['output_path']} failed: {stderr}")
+    return time.monotonic() - start
+
+
+def combine_job(base, output_path, encode_profile):
+    return {"type": "combine", "temp_video_file": f"{base}_temp.avi", "temp_audio_file": f"{base}_temp.wav",
+            "output_path": output_path, "encode_profile": encode_profile}
+
+
+def concat_job(segments, output_path):
+    return {"type": "concat", "segments": list(segments), "output_path": output_path}
+
+
+def live_sample(mode, args, workdir):
+    """Record a live sample through the pipeline and post-process it as the recorder would"""
+    width, height = (int(v) for v in args.resolution.split("x"))
+    segmented = mode.endswith("segmented")
+    output_file = os.path.join(workdir, f"live_{mode}")
+    segment_jobs = []
+
+    pipeline = zoom_recorder.create_recording_pipeline(
+        output_file, fps=args.fps, direct_encode=mode.startswith("direct"),
+        capture_backend="synthetic",
+        capture_options={"width": width, "height": height, "change_interval": args.change_interval},
+        skip_duplicate_frames=args.skip_duplicate_frames, encode_profile=args.encode_profile,
+        segment_seconds=args.segment_minutes * 60 if segmented else None,
+        on_segment_done=lambda video, audio, output_path: segment_jobs.append(
+            {"type": "combine", "temp_video_file": video, "temp_audio_file": audio,
+             "output_path": output_path, "encode_profile": args.encode_profile}),
+        audio_source="synthetic",
+        capture_processes=args.capture_processes if args.capture_processes == "auto" else int(args.capture_processes))
+
+    cpu_start = cpu_seconds()
+    with MemorySampler() as memory:
+        pipeline.start()
+        time.sleep(args.sample_seconds)
+        stop_start = time.monotonic()
+        pipeline.stop()
+        stop_latency = time.monotonic() - stop_start
+    cpu_used = cpu_seconds() - cpu_start
+    metrics = pipeline.metrics()
+
+    # Whatever is still to do once the meeting has ended
+    if segmented:
+        jobs = segment_jobs + [concat_job(pipeline.output.segment_files, f"{output_file}.mp4")]
+    elif mode == "two-pass":
+        jobs = [combine_job(output_file, f"{output_file}.mp4", args.encode_profile)]
+    else:
+        jobs = []
+    finalize = stop_latency + run_jobs(jobs)
+
+    frames = max(1, metrics["frames"]["captured"])
+    return {
+        "sample_seconds": args.sample_seconds,
+        "sustained_fps": metrics["fps"],
+        "frames": metrics["frames"],
+        "audio_overflows": metrics["audio_overflows"],
+        "audio_buffer_overflows": metrics["audio_buffer_overflows"],
+        "cpu_ms_per_frame": round(cpu_used / frames * 1000, 3),
+        "cpu_percent": round(cpu_used / metrics["elapsed"] * 100, 1),
+        "peak_rss_bytes": memory.peak,
+        "output_kbps": metrics["output_kbps"],
+        "stages": metrics["stages"],
+        "stop_latency_seconds": round(stop_latency, 3),
+        "finalize_seconds": round(finalize, 3),
+    }
+
+
+def generate_source_args(args, seconds):
+    """FFmpeg lavfi inputs for a synthetic screen and tone lasting seconds"""
+    width, height = (int(v) for v in args.resolution.split("x"))
+    source_rate = 1 / args.change_interval if args.change_interval > 0 else args.fps
+    return [
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={source_rate}",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+        "-t", str(seconds), "-r", str(args.fps), "-ac", "2",
+    ]
+
+
+def generate_two_pass(args, base, seconds):
+    """Temp AVI/WAV pair as left by a two-pass recording"""
+    source = generate_source_args(args, seconds)
+    run_ffmpeg([*source, "-map", "0:v", "-c:v", "mpeg4", "-vtag", "XVID", "-q:v", "5", f"{base}_temp.avi"])
+    run_ffmpeg([*source, "-map", "1:a", "-c:a", "pcm_s16le", f"{base}_temp.wav"])
+
+
+def generate_segments(args, base, seconds):
+    """Encoded MPEG-TS segments as left by a segmented recording"""
+    segment_seconds = args.segment_minutes * 60
+    run_ffmpeg([
+        *generate_source_args(args, seconds),
+        *zoom_recorder.build_encode_args(args.encode_profile, container="mpegts"),
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+        "-f", "segment", "-segment_time", str(segment_seconds),
+        "-segment_format", "mpegts", "-reset_timestamps", "1",
+        f"{base}_seg%03d.ts"
+    ])
+    directory, prefix = os.path.split(f"{base}_seg")
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(prefix) and name.endswith(".ts"))
+
+
+def simulated_finalize(mode, args, minutes, workdir, stop_latency):
+    """Finalize latency for a meeting of the given length"""
+    base = os.path.join(workdir, f"meeting_{mode}_{minutes}")
+    seconds = minutes * 60
+    segment_seconds = args.segment_minutes * 60
+
+    if mode == "direct":
+        # Everything is encoded live; only the encoder's drain remains
+        return stop_latency
+    if mode == "two-pass":
+        generate_two_pass(args, base, seconds)
+        return stop_latency + run_jobs([combine_job(base, f"{base}.mp4", args.encode_profile)])
+
+    if mode == "direct-segmented":
+        segments = generate_segments(args, base, seconds)
+        return stop_latency + run_jobs([concat_job(segments, f"{base}.mp4")])
+
+    # two-pass-segmented: earlier segments were encoded during the meeting, the last one was not
+    last_seconds = seconds % segment_seconds or segment_seconds
+    segments = generate_segments(args, base, seconds - last_seconds) if seconds > last_seconds else []
+    last_base = f"{base}_seg{len(segments):03d}"
+    generate_two_pass(args, last_base, last_seconds)
+    jobs = [combine_job(last_base, f"{last_base}.ts", args.encode_profile),
+            concat_job(segments + [f"{last_base}.ts"], f"{base}.mp4")]
+    return stop_latency + run_jobs(jobs)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        sys.exit(f"Unknown mode(s): {', '.join(unknown)}")
+    durations = [float(value) for value in args.durations.split(",") if value.strip()]
+    if shutil.which("ffmpeg") is None:
+        sys.exit("FFmpeg is required for the benchmark")
+
+    report = {
+        "benchmark": "zoom_recorder",
+        "version": version_info(),
+        "started": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "resolution": args.resolution,
+            "fps": args.fps,
+            "change_interval": args.change_interval,
+            "skip_duplicate_frames": args.skip_duplicate_frames,
+            "capture_processes": args.capture_processes,
+            "sample_seconds": args.sample_seconds,
+            "segment_minutes": args.segment_minutes,
+            "encode_profile": args.encode_profile,
+        },
+        "results": [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix="zoom_recorder_bench_")
+    try:
+        for mode in modes:
+            log(f"[{mode}] recording a {args.sample_seconds:g} s live sample")
+            live = live_sample(mode, args, workdir)
+            log(f"[{mode}] {live['sustained_fps']} fps, {live['cpu_ms_per_frame']} ms CPU/frame")
+
+            finalize = []
+            for minutes in durations:
+                log(f"[{mode}] finalizing a simulated {minutes:g} minute meeting")
+                seconds = simulated_finalize(mode, args, minutes, workdir, live["stop_latency_seconds"])
+                finalize.append({"meeting_minutes": minutes, "finalize_seconds": round(seconds, 3)})
+            report["results"].append({"mode": mode, "live": live, "finalize": finalize})
+    finally:
+        if args.keep:
+            log(f"Benchmark files kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zoom_recorder
+
+
+@pytest.fixture
+def make_recorder(tmp_path):
+    """Build a ZoomMeetingRecorder on a config in tmp_path that records the synthetic sources without Zoom"""
+    def make(**settings):
+        config = {
+            "recordings_path": str(tmp_path / "recordings"),
+            "meetings": [],
+            "launch_zoom": False,
+            "capture_backend": "synthetic",
+            "audio_source": "synthetic",
+            **settings,
+        }
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(config))
+        return zoom_recorder.ZoomMeetingRecorder(str(config_file))
+    return make
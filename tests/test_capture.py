@@ -0,0 +1,191 @@
+import time
+import queue
+import multiprocessing
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import zoom_recorder
+from zoom_recorder import (CaptureBackend, CaptureProcessPool, MultiMonitorCaptureBackend, PipelineMetrics,
+                           ScreenSource, SharedFrameRing, clamp_region)
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(multiprocessing.get_context("spawn"), 3, 8, 6)
+    yield ring
+    ring.unlink()
+
+
+def publish(ring, index, value, width=8, height=6):
+    slot = ring.reserve(width, height)
+    if slot is None:
+        return False
+    slot[:] = value
+    ring.publish(index, index / 10)
+    return True
+
+
+def test_frame_ring_hands_frames_over_in_order(ring):
+    for index in range(3):
+        assert publish(ring, index, index + 1)
+    assert ring.pending() == 3
+    for index in range(3):
+        got, frame, timestamp = ring.get(timeout=1)
+        assert (got, timestamp, frame.shape) == (index, index / 10, (6, 8, 3))
+        assert (frame == index + 1).all()
+        ring.release()
+    assert ring.pending() == 0
+    with pytest.raises(queue.Empty):
+        ring.get(timeout=0.01)
+
+
+def test_frame_ring_slots_are_reused_only_once_released(ring):
+    assert all(publish(ring, index, 0) for index in range(3))
+    # Every slot is published or still being read
+    assert not publish(ring, 3, 0)
+    ring.get(timeout=1)
+    assert not publish(ring, 3, 0)
+    ring.release()
+    assert publish(ring, 3, 0)
+
+
+def test_frame_ring_can_hold_smaller_frames_only(ring):
+    assert publish(ring, 0, 7, width=4, height=2)
+    assert ring.get(timeout=1)[1].shape == (2, 4, 3)
+    with pytest.raises(ValueError):
+        ring.reserve(16, 6)
+
+
+def test_closed_frame_ring_is_drained_before_it_finishes(ring):
+    publish(ring, 0, 1)
+    ring.close()
+    assert ring.get(timeout=1)[0] == 0
+    ring.release()
+    assert ring.get(timeout=1) is None
+    assert ring.finished and ring.get() is None
+
+
+def test_capture_processes_take_turns_and_merge_in_tick_order(tmp_path):
+    pool = CaptureProcessPool(2, frame_slots=3)
+    screen = ScreenSource("synthetic", {"width": 64, "height": 48})
+    pool.start({"output_file": str(tmp_path / "meeting"), "screen": screen, "fps": 20}, 64, 48)
+    try:
+        pool.set_start_time(time.monotonic())
+        frames = []
+        while len(frames) < 30:
+            index, frame, _ = pool.next_frame()
+            assert frame.shape == (48, 64, 3)
+            frames.append(index)
+        pool.stop()
+        while pool.next_frame() is not None:
+            pass
+        stats = pool.collect(PipelineMetrics())
+    finally:
+        pool.stop()
+        pool.close()
+
+    assert frames == sorted(set(frames))
+    # Worker 0 captures the even ticks and worker 1 the odd ones
+    assert {index % 2 for index in frames} == {0, 1}
+    assert stats["captured"] >= len(frames)
+    assert not stats["failed"]
+    assert pool.collect(PipelineMetrics()) is None
+
+
+def test_capture_process_that_cannot_capture_fails_the_start(tmp_path):
+    pool = CaptureProcessPool(1)
+    screen = ScreenSource("no-such-backend")
+    with pytest.raises(RuntimeError, match="exited before it was ready"):
+        pool.start({"output_file": str(tmp_path / "meeting"), "screen": screen, "fps": 20}, 64, 48)
+    assert pool.rings == []
+
+
+class SolidCaptureBackend(CaptureBackend):
+    """One flat colour per monitor, BGRA for monitors left of the primary; fails if the options say so"""
+
+    name = "solid"
+
+    def grab(self):
+        if self.options.get("fail_left") == self.left:
+            raise RuntimeError("monitor unplugged")
+        if self.left < 0:
+            return np.full((self.height, self.width, 4), 50, dtype=np.uint8)
+        return np.full((self.height, self.width, 3), 150, dtype=np.uint8)
+
+
+# A monitor left of the primary and lower down, so the desktop has negative offsets
+MONITORS = [(-160, 0, 160, 120), (0, -40, 200, 100)]
+
+
+@pytest.fixture
+def monitors(monkeypatch):
+    monkeypatch.setitem(zoom_recorder.CAPTURE_BACKENDS, "solid", SolidCaptureBackend)
+    opened = []
+
+    def make(layout, **options):
+        capture = MultiMonitorCaptureBackend(MONITORS, "solid", options, layout, window_poll_interval=0)
+        capture.open()
+        opened.append(capture)
+        return capture
+    yield make
+    for capture in opened:
+        capture.close()
+
+
+@pytest.mark.parametrize("layout", ["tiled", "tracks"])
+def test_monitors_are_drawn_where_they_sit_on_the_desktop(monitors, layout):
+    capture = monitors(layout)
+    canvas = capture.grab()
+    assert (capture.left, capture.top, canvas.shape) == (-160, -40, (160, 360, 3))
+    assert (canvas[40:, :160] == 50).all()
+    assert (canvas[:100, 160:] == 150).all()
+    # Desktop no monitor covers
+    assert not canvas[:40, :160].any() and not canvas[100:, 160:].any()
+
+
+def test_track_regions_follow_the_canvas_scale(monitors):
+    capture = monitors("tracks")
+    assert capture.track_regions(360, 160) == [[0, 40, 160, 120], [160, 0, 200, 100]]
+    assert capture.track_regions(180, 80) == [[0, 20, 80, 60], [80, 0, 100, 50]]
+
+
+def test_failing_monitor_fails_the_grab(monitors):
+    capture = monitors("tiled", fail_left=0)
+    with pytest.raises(RuntimeError, match="monitor unplugged"):
+        capture.grab()
+
+
+def test_active_layout_records_the_monitor_showing_the_meeting(monitors, monkeypatch):
+    window = [None]
+    monkeypatch.setattr(zoom_recorder, "find_window_region", lambda title: window[0])
+    capture = monitors("active")
+    # Frames are the size of the largest monitor
+    assert (capture.width, capture.height) == (200, 100)
+    assert capture.grab().shape == (120, 160, 4)
+
+    # Mostly on the right-hand monitor
+    window[0] = (-40, -20, 200, 100)
+    assert (capture.grab() == 150).all()
+    assert capture.active == 1
+    # A window that cannot be found leaves the monitor as it was
+    window[0] = None
+    capture.grab()
+    assert capture.active == 1
+    window[0] = (-150, 50, 100, 60)
+    capture.grab()
+    assert capture.active == 0
+
+
+def test_unknown_monitor_layout_is_refused():
+    with pytest.raises(ValueError):
+        MultiMonitorCaptureBackend(MONITORS, "solid", layout="stacked")
+
+
+def test_capture_region_is_clipped_to_the_virtual_desktop():
+    screens = [SimpleNamespace(x=x, y=y, width=width, height=height) for x, y, width, height in MONITORS]
+    assert clamp_region((-200, -60, 100, 100), screens) == (-160, -40, 60, 80)
+    assert clamp_region((150, 50, 100, 100), screens) == (150, 50, 50, 70)
+    assert clamp_region((-160, -40, 360, 160), screens) == (-160, -40, 360, 160)
+    assert clamp_region((300, 0, 100, 100), screens) is None
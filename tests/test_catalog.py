@@ -0,0 +1,32 @@
+import sqlite3
+
+from zoom_recorder import RecordingCatalog
+
+
+def recording(path, meeting="Standup", started="2024-05-15T09:00:00"):
+    return {"meeting": meeting, "path": path, "started": started, "ended": "2024-05-15T10:00:00",
+            "duration": 3600.0, "status": "ready"}
+
+
+def test_search_and_thumbnails(tmp_path):
+    catalog = RecordingCatalog(str(tmp_path / "catalog.db"))
+    recording_id = catalog.add(recording("standup.mp4"), strip=[(0.0, b"a"), (60.0, b"b")],
+                               keyframes=[(12.5, b"k")])
+    catalog.add(recording("review.mp4", "Design review", "2024-05-16T14:00:00"))
+    assert [r["path"] for r in catalog.search()] == ["review.mp4", "standup.mp4"]
+    assert [r["path"] for r in catalog.search("stand")] == ["standup.mp4"]
+    assert catalog.thumbnails(recording_id, "strip") == [(0.0, b"a"), (60.0, b"b")]
+    assert catalog.keyframe_times(recording_id) == [12.5]
+
+
+def test_queries_do_not_wait_for_a_writer(tmp_path):
+    catalog = RecordingCatalog(str(tmp_path / "catalog.db"))
+    catalog.add(recording("standup.mp4"))
+    writer = sqlite3.connect(catalog.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        assert [r["path"] for r in catalog.search("stand")] == ["standup.mp4"]
+        assert catalog.get(1)["meeting"] == "Standup"
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
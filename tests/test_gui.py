@@ -0,0 +1,55 @@
+import os
+import json
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from zoom_recorder_gui import MeetingsTableModel
+
+
+@pytest.fixture
+def model(make_recorder):
+    # Kept referenced while the model is in use
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    model = MeetingsTableModel(make_recorder())
+    yield model
+    model.save_timer.stop()
+
+
+def meeting(name):
+    return {"name": name, "join_url": "https://zoom.us/j/1", "schedule": "09:00", "duration_minutes": 60,
+            "days": ["Monday"], "profile": "full"}
+
+
+def saved_meetings(model):
+    with open(model.recorder.config_file) as f:
+        return [m["name"] for m in json.load(f)["meetings"]]
+
+
+def test_edits_are_saved_together(model):
+    model.add_meeting(meeting("standup"))
+    model.add_meeting(meeting("review"))
+    assert model.setData(model.index(0, 0), "daily")
+    assert model.rowCount() == 2
+    assert saved_meetings(model) == []
+    assert model.save_timer.isActive()
+    model.save()
+    assert saved_meetings(model) == ["daily", "review"]
+    assert not model.save_timer.isActive()
+
+
+def test_invalid_meeting_is_refused_before_any_row_is_inserted(model):
+    signals = []
+    model.rowsAboutToBeInserted.connect(lambda *args: signals.append("begin"))
+    model.rowsInserted.connect(lambda *args: signals.append("end"))
+    model.invalid.connect(signals.append)
+    assert not model.add_meeting({**meeting("standup"), "schedule": "9 o'clock"})
+    assert len(signals) == 1 and signals[0] not in ("begin", "end")
+    assert model.rowCount() == 0
+    assert model.add_meeting(meeting("standup"))
+    assert signals[1:] == ["begin", "end"]
+    assert model.rowCount() == 1
@@ -0,0 +1,117 @@
+import time
+import datetime
+
+import pytest
+
+from zoom_recorder import MeetingJobQueue, sqlite_transaction
+
+
+def meeting(name, duration_minutes=60):
+    return {"name": name, "join_url": "https://zoom.us/j/1", "schedule": "09:00",
+            "duration_minutes": duration_minutes, "days": ["Monday"]}
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return MeetingJobQueue(str(tmp_path / "jobs.db"), lease_seconds=60, max_attempts=2)
+
+
+def expire_leases(job_queue):
+    with sqlite_transaction(job_queue.path) as db:
+        db.execute("UPDATE jobs SET lease_expires = ?", (time.time() - 1,))
+
+
+def states(job_queue):
+    jobs, _ = job_queue.status()
+    return {job["id"]: job["state"] for job in jobs}
+
+
+def test_adding_an_occurrence_twice_queues_one_job(job_queue):
+    when = datetime.datetime.now()
+    assert job_queue.add(meeting("standup"), when) == job_queue.add(meeting("standup"), when)
+    assert len(job_queue.status()[0]) == 1
+
+
+def test_claim_waits_for_pre_roll(job_queue):
+    job_queue.add(meeting("standup"), datetime.datetime.now() + datetime.timedelta(minutes=5))
+    assert job_queue.claim("rec-1", pre_roll=60) is None
+    job = job_queue.claim("rec-1", pre_roll=600)
+    assert (job["worker"], job["attempts"]) == ("rec-1", 1)
+
+
+def test_live_lease_is_not_taken_over(job_queue):
+    job_queue.add(meeting("standup"), datetime.datetime.now())
+    job = job_queue.claim("rec-1")
+    assert job_queue.claim("rec-2") is None
+    assert job_queue.heartbeat(job["id"], "rec-1")
+    assert not job_queue.heartbeat(job["id"], "rec-2")
+
+
+def test_expired_lease_is_taken_over_until_attempts_run_out(job_queue):
+    job_queue.add(meeting("standup"), datetime.datetime.now())
+    first = job_queue.claim("rec-1")
+    expire_leases(job_queue)
+    second = job_queue.claim("rec-2")
+    assert (second["id"], second["worker"], second["attempts"]) == (first["id"], "rec-2", 2)
+    # The first worker finds out at its next heartbeat
+    assert not job_queue.heartbeat(first["id"], "rec-1")
+    expire_leases(job_queue)
+    assert job_queue.claim("rec-3") is None
+
+
+def test_released_job_can_be_claimed_straight_away(job_queue):
+    job_queue.add(meeting("standup"), datetime.datetime.now())
+    job = job_queue.claim("rec-1")
+    job_queue.release(job["id"], "rec-1")
+    assert job_queue.claim("rec-2")["worker"] == "rec-2"
+
+
+def test_expire_marks_jobs_of_past_meetings_missed_unless_done_or_held(job_queue):
+    now = datetime.datetime.now()
+    over = job_queue.add(meeting("over"), now)
+    abandoned = job_queue.add(meeting("abandoned"), now)
+    held = job_queue.add(meeting("held"), now)
+    done = job_queue.add(meeting("done"), now)
+    running = job_queue.add(meeting("running"), now)
+    for job_id, worker in [(abandoned, "rec-1"), (held, "rec-2"), (done, "rec-3")]:
+        with sqlite_transaction(job_queue.path) as db:
+            db.execute("UPDATE jobs SET state = 'claimed', worker = ?, lease_expires = ? WHERE id = ?",
+                       (worker, time.time() + 60, job_id))
+    job_queue.finish(done, "rec-3")
+    with sqlite_transaction(job_queue.path) as db:
+        db.execute("UPDATE jobs SET end_ts = ? WHERE id != ?", (time.time() - 1, running))
+        db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, abandoned))
+    job_queue.expire()
+    assert states(job_queue) == {over: "missed", abandoned: "missed", held: "claimed", done: "done",
+                                 running: "pending"}
+
+
+def test_worker_records_one_meeting_at_a_time_without_concurrent_policy(make_recorder, monkeypatch, tmp_path):
+    recorder = make_recorder(job_queue=str(tmp_path / "jobs.db"), worker_capacity=3, overlap_policy="queue",
+                             worker_poll_interval=0)
+    capacities = []
+
+    def register_worker(worker_id, capacity, active):
+        capacities.append(capacity)
+        recorder.scheduler_running = False
+
+    monkeypatch.setattr(recorder.get_job_queue(), "register_worker", register_worker)
+    monkeypatch.setattr(recorder.get_job_queue(), "claim", lambda worker_id, pre_roll=0: None)
+    recorder.run_worker()
+    assert capacities == [1]
+
+
+def test_takeover_records_to_its_own_file(make_recorder, monkeypatch, tmp_path):
+    recorder = make_recorder(job_queue=str(tmp_path / "jobs.db"), lease_seconds=0)
+    job_queue = recorder.get_job_queue()
+    job_queue.add(meeting("standup"), datetime.datetime.now())
+    output_files = []
+    monkeypatch.setattr(recorder, "execute_scheduled_task", lambda meeting_info, scheduled_at=None:
+                        output_files.append(recorder._output_file(meeting_info, scheduled_at)))
+    first = job_queue.claim("rec-1")
+    time.sleep(0.01)
+    # rec-1 stopped heartbeating, so its lease has run out
+    second = job_queue.claim("rec-2")
+    recorder._run_queued_job(first)
+    recorder._run_queued_job(second)
+    assert output_files[1] == f"{output_files[0]}_attempt2"
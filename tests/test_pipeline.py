@@ -0,0 +1,254 @@
+import re
+import time
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import zoom_recorder
+from zoom_recorder import (AdaptiveQuality, AdaptiveQualityController, AudioClockAligner, SyntheticCaptureBackend,
+                           MeetingEndDetector, create_recording_pipeline)
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs FFmpeg")
+
+
+def stream_duration(path, stream):
+    """Seconds of the given stream ("a" or "v") in a media file, by decoding it"""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-i", path, "-map", f"0:{stream}", "-f", "null", "-"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    hours, minutes, seconds = re.findall(r"time=(\d+):(\d+):([\d.]+)", result.stderr)[-1]
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def record(tmp_path, seconds, **settings):
+    pipeline = create_recording_pipeline(str(tmp_path / "meeting"), capture_backend="synthetic",
+                                         audio_source="synthetic", **settings)
+    pipeline.start()
+    time.sleep(seconds)
+    pipeline.stop()
+    return pipeline
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("max_frame_gap", [1.0, 10.0])
+def test_direct_encode_keeps_all_audio_on_static_screen(tmp_path, max_frame_gap):
+    pipeline = record(tmp_path, 8, fps=10, direct_encode=True, skip_duplicate_frames=True,
+                      max_frame_gap=max_frame_gap,
+                      capture_options={"width": 320, "height": 240, "change_interval": 1000})
+    assert pipeline.output.encode_succeeded
+    assert pipeline.frames_unchanged > 0
+    assert pipeline.audio_ring.overflows == 0
+    assert stream_duration(str(tmp_path / "meeting.mp4"), "a") == pytest.approx(8, abs=0.5)
+    assert stream_duration(str(tmp_path / "meeting.mp4"), "v") == pytest.approx(8, abs=0.5)
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("settings", [{}, {"direct_encode": True}, {"direct_encode": True, "segment_seconds": 1}])
+def test_output_size_counts_only_own_files(tmp_path, settings):
+    (tmp_path / "meeting_other.mp4").write_bytes(b"x" * 100000)
+    pipeline = record(tmp_path, 2.5, fps=5, capture_options={"width": 160, "height": 120}, **settings)
+    own = [path for path in tmp_path.iterdir() if path.name != "meeting_other.mp4"]
+    assert own
+    assert sorted(pipeline.output_paths()) == sorted(str(path) for path in own)
+    assert pipeline.output_size_bytes() == sum(path.stat().st_size for path in own)
+
+
+@pytest.mark.parametrize("out", [False, True])
+def test_convert_frame_letterboxes_other_aspect_ratios(tmp_path, out):
+    pipeline = create_recording_pipeline(str(tmp_path / "meeting"), capture_backend="synthetic",
+                                         audio_source="synthetic")
+    pipeline.screen = SimpleNamespace(reuses_buffer=False)
+    # A narrow window into a 16:9 output keeps its shape, centered between black bars
+    window = np.full((400, 300, 4), 200, dtype=np.uint8)
+    frame = pipeline._convert_frame(window, 320, 180, np.ones((180, 320, 3), dtype=np.uint8) if out else None)
+    assert frame.shape == (180, 320, 3)
+    assert (frame[:, :92] == 0).all() and (frame[:, 228:] == 0).all()
+    assert (frame[:, 93:227] == 200).all()
+
+
+class FailingCaptureBackend(SyntheticCaptureBackend):
+    """Synthetic frames until the fifth grab, as if the display went away"""
+
+    name = "failing"
+
+    def grab(self):
+        self.grabs = getattr(self, "grabs", 0) + 1
+        if self.grabs > 4:
+            raise RuntimeError("display lost")
+        return super().grab()
+
+
+@pytest.mark.parametrize("fallback", [None, "synthetic"])
+def test_capture_failure_falls_back_or_fails_the_pipeline(tmp_path, monkeypatch, fallback):
+    monkeypatch.setattr(FailingCaptureBackend, "fallback", fallback)
+    monkeypatch.setitem(zoom_recorder.CAPTURE_BACKENDS, "failing", FailingCaptureBackend)
+    monitor = SimpleNamespace(x=0, y=0, width=160, height=120)
+    monkeypatch.setattr(zoom_recorder, "screeninfo", SimpleNamespace(get_monitors=lambda: [monitor]))
+    pipeline = create_recording_pipeline(str(tmp_path / "meeting"), fps=10, capture_backend="failing",
+                                         audio_source="synthetic")
+    pipeline.start()
+    time.sleep(1.5)
+    pipeline.stop()
+    if fallback:
+        assert pipeline.error is None
+        assert pipeline.screen.backend == "synthetic"
+        assert pipeline.frames_captured > 8
+    else:
+        assert "display lost" in pipeline.error
+        assert "error" in pipeline.metrics()
+        assert pipeline.frames_captured == 3
+
+
+@needs_ffmpeg
+def test_encoder_restart_numbers_segments_after_the_old_encoders(tmp_path):
+    pipeline = create_recording_pipeline(str(tmp_path / "meeting"), fps=5, capture_backend="synthetic",
+                                         audio_source="synthetic", capture_options={"width": 160, "height": 120},
+                                         direct_encode=True, segment_seconds=1)
+    pipeline.start()
+    # x264 lookahead may keep the old encoder from having opened its segments yet
+    time.sleep(1.5)
+    assert pipeline.set_quality(1, "ultrafast", 0.5, True) == (80, 60)
+    time.sleep(1.5)
+    pipeline.stop()
+    old, new = pipeline.output.parts
+    assert pipeline.output.encode_succeeded
+    assert old["segments"] and new["segments"]
+    # Each encoder's segments are its own, and the old encoder's all come first
+    assert not set(old["segments"]) & set(new["segments"])
+    assert max(old["segments"]) < min(new["segments"])
+
+
+def aligned_seconds(aligner, chunks, period, channels=2):
+    """Seconds of audio out of the aligner for 0.1 s chunks read every period seconds of the monotonic clock"""
+    chunk = np.full((800, channels), 1000, dtype="<i2").tobytes()
+    written = sum(len(aligner.align(chunk, aligner.start_time + (i + 1) * period)) for i in range(chunks))
+    return written / (2 * channels) / aligner.rate
+
+
+def test_audio_clock_aligner_pads_late_audio_and_drops_early_audio():
+    late = AudioClockAligner(8000, 1, 2, start_time=50.0)
+    padded = np.frombuffer(late.align(np.ones(800, dtype="<i2").tobytes(), 50.3), dtype="<i2")
+    assert late.lead_in == pytest.approx(0.2)
+    assert len(padded) == 2400 and not padded[:1600].any() and padded[1600:].all()
+
+    early = AudioClockAligner(8000, 1, 2, start_time=50.0)
+    assert len(early.align(np.ones(800, dtype="<i2").tobytes(), 50.05)) // 2 == 400
+    assert early.lead_in == pytest.approx(-0.05)
+
+
+@pytest.mark.parametrize("period", [0.1004, 0.0996])
+def test_audio_clock_aligner_corrects_sound_card_drift(period):
+    # A sound card 0.4% slow or fast would be 120 ms out after 30 seconds
+    aligner = AudioClockAligner(8000, 2, 2, start_time=50.0)
+    assert aligned_seconds(aligner, 300, period) == pytest.approx(300 * period, abs=0.04)
+    assert aligner.corrected_samples > 0
+    assert aligner.max_drift < 0.04
+
+
+def test_audio_clock_aligner_leaves_a_steady_clock_alone():
+    aligner = AudioClockAligner(8000, 2, 2, start_time=50.0)
+    assert aligned_seconds(aligner, 300, 0.1) == pytest.approx(30)
+    assert aligner.corrected_samples == 0
+
+
+HEALTHY = {"fps_ratio": 1.0, "queue_fill": 0.0, "dropped": 0, "cpu": 30}
+OVERLOADED = {**HEALTHY, "cpu": 95}
+
+
+def test_quality_levels_lower_the_capture_rate_before_the_encoder():
+    controller = AdaptiveQualityController(15, "veryfast", min_fps=5)
+    assert [(level["stride"], level["preset"], level["scale"]) for level in controller.levels] == [
+        (1, "veryfast", 1.0), (2, "veryfast", 1.0), (3, "veryfast", 1.0), (3, "superfast", 1.0),
+        (3, "ultrafast", 1.0), (3, "ultrafast", 0.75), (3, "ultrafast", 0.5)]
+    assert len(AdaptiveQualityController(15, "veryfast", adjust_encoder=False, min_fps=5).levels) == 3
+
+
+def test_quality_steps_down_at_once_and_up_only_after_recover_checks():
+    controller = AdaptiveQualityController(15, "veryfast", adjust_encoder=False, min_fps=5, recover_checks=3)
+    assert controller.check(**{**HEALTHY, "fps_ratio": 0.5}) == (1, "50% of target fps")
+    assert controller.check(**{**HEALTHY, "dropped": 4, "queue_fill": 0.8}) == (
+        2, "video queue 80% full, 4 frames dropped")
+    # Already at the lowest level
+    assert controller.check(**OVERLOADED) == (2, None)
+
+    assert controller.check(**HEALTHY) == (2, None)
+    assert controller.check(**HEALTHY) == (2, None)
+    assert controller.check(**HEALTHY) == (1, "headroom, CPU 30%")
+    # Neither overloaded nor healthy: the count starts again
+    assert controller.check(**HEALTHY) == (1, None)
+    assert controller.check(**HEALTHY) == (1, None)
+    assert controller.check(**{**HEALTHY, "cpu": 70}) == (1, None)
+    assert controller.check(**HEALTHY) == (1, None)
+    assert controller.check(**HEALTHY) == (1, None)
+    assert controller.check(**{**HEALTHY, "cpu": None}) == (0, "headroom")
+    assert controller.check(**HEALTHY) == (0, None)
+
+
+class OverloadedPipeline:
+    """Drops frames at every quality check, and cannot restart its encoder"""
+
+    start_time = 0.0
+
+    def __init__(self, checks):
+        stops = iter([False] * checks + [True])
+        self.stop_event = SimpleNamespace(wait=lambda timeout: next(stops))
+        self.dropped = 0
+        self.settings = []
+
+    def capture_load(self):
+        self.dropped += 5
+        return 100, self.dropped, 0.0
+
+    def set_quality(self, stride, preset, scale, restart):
+        self.settings.append((stride, preset, restart))
+        return None if restart else (320, 240)
+
+
+def test_adaptive_quality_keeps_the_level_when_the_encoder_cannot_restart():
+    quality = AdaptiveQuality(15, "veryfast", interval=0, min_fps=5)
+    quality.prepare(adjust_encoder=True)
+    pipeline = OverloadedPipeline(checks=4)
+    quality.run(pipeline)
+    assert pipeline.settings == [(2, "veryfast", False), (3, "veryfast", False),
+                                 (3, "superfast", True), (3, "superfast", True)]
+    assert [change["level"] for change in quality.changes] == [1, 2]
+    assert quality.controller.level == 2
+
+
+def feed_meeting(detector, seconds, talking_until, moving_until):
+    """Tone and changing frames until the given times, then silence and a still picture"""
+    rng = np.random.default_rng(0)
+    tone = (1000 * np.sin(np.arange(800) / 5)).astype("<i2").tobytes()
+    silence = bytes(1600)
+    still = np.full((72, 128, 3), 80, dtype=np.uint8)
+    for step in range(1, seconds * 10 + 1):
+        t = step / 10
+        detector.add_audio(tone if t <= talking_until else silence, t)
+        if step % 10 == 0:
+            moving = t < moving_until
+            detector.add_frame(rng.integers(0, 255, still.shape, dtype=np.uint8) if moving else still, t)
+
+
+def test_meeting_ends_after_the_grace_period_of_silence_and_a_still_picture():
+    detector = MeetingEndDetector(8000, 1)
+    feed_meeting(detector, 530, talking_until=400, moving_until=400)
+    # The audio window still holds the last tone until 401 s; the recording keeps a 2 s tail after that
+    assert detector.check(520.5) is None
+    assert detector.check(521.2) == (pytest.approx(403.0), "silent and static for 120 s")
+
+
+@pytest.mark.parametrize("talking_until, moving_until", [(530, 0), (0, 530)])
+def test_meeting_goes_on_while_either_stream_is_active(talking_until, moving_until):
+    detector = MeetingEndDetector(8000, 1)
+    feed_meeting(detector, 530, talking_until, moving_until)
+    assert detector.check(530) is None
+
+
+def test_meeting_cannot_end_within_min_seconds():
+    detector = MeetingEndDetector(8000, 1, min_seconds=300)
+    feed_meeting(detector, 300, talking_until=0, moving_until=0)
+    assert detector.check(299) is None
+    # The first frame, at 1 s, has nothing to compare with and counts as motion
+    assert detector.check(300) == (3.0, "silent and static for 299 s")
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import zoom_recorder
+from zoom_recorder import PostProcessingQueue, lock_file
+
+
+@pytest.fixture
+def recordings(tmp_path, monkeypatch):
+    # Inspect what resume() queues without running FFmpeg on it
+    monkeypatch.setattr(PostProcessingQueue, "_submit_ready", lambda self: None)
+    return tmp_path
+
+
+def touch(path):
+    path.write_bytes(b"\0")
+    return str(path)
+
+
+def test_resume_queues_orphaned_two_pass_recording(recordings):
+    video = touch(recordings / "Standup_20240515_090000_temp.avi")
+    audio = touch(recordings / "Standup_20240515_090000_temp.wav")
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    job = queue.jobs[str(recordings / "Standup_20240515_090000.mp4")]
+    assert job["type"] == "combine"
+    assert (job["temp_video_file"], job["temp_audio_file"]) == (video, audio)
+
+
+def test_resume_joins_segments_of_interrupted_recording(recordings):
+    touch(recordings / "Standup_20240515_090000_seg000.ts")
+    touch(recordings / "Standup_20240515_090000_seg001.ts")
+    touch(recordings / "Standup_20240515_090000_seg002_temp.avi")
+    touch(recordings / "Standup_20240515_090000_seg002_temp.wav")
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    segment = str(recordings / "Standup_20240515_090000_seg002.ts")
+    assert queue.jobs[segment]["type"] == "combine"
+    concat = queue.jobs[str(recordings / "Standup_20240515_090000.mp4")]
+    assert concat["type"] == "concat"
+    assert concat["segments"] == sorted([str(recordings / "Standup_20240515_090000_seg000.ts"),
+                                         str(recordings / "Standup_20240515_090000_seg001.ts"), segment])
+
+
+def test_resume_keeps_queued_jobs_and_drops_those_missing_inputs(recordings):
+    queue = PostProcessingQueue(str(recordings))
+    video = touch(recordings / "a_temp.avi")
+    audio = touch(recordings / "a_temp.wav")
+    queue.enqueue(video, audio, str(recordings / "a.mp4"))
+    queue.enqueue(str(recordings / "gone_temp.avi"), str(recordings / "gone_temp.wav"), str(recordings / "gone.mp4"))
+    queue.shutdown()
+
+    restarted = PostProcessingQueue(str(recordings))
+    restarted.resume()
+    assert list(restarted.jobs) == [str(recordings / "a.mp4")]
+
+
+def test_resume_ignores_video_without_audio(recordings):
+    touch(recordings / "a_temp.avi")
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    assert queue.jobs == {}
+
+
+def test_resume_queues_orphaned_audio_only_recording(recordings):
+    audio = touch(recordings / "Webinar_20240515_090000_temp.wav")
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    job = queue.jobs[str(recordings / "Webinar_20240515_090000.mp4")]
+    assert (job["temp_video_file"], job["temp_audio_file"]) == (None, audio)
+
+
+def test_resume_ignores_audio_past_the_last_video_segment(recordings):
+    touch(recordings / "a_seg000_temp.avi")
+    touch(recordings / "a_seg000_temp.wav")
+    touch(recordings / "a_seg001_temp.wav")
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    assert str(recordings / "a_seg001.ts") not in queue.jobs
+    assert str(recordings / "a_seg000.ts") in queue.jobs
+
+
+def test_resume_adopts_queue_file_of_a_previous_version(recordings):
+    video = touch(recordings / "a_temp.avi")
+    audio = touch(recordings / "a_temp.wav")
+    (recordings / "postprocess_queue.json").write_text(json.dumps(
+        {"a": {"output_file": str(recordings / "a"), "temp_video_file": video, "temp_audio_file": audio}}))
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    assert list(queue.jobs) == [str(recordings / "a.mp4")]
+    assert not (recordings / "postprocess_queue.json").exists()
+
+
+def test_resume_leaves_files_of_a_live_recording_alone(recordings):
+    touch(recordings / "a_temp.avi")
+    touch(recordings / "a_temp.wav")
+    touch(recordings / "b_seg000.ts")
+    touch(recordings / "b_seg001_temp.avi")
+    touch(recordings / "b_seg001_temp.wav")
+    locks = [lock_file(str(recordings / "a.lock")), lock_file(str(recordings / "b.lock"))]
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    assert queue.jobs == {}
+    locks[0].close()
+    # A lock file without its process is stale
+    queue.resume()
+    assert list(queue.jobs) == [str(recordings / "a.mp4")]
+    assert not (recordings / "a.lock").exists()
+
+
+def test_resume_leaves_jobs_of_a_live_queue_alone(recordings):
+    running = PostProcessingQueue(str(recordings))
+    running.enqueue(touch(recordings / "a_temp.avi"), touch(recordings / "a_temp.wav"), str(recordings / "a.mp4"))
+    queue = PostProcessingQueue(str(recordings))
+    queue.resume()
+    assert queue.jobs == {}
+    assert list(running.jobs) == [str(recordings / "a.mp4")]
+
+
+@pytest.mark.parametrize("query", [["--next"], ["--jobs"], ["--recordings"], ["--keyframes", "1"]])
+def test_queries_leave_the_recordings_directory_alone(make_recorder, recordings, monkeypatch, query):
+    make_recorder()
+    monkeypatch.setattr(zoom_recorder, "configure_logging", lambda console=False: None)
+    touch(recordings / "recordings" / "a_temp.avi")
+    touch(recordings / "recordings" / "a_temp.wav")
+    zoom_recorder.main(["--config", str(recordings / "config.json")] + query)
+    assert not list((recordings / "recordings").glob("postprocess_queue*"))
+
+
+def test_running_mode_resumes_and_releases_the_queue(make_recorder, recordings):
+    recorder = make_recorder()
+    touch(recordings / "recordings" / "a_temp.avi")
+    touch(recordings / "recordings" / "a_temp.wav")
+    recorder.has_ffmpeg = True
+    recorder.add_listener(lambda event, data: event == "waiting" and recorder.stop_scheduler())
+    zoom_recorder.run_headless(recorder)
+    assert list(recorder.postprocess_queue.jobs) == [str(recordings / "recordings" / "a.mp4")]
+    assert recorder.postprocess_queue.state_lock is None
@@ -0,0 +1,137 @@
+import time
+import datetime
+import threading
+
+import zoom_recorder
+from zoom_recorder import MeetingTimeline
+
+
+def meeting(name, schedule="09:00", days=("Monday",), duration_minutes=60):
+    return {"name": name, "join_url": "https://zoom.us/j/1", "schedule": schedule,
+            "duration_minutes": duration_minutes, "days": list(days)}
+
+
+# A Wednesday
+NOW = datetime.datetime(2024, 5, 15, 10, 30)
+
+
+def test_next_occurrence_later_today_this_week_and_next_week():
+    timeline = MeetingTimeline([meeting("later", "11:00", ["Wednesday"]),
+                                meeting("friday", "08:00", ["Friday"]),
+                                meeting("earlier", "10:00", ["Wednesday"])], now=NOW)
+    occurrences = {entry[2]["name"]: entry[0] for entry in timeline.heap}
+    assert occurrences["later"] == datetime.datetime(2024, 5, 15, 11, 0)
+    assert occurrences["friday"] == datetime.datetime(2024, 5, 17, 8, 0)
+    assert occurrences["earlier"] == datetime.datetime(2024, 5, 22, 10, 0)
+
+
+def test_one_entry_per_day_and_unknown_days_ignored():
+    timeline = MeetingTimeline([meeting("standup", days=["Monday", "Tuesday", "Someday"])], now=NOW)
+    assert len(timeline) == 2
+
+
+def test_peek_returns_soonest_occurrence():
+    timeline = MeetingTimeline([meeting("b", "15:00", ["Wednesday"]), meeting("a", "12:00", ["Wednesday"])],
+                               now=NOW)
+    when, first = timeline.peek()
+    assert first["name"] == "a"
+    assert when == datetime.datetime(2024, 5, 15, 12, 0)
+
+
+def test_pop_due_reschedules_one_week_later():
+    timeline = MeetingTimeline([meeting("a", "11:00", ["Wednesday"])], now=NOW)
+    assert timeline.pop_due(NOW) == []
+    due = timeline.pop_due(datetime.datetime(2024, 5, 15, 11, 0))
+    assert [(when, m["name"]) for when, m in due] == [(datetime.datetime(2024, 5, 15, 11, 0), "a")]
+    assert timeline.peek()[0] == datetime.datetime(2024, 5, 22, 11, 0)
+    assert len(timeline) == 1
+
+
+def test_pop_due_returns_every_overdue_occurrence_in_order():
+    timeline = MeetingTimeline([meeting("b", "12:00", ["Wednesday"]), meeting("a", "11:00", ["Wednesday"]),
+                                meeting("c", "12:00", ["Thursday"])], now=NOW)
+    due = timeline.pop_due(datetime.datetime(2024, 5, 15, 13, 0))
+    assert [m["name"] for _, m in due] == ["a", "b"]
+
+
+def test_queue_policy_skips_meeting_once_it_would_be_over(make_recorder):
+    recorder = make_recorder(overlap_policy="queue")
+    assert recorder._acquire_meeting_slot(meeting("first"))
+    assert not recorder._acquire_meeting_slot(meeting("second", duration_minutes=0.01))
+    assert recorder._release_meeting_slot()
+
+
+def test_queue_policy_starts_queued_meeting_when_slot_frees(make_recorder):
+    recorder = make_recorder(overlap_policy="queue")
+    assert recorder._acquire_meeting_slot(meeting("first"))
+    threading.Timer(0.2, recorder._release_meeting_slot).start()
+    assert recorder._acquire_meeting_slot(meeting("second"))
+    assert recorder.running_tasks == 1
+
+
+def test_queued_meeting_starts_only_after_zoom_is_closed(make_recorder, monkeypatch):
+    recorder = make_recorder(overlap_policy="queue")
+    calls = []
+
+    def leave_meeting():
+        calls.append("leaving")
+        time.sleep(0.2)
+        calls.append("left")
+
+    monkeypatch.setattr(recorder, "leave_meeting", leave_meeting)
+    assert recorder._acquire_meeting_slot(meeting("first"))
+    queued = threading.Thread(target=lambda: recorder._acquire_meeting_slot(meeting("second"))
+                              and calls.append("second started"))
+    queued.start()
+    recorder._release_meeting_slot()
+    queued.join()
+    assert calls == ["leaving", "left", "second started"]
+
+
+def test_concurrent_policy_runs_both(make_recorder):
+    recorder = make_recorder(overlap_policy="concurrent")
+    assert recorder._acquire_meeting_slot(meeting("first"))
+    assert recorder._acquire_meeting_slot(meeting("second"))
+    assert recorder.running_tasks == 2
+    assert not recorder._release_meeting_slot()
+    assert recorder._release_meeting_slot()
+
+
+def test_preempt_policy_stops_the_running_recording(make_recorder, monkeypatch):
+    recorder = make_recorder(overlap_policy="preempt")
+    running = zoom_recorder.RecordingSession(meeting("first"), "first")
+    calls = []
+    monkeypatch.setattr(recorder, "get_active_sessions", lambda: [running])
+    monkeypatch.setattr(recorder, "stop_recording", lambda session=None: calls.append("stop"))
+    monkeypatch.setattr(recorder, "leave_meeting", lambda: calls.append("leave"))
+    assert recorder._acquire_meeting_slot(meeting("second"))
+    assert calls == ["stop", "leave"]
+    assert recorder.running_tasks == 1
+
+
+def test_occurrences_in_time_order_with_shared_time_slots():
+    timeline = MeetingTimeline([meeting("b", "12:00", ["Wednesday"]), meeting("a", "12:00", ["Wednesday"]),
+                                meeting("c", "11:00", ["Wednesday"])], now=NOW)
+    assert [m["name"] for _, m in timeline.occurrences()] == ["c", "b", "a"]
+
+
+def test_saving_config_during_pre_roll_does_not_dispatch_again(make_recorder, monkeypatch):
+    when = (datetime.datetime.now() + datetime.timedelta(minutes=2)).replace(second=0, microsecond=0)
+    recorder = make_recorder(pre_roll_seconds=180,
+                             meetings=[meeting("standup", when.strftime("%H:%M"), [when.strftime("%A")])])
+    dispatched = []
+    monkeypatch.setattr(recorder, "dispatch_scheduled_task",
+                        lambda meeting_info, scheduled_at=None: dispatched.append(scheduled_at))
+    scheduler = threading.Thread(target=recorder.run_scheduler)
+    scheduler.start()
+    try:
+        for _ in range(50):
+            if dispatched:
+                break
+            threading.Event().wait(0.1)
+        recorder.save_config()
+        threading.Event().wait(0.5)
+    finally:
+        recorder.stop_scheduler()
+        scheduler.join()
+    assert dispatched == [when]
@@ -2,284 +2,3780 @@ import os
 import sys
 import json
 import time
-import schedule
 import threading
 import datetime
 import logging
-import cv2
-import numpy as np
-import pyautogui
-import pyaudio
-import wave
+import queue
+import re
+import heapq
+import collections
+import itertools
+import concurrent.futures
+import multiprocessing
+import multiprocessing.shared_memory
+import importlib
+import argparse
+import signal
+import socket
+import sqlite3
+import contextlib
+import struct
+import tempfile
 import subprocess
-from screeninfo import get_monitors
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QLineEdit, QTimeEdit, QSpinBox, QComboBox, QPushButton, 
-                            QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QCheckBox)
-from PyQt5.QtCore import Qt, QTime, QTimer
-
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='zoom_recorder.log'
-)
+import ctypes
+import ctypes.util
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
 logger = logging.getLogger('zoom_recorder')
 
-class ZoomRecorderApp(QMainWindow):
-    # GUI implementation remains largely the same as before
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(filename='zoom_recorder.log', console=False):
+    """Log to filename, and to the console if asked; done by the entry points, not on import"""
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, filename=filename)
+    if console:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logging.getLogger().addHandler(handler)
+
+
+class _LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Capture, audio and encoding modules are loaded when a recording starts, so the
+# scheduler starts quickly and idles small; pyautogui also needs a display to import
+cv2 = _LazyModule("cv2")
+np = _LazyModule("numpy")
+pyaudio = _LazyModule("pyaudio")
+pyautogui = _LazyModule("pyautogui")
+screeninfo = _LazyModule("screeninfo")
+
+
+class CaptureBackend:
+    """Base class for screen capture backends.
+
+    grab() returns the current contents of the capture region as a NumPy array
+    in BGR or BGRA layout. Backends that set reuses_buffer overwrite the same
+    array on every grab, so callers must copy or convert it before the next one.
+    A backend with a fallback is replaced by that one if it fails mid-recording.
+    """
+
+    name = None
+    reuses_buffer = False
+    fallback = None
+
+    def __init__(self, region, options=None):
+        self.left, self.top, self.width, self.height = region
+        self.options = options or {}
+
+    def open(self):
+        """Acquire any resources needed for capturing"""
+        pass
+
+    def grab(self):
+        """Capture one frame of the region"""
+        raise NotImplementedError
+
+    def set_region(self, region):
+        """Move or resize the capture region"""
+        self.left, self.top, self.width, self.height = region
+
+    def close(self):
+        """Release capture resources"""
+        pass
+
+
+class PyAutoGUICaptureBackend(CaptureBackend):
+    """Portable capture through pyautogui screenshots (PIL image, RGB)"""
+
+    name = "pyautogui"
+
+    def grab(self):
+        screenshot = pyautogui.screenshot(region=(self.left, self.top, self.width, self.height))
+        return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Only the leading fields are needed; the function table that follows is never touched
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+class X11ShmCaptureBackend(CaptureBackend):
+    """Linux capture using MIT-SHM XShmGetImage into a reused shared-memory buffer.
+
+    The X server copies the region straight into a System V shared memory
+    segment that is exposed as a BGRA NumPy array, so no intermediate image
+    objects are created per frame.
+    """
+
+    name = "x11shm"
+    reuses_buffer = True
+    fallback = "pyautogui"
+
+    ZPIXMAP = 2
+    ALL_PLANES = 0xFFFFFFFF
+    IPC_PRIVATE = 0
+    IPC_CREAT = 0o1000
+    IPC_RMID = 0
+
+    def open(self):
+        if not sys.platform.startswith("linux"):
+            raise RuntimeError("X11 shared-memory capture is only available on Linux")
+
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11"))
+        xext = ctypes.CDLL(ctypes.util.find_library("Xext"))
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XRootWindow.restype = ctypes.c_ulong
+        x11.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                         ctypes.c_char_p, ctypes.POINTER(_XShmSegmentInfo),
+                                         ctypes.c_uint, ctypes.c_uint]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+                                      ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+        self.x11, self.xext, self.libc = x11, xext, libc
+
+        self.display = x11.XOpenDisplay(None)
+        if not self.display:
+            raise RuntimeError("Cannot open X display")
+        if not xext.XShmQueryExtension(self.display):
+            x11.XCloseDisplay(self.display)
+            raise RuntimeError("X server does not support the MIT-SHM extension")
+
+        screen = x11.XDefaultScreen(self.display)
+        self.root = x11.XRootWindow(self.display, screen)
+        self.shminfo = _XShmSegmentInfo()
+        self.image = xext.XShmCreateImage(self.display, x11.XDefaultVisual(self.display, screen),
+                                          x11.XDefaultDepth(self.display, screen), self.ZPIXMAP,
+                                          None, ctypes.byref(self.shminfo), self.width, self.height)
+        image = self.image.contents
+        if image.bits_per_pixel != 32:
+            self.close()
+            raise RuntimeError(f"Unsupported X11 pixel depth: {image.bits_per_pixel} bits")
+
+        size = image.bytes_per_line * image.height
+        self.shminfo.shmid = libc.shmget(self.IPC_PRIVATE, size, self.IPC_CREAT | 0o600)
+        if self.shminfo.shmid < 0:
+            self.close()
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        address = libc.shmat(self.shminfo.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            self.close()
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        self.shminfo.shmaddr = address
+        self.shminfo.readOnly = 0
+        image.data = address
+
+        xext.XShmAttach(self.display, ctypes.byref(self.shminfo))
+        x11.XSync(self.display, 0)
+        # Remove the segment id now; it is freed once both sides detach
+        libc.shmctl(self.shminfo.shmid, self.IPC_RMID, None)
+
+        buffer = (ctypes.c_ubyte * size).from_address(address)
+        self.frame = np.ndarray((image.height, image.width, 4), dtype=np.uint8, buffer=buffer,
+                                strides=(image.bytes_per_line, 4, 1))
+
+    def set_region(self, region):
+        # The shared-memory image has a fixed size, so a resize needs a new one
+        resized = (region[2], region[3]) != (self.width, self.height)
+        super().set_region(region)
+        if resized:
+            self.close()
+            self.open()
+
+    def grab(self):
+        if not self.xext.XShmGetImage(self.display, self.root, self.image,
+                                      self.left, self.top, self.ALL_PLANES):
+            raise RuntimeError("XShmGetImage failed")
+        return self.frame
+
+    def close(self):
+        display = getattr(self, "display", None)
+        if not display:
+            return
+        self.frame = None
+        if self.shminfo.shmaddr:
+            self.xext.XShmDetach(display, ctypes.byref(self.shminfo))
+            self.libc.shmdt(self.shminfo.shmaddr)
+            self.shminfo.shmaddr = None
+        if self.image:
+            self.x11.XFree(self.image)
+            self.image = None
+        self.x11.XCloseDisplay(display)
+        self.display = None
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """Generated frames for tests and benchmarks; needs no display.
+
+    Options: width/height override the region size, and change_interval sets
+    how many seconds the content stays static (0 changes it every frame).
+    """
+
+    name = "synthetic"
+    reuses_buffer = True
+
+    def open(self):
+        self.width = int(self.options.get("width", self.width))
+        self.height = int(self.options.get("height", self.height))
+        self.change_interval = float(self.options.get("change_interval", 0))
+        self.frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self.frame[:, :, 0] = np.linspace(0, 255, self.width, dtype=np.uint8)
+        self.frame[:, :, 1] = np.linspace(0, 255, self.height, dtype=np.uint8)[:, None]
+        self.start_time = time.monotonic()
+        self.frame_count = 0
+        self.last_step = -1
+
+    def grab(self):
+        if self.change_interval > 0:
+            step = int((time.monotonic() - self.start_time) / self.change_interval)
+        else:
+            step = self.frame_count
+        self.frame_count += 1
+
+        if step != self.last_step:
+            # Move a bright bar down the frame and shift the colours
+            self.last_step = step
+            self.frame[:, :, 2] = (step * 7) % 256
+            bar = (step * 16) % max(1, self.height - 16)
+            self.frame[bar:bar + 16, :, :] = 255
+        return self.frame
+
+
+CAPTURE_BACKENDS = {
+    backend.name: backend
+    for backend in (PyAutoGUICaptureBackend, X11ShmCaptureBackend, SyntheticCaptureBackend)
+}
+
+
+# PortAudio callback constants, so the synthetic source works without pyaudio installed
+PA_CONTINUE = 0
+PA_INPUT_UNDERFLOW = 0x1
+PA_INPUT_OVERFLOW = 0x2
+
+
+class AudioRingBuffer:
+    """Preallocated single-producer, single-consumer byte ring for captured audio.
+
+    The audio callback only advances write_total and the writer thread only
+    advances read_total. Each is a single reference assignment, so neither
+    side takes a lock and the callback never blocks. A chunk that does not
+    fit is dropped whole and counted in overflows.
+    """
+
+    def __init__(self, capacity, byte_rate):
+        self.capacity = capacity
+        self.byte_rate = byte_rate
+        self.buffer = memoryview(bytearray(capacity))
+        self.write_total = 0
+        self.read_total = 0
+        # Stream position and monotonic time of the end of the last write
+        self.last_write = (0, None)
+        self.overflows = 0
+
+    def fill(self):
+        """Bytes waiting to be read"""
+        return self.write_total - self.read_total
+
+    def write(self, data, timestamp):
+        """Append data captured up to timestamp; returns False if it was dropped"""
+        size = len(data)
+        if size > self.capacity - (self.write_total - self.read_total):
+            self.overflows += 1
+            return False
+        data = memoryview(data)
+        start = self.write_total % self.capacity
+        first = min(size, self.capacity - start)
+        self.buffer[start:start + first] = data[:first]
+        if first < size:
+            self.buffer[:size - first] = data[first:]
+        self.write_total += size
+        self.last_write = (self.write_total, timestamp)
+        return True
+
+    def read(self, max_bytes, block_align=1):
+        """Take up to max_bytes whole frames, with the capture time of the last byte taken"""
+        end_total, timestamp = self.last_write
+        size = min(end_total - self.read_total, max_bytes)
+        size -= size % block_align
+        if size <= 0:
+            return b'', None
+        start = self.read_total % self.capacity
+        first = min(size, self.capacity - start)
+        data = bytes(self.buffer[start:start + first])
+        if first < size:
+            data += bytes(self.buffer[:size - first])
+        self.read_total += size
+        return data, timestamp - (end_total - self.read_total) / self.byte_rate
+
+
+class SharedFrameRing:
+    """Preallocated BGR frame slots in shared memory between a capture process and the encoder.
+
+    The producer converts each frame straight into the next free slot with
+    reserve() and hands it over with publish(); the consumer gets a NumPy
+    view of the slot and release()s it once the frame has been written.
+    Two semaphores count the free and the filled slots, so frames are never
+    pickled or copied through a pipe. A float64 header holds each slot's tick
+    index, timestamp and size, plus the CONTROL fields both processes share:
+    the start time and stop flag, capture settings the recorder may change
+    while recording, the producer's counters and stage timings, and its state
+    and whether its capture failed.
+
+    Create the ring in the recording process and pass it to the capture
+    process as a Process argument; the copy attaches to the same memory.
+    """
+
+    STARTING, READY, CLOSED = 0, 1, 2
+    CONTROL = ("state", "stop", "start_time", "upcoming", "published", "stride", "width", "height",
+               "failed", "captured", "dropped", "unchanged", "ticks_missed",
+               "grab_count", "grab_total", "grab_max", "detect_count", "detect_total", "detect_max",
+               "convert_count", "convert_total", "convert_max")
+    SLOT_FIELDS = 4  # index, timestamp, width, height
+
+    def __init__(self, context, slots, width, height):
+        self.slots = slots
+        self.frame_bytes = width * height * 3
+        header_bytes = (len(self.CONTROL) + slots * self.SLOT_FIELDS) * 8
+        # Frames start on a cache line
+        self.frames_offset = (header_bytes + 63) // 64 * 64
+        self.shm = multiprocessing.shared_memory.SharedMemory(
+            create=True, size=self.frames_offset + slots * self.frame_bytes)
+        self.free = context.Semaphore(slots)
+        self.filled = context.Semaphore(0)
+        self.owner = True
+        self._attach()
+        self.control[:] = 0
+        self.set_value("width", width)
+        self.set_value("height", height)
+        self.set_value("stride", 1)
+
+    def _attach(self):
+        self.control = np.ndarray((len(self.CONTROL),), np.float64, self.shm.buf)
+        self.header = np.ndarray((self.slots, self.SLOT_FIELDS), np.float64, self.shm.buf,
+                                 len(self.CONTROL) * 8)
+        self.write_seq = 0
+        self.read_seq = 0
+        self.reserved = None
+        self.finished = False
+
+    def __getstate__(self):
+        return {"name": self.shm.name, "slots": self.slots, "frame_bytes": self.frame_bytes,
+                "frames_offset": self.frames_offset, "free": self.free, "filled": self.filled}
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.frame_bytes = state["frame_bytes"]
+        self.frames_offset = state["frames_offset"]
+        self.free = state["free"]
+        self.filled = state["filled"]
+        self.shm = multiprocessing.shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+        self._attach()
+
+    def value(self, name):
+        return self.control[self.CONTROL.index(name)]
+
+    def set_value(self, name, value):
+        self.control[self.CONTROL.index(name)] = value
+
+    def _frame(self, slot, width, height):
+        return np.ndarray((height, width, 3), np.uint8, self.shm.buf, self.frames_offset + slot * self.frame_bytes)
+
+    def reserve(self, width, height):
+        """Writable view of the next free slot for a width x height frame, or None if all are in use"""
+        if width * height * 3 > self.frame_bytes:
+            raise ValueError(f"A {width}x{height} frame does not fit the shared frame slots")
+        if not self.free.acquire(False):
+            return None
+        slot = self.write_seq % self.slots
+        self.reserved = (slot, width, height)
+        return self._frame(slot, width, height)
+
+    def publish(self, index, timestamp):
+        """Hand the reserved slot to the consumer as the frame for tick index"""
+        slot, width, height = self.reserved
+        self.header[slot] = (index, timestamp, width, height)
+        self.reserved = None
+        self.write_seq += 1
+        self.set_value("published", self.write_seq)
+        self.filled.release()
+
+    def close(self):
+        """Producer side: no more frames will be published"""
+        self.set_value("state", self.CLOSED)
+        self.filled.release()
+
+    def get(self, block=True, timeout=None):
+        """(index, frame view, timestamp) of the oldest published frame, or None once closed and drained.
+
+        Raises queue.Empty if nothing arrives in time. The view stays valid until release().
+        """
+        if self.finished:
+            return None
+        if not self.filled.acquire(block, timeout):
+            raise queue.Empty
+        if self.read_seq >= self.value("published"):
+            # The close() token: every frame before it has been read
+            self.finished = True
+            return None
+        slot = self.read_seq % self.slots
+        self.read_seq += 1
+        index, timestamp, width, height = self.header[slot]
+        return int(index), self._frame(slot, int(width), int(height)), float(timestamp)
+
+    def release(self):
+        """Return the oldest frame taken with get() to the producer"""
+        self.free.release()
+
+    def pending(self):
+        """Frames published but not yet read"""
+        return int(self.value("published")) - self.read_seq
+
+    def unlink(self):
+        """Detach from the memory, freeing it if this is the process that created it"""
+        self.control = self.header = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A frame view is still referenced; the mapping goes when it does
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class CaptureProcessPool:
+    """Capture processes that grab, convert and publish frames through a SharedFrameRing each.
+
+    processes is a count, or "auto" for one per core left after the encoder
+    and the recording process. Each process takes an equal share of the ticks
+    and converts its frames straight into a ring of frame_slots slots, so
+    capture is not held back by the GIL; next_frame() merges the rings back
+    into tick order for the encode stage.
+    """
+
+    def __init__(self, processes, frame_slots=4):
+        if processes == "auto":
+            processes = max(1, min(4, (os.cpu_count() or 1) - 2))
+        self.processes = int(processes)
+        self.frame_slots = max(3, frame_slots)
+        self.rings = []
+        self.workers = []
+        # Slots taken by next_frame() that have not been handed back yet
+        self.held = collections.deque()
+        self.heads = []
+        self.last_index = -1
+        self.frames_late = 0
+
+    def start(self, settings, width, height):
+        """Start the processes on RecordingPipeline(**settings) and wait until they can grab"""
+        context = multiprocessing.get_context("spawn")
+        log_file = next((handler.baseFilename for handler in logging.getLogger().handlers
+                         if isinstance(handler, logging.FileHandler)), None)
+        count = self.processes
+        self.heads = [None] * count
+        self.last_index = -1
+        try:
+            for worker in range(count):
+                ring = SharedFrameRing(context, self.frame_slots, width, height)
+                ring.set_value("upcoming", worker)
+                self.rings.append(ring)
+                process = context.Process(target=_run_capture_process, name=f"capture-{worker}",
+                                          args=(settings, ring, worker, count, log_file))
+                process.daemon = True
+                process.start()
+                self.workers.append(process)
+
+            deadline = time.monotonic() + 60
+            while not all(ring.value("state") == SharedFrameRing.READY for ring in self.rings):
+                if any(process.exitcode is not None for process in self.workers):
+                    raise RuntimeError("A capture process exited before it was ready")
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Capture processes were not ready in time")
+                time.sleep(0.05)
+        except Exception:
+            self.stop()
+            self.close()
+            raise
+        logger.info(f"{count} capture processes ready, {self.frame_slots} shared frame slots each")
+
+    def set_start_time(self, start_time):
+        """Let the processes start capturing, with tick 0 at start_time"""
+        for ring in self.rings:
+            ring.set_value("start_time", start_time)
+
+    def set_capture(self, stride, width, height):
+        """Capture every stride-th tick at width x height from the next tick on"""
+        for ring in self.rings:
+            ring.set_value("stride", stride)
+            ring.set_value("width", width)
+            ring.set_value("height", height)
+
+    def stop(self):
+        """Tell the processes to finish and wait for them, terminating any that hang"""
+        for ring in self.rings:
+            ring.set_value("stop", 1)
+        for process in self.workers:
+            process.join(10)
+            if process.exitcode is None:
+                logger.warning(f"{process.name} did not stop, terminating it")
+                process.terminate()
+                process.join()
+
+    def close(self):
+        """Free the shared frame memory"""
+        for ring in self.rings:
+            ring.unlink()
+        self.rings = []
+        self.held.clear()
+
+    def depth(self):
+        """Frames published but not yet taken by next_frame()"""
+        return sum(ring.pending() for ring in self.rings)
+
+    def capacity(self):
+        return len(self.rings) * self.frame_slots
+
+    def collect(self, stage_metrics):
+        """Add up the counters the processes have shared, and their stage timings into stage_metrics.
+
+        Returns None once the rings have been freed.
+        """
+        rings = self.rings
+        if not rings:
+            return None
+        for stage in ("grab", "detect", "convert"):
+            count = int(sum(ring.value(f"{stage}_count") for ring in rings))
+            if count:
+                stage_metrics.set(stage, count, sum(ring.value(f"{stage}_total") for ring in rings),
+                                  max(ring.value(f"{stage}_max") for ring in rings))
+        return {
+            "captured": int(sum(ring.value("captured") for ring in rings)),
+            "dropped": int(sum(ring.value("dropped") for ring in rings)) + self.frames_late,
+            "unchanged": int(sum(ring.value("unchanged") for ring in rings)),
+            "ticks_missed": int(sum(ring.value("ticks_missed") for ring in rings)),
+            "failed": any(ring.value("failed") for ring in rings),
+        }
+
+    def _poll(self, worker, block=True, timeout=None):
+        """Take the next frame from a process's ring, or None if there is none yet or it has finished"""
+        ring = self.rings[worker]
+        # Checked first: once a process has exited, everything it published is already in the ring
+        exited = self.workers[worker].exitcode is not None
+        try:
+            return ring.get(block and not exited, timeout)
+        except queue.Empty:
+            if exited:
+                ring.finished = True
+            return None
+
+    def next_frame(self):
+        """(index, frame, timestamp) of the next frame in tick order, or None once every process has finished.
+
+        The frame stays valid until the next call but one, so it can be repeated for missed ticks.
+        """
+        # Frames before the previous one have been written and will not be repeated
+        while len(self.held) > 1:
+            self.held.popleft().release()
+
+        rings = self.rings
+        heads = self.heads
+        upcoming = [0] * len(rings)
+        while True:
+            for worker, ring in enumerate(rings):
+                if heads[worker] is None and not ring.finished:
+                    # Read before polling, so a frame published in between is never passed over
+                    upcoming[worker] = ring.value("upcoming")
+                    heads[worker] = self._poll(worker, block=False)
+            ready = [worker for worker, head in enumerate(heads) if head is not None]
+            waiting = [worker for worker, head in enumerate(heads) if head is None and not rings[worker].finished]
+            if not ready and not waiting:
+                return None
+
+            if ready:
+                first = min(ready, key=lambda worker: heads[worker][0])
+                # A process with nothing waiting may still deliver an earlier tick
+                if all(upcoming[worker] > heads[first][0] for worker in waiting):
+                    item, heads[first] = heads[first], None
+                    # Slots go back in the order they were taken, so even a skipped frame is held
+                    self.held.append(rings[first])
+                    if item[0] <= self.last_index:
+                        # Overtaken after a capture rate change
+                        self.frames_late += 1
+                        continue
+                    self.last_index = item[0]
+                    return item
+                waiting = [worker for worker in waiting if upcoming[worker] <= heads[first][0]]
+
+            # Wait on the process due to deliver the next tick
+            worker = min(waiting, key=lambda worker: upcoming[worker])
+            heads[worker] = self._poll(worker, timeout=0.1)
+
+
+class SyntheticAudioStream:
+    """Stand-in for a PyAudio callback stream that generates a test tone; needs no audio device.
+
+    A background thread delivers one buffer of samples to the callback each
+    time it would have been recorded, like a real microphone.
+    """
+
+    def __init__(self, channels, rate, frames_per_buffer, stream_callback, frequency=440.0, amplitude=3000):
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.stream_callback = stream_callback
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start_stream(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="synthetic-audio", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        start_time = time.monotonic()
+        position = 0
+        while True:
+            delay = start_time + (position + self.frames_per_buffer) / self.rate - time.monotonic()
+            if self.stop_event.wait(max(0, delay)):
+                break
+            t = np.arange(position, position + self.frames_per_buffer) / self.rate
+            position += self.frames_per_buffer
+            tone = (np.sin(2 * np.pi * self.frequency * t) * self.amplitude).astype('<i2')
+            self.stream_callback(np.repeat(tone[:, None], self.channels, axis=1).tobytes(),
+                                 self.frames_per_buffer, {}, 0)
+
+    def stop_stream(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def close(self):
+        self.stop_stream()
+
+
+def create_capture_backend(name, region, options=None):
+    """Create and open a capture backend, falling back to pyautogui if it cannot be used"""
+    backend_class = CAPTURE_BACKENDS.get(name)
+    if backend_class is None:
+        logger.warning(f"Unknown capture backend '{name}', using pyautogui")
+        backend_class = PyAutoGUICaptureBackend
+
+    backend = backend_class(region, options)
+    try:
+        backend.open()
+    except Exception as e:
+        if backend_class is PyAutoGUICaptureBackend:
+            raise
+        logger.warning(f"Capture backend '{name}' unavailable ({str(e)}), using pyautogui")
+        backend = PyAutoGUICaptureBackend(region, options)
+        backend.open()
+
+    logger.info(f"Using '{backend.name}' capture backend ({backend.width}x{backend.height})")
+    return backend
+
+
+def find_window_region(title):
+    """Return (left, top, width, height) of the first visible window whose title contains title"""
+    try:
+        if hasattr(pyautogui, "getWindowsWithTitle"):
+            for window in pyautogui.getWindowsWithTitle(title):
+                if window.width > 0 and window.height > 0 and not window.isMinimized:
+                    return (window.left, window.top, window.width, window.height)
+            return None
+
+        # Linux: ask xdotool for the window geometry
+        result = subprocess.run(["xdotool", "search", "--onlyvisible", "--name", title],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=2)
+        for window_id in result.stdout.decode().split():
+            result = subprocess.run(["xdotool", "getwindowgeometry", "--shell", window_id],
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=2)
+            geometry = dict(line.split("=", 1) for line in result.stdout.decode().split() if "=" in line)
+            if int(geometry.get("WIDTH", 0)) > 0 and int(geometry.get("HEIGHT", 0)) > 0:
+                return (int(geometry["X"]), int(geometry["Y"]), int(geometry["WIDTH"]), int(geometry["HEIGHT"]))
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError, KeyError) as e:
+        logger.debug(f"Window lookup for '{title}' failed: {str(e)}")
+    except Exception as e:
+        logger.warning(f"Window lookup for '{title}' failed: {str(e)}")
+    return None
+
+
+def clamp_region(region, monitors):
+    """Clip a capture region to the bounding box of all monitors"""
+    left = min(m.x for m in monitors)
+    top = min(m.y for m in monitors)
+    right = max(m.x + m.width for m in monitors)
+    bottom = max(m.y + m.height for m in monitors)
+
+    x, y, width, height = region
+    x0, y0 = max(left, x), max(top, y)
+    x1, y1 = min(right, x + width), min(bottom, y + height)
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class MultiMonitorCaptureBackend(CaptureBackend):
+    """Captures several monitors, each through its own backend, as one stream.
+
+    layout "active" grabs only the monitor showing the Zoom meeting window,
+    which is looked up every window_poll_interval seconds; frames are the size
+    of the largest monitor, so the pipeline scales the others to fit. "tiled"
+    and "tracks" draw every monitor into a canvas laid out as the desktop is,
+    each grabbed at the same moment by a thread of its own, so more monitors
+    do not slow the capture rate; for "tracks" the encoder then cuts the
+    canvas back into one video track per monitor with track_regions().
+    """
+
+    name = "monitors"
+    LAYOUTS = ("active", "tiled", "tracks")
+
+    def __init__(self, monitors, backend="pyautogui", options=None, layout="active",
+                 window_title="Zoom Meeting", window_poll_interval=2.0):
+        self.monitors = [tuple(int(v) for v in monitor) for monitor in monitors]
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown monitor layout '{layout}'")
+        self.layout = layout
+        self.backend = backend
+        self.window_title = window_title
+        self.window_poll_interval = window_poll_interval
+        left = min(x for x, y, width, height in self.monitors)
+        top = min(y for x, y, width, height in self.monitors)
+        right = max(x + width for x, y, width, height in self.monitors)
+        bottom = max(y + height for x, y, width, height in self.monitors)
+        super().__init__((left, top, right - left, bottom - top), options)
+        if layout == "active":
+            self.width, self.height = max(((width, height) for x, y, width, height in self.monitors),
+                                          key=lambda size: size[0] * size[1])
+        self.backends = []
+        self.threads = []
+        self.active = 0
+        self.next_window_check = 0.0
+
+    @property
+    def reuses_buffer(self):
+        if self.layout == "active":
+            return self.backends[self.active].reuses_buffer
+        return True
+
+    def open(self):
+        # Monitor sizes come from the layout, not from a synthetic backend's size options
+        options = {key: value for key, value in self.options.items() if key not in ("width", "height", "monitors")}
+        for monitor in self.monitors:
+            self.backends.append(create_capture_backend(self.backend, monitor, options))
+        if self.layout == "active":
+            return
+
+        self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self.errors = [None] * len(self.monitors)
+        # The grabbing thread and one thread per monitor meet here before and after every grab
+        self.start_barrier = threading.Barrier(len(self.monitors) + 1)
+        self.done_barrier = threading.Barrier(len(self.monitors) + 1)
+        for index in range(len(self.monitors)):
+            thread = threading.Thread(target=self._grab_monitor, args=(index,), name=f"monitor-{index}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _grab_monitor(self, index):
+        x, y, width, height = self.monitors[index]
+        target = self.canvas[y - self.top:y - self.top + height, x - self.left:x - self.left + width]
+        while True:
+            try:
+                self.start_barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+            try:
+                frame = self.backends[index].grab()
+                if frame.shape[1] != width or frame.shape[0] != height:
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                if frame.shape[2] == 4:
+                    cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=target)
+                else:
+                    target[:] = frame
+                self.errors[index] = None
+            except Exception as e:
+                self.errors[index] = e
+            try:
+                self.done_barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+
+    def _update_active_monitor(self):
+        """Switch to the monitor holding most of the meeting window"""
+        self.next_window_check = time.monotonic() + self.window_poll_interval
+        region = find_window_region(self.window_title)
+        if not region:
+            return
+        x, y, width, height = region
+
+        def overlap(monitor):
+            mx, my, mwidth, mheight = monitor
+            return (max(0, min(x + width, mx + mwidth) - max(x, mx))
+                    * max(0, min(y + height, my + mheight) - max(y, my)))
+
+        active = max(range(len(self.monitors)), key=lambda index: overlap(self.monitors[index]))
+        if active != self.active and overlap(self.monitors[active]) > 0:
+            logger.info(f"Meeting window is on monitor {active + 1} {self.monitors[active]}, recording it")
+            self.active = active
+
+    def grab(self):
+        if self.layout == "active":
+            if time.monotonic() >= self.next_window_check:
+                self._update_active_monitor()
+            return self.backends[self.active].grab()
+
+        self.start_barrier.wait()
+        self.done_barrier.wait()
+        for error in self.errors:
+            if error is not None:
+                raise error
+        return self.canvas
+
+    def track_regions(self, width, height):
+        """Each monitor's [x, y, width, height] in a frame the canvas was scaled to, on even pixels"""
+        scale_x, scale_y = width / self.width, height / self.height
+        return [[int((x - self.left) * scale_x) // 2 * 2, int((y - self.top) * scale_y) // 2 * 2,
+                 max(2, int(monitor_width * scale_x) // 2 * 2), max(2, int(monitor_height * scale_y) // 2 * 2)]
+                for x, y, monitor_width, monitor_height in self.monitors]
+
+    def close(self):
+        if self.threads:
+            self.start_barrier.abort()
+            self.done_barrier.abort()
+            for thread in self.threads:
+                thread.join()
+            self.threads = []
+        for backend in self.backends:
+            backend.close()
+        self.backends = []
+
+
+class ScreenSource:
+    """The capture backend for a capture region, kept on the meeting window and replaced if it fails.
+
+    region is None for the first monitor, a fixed [left, top, width, height]
+    rectangle, "window" to follow the window titled window_title, or
+    "monitors" for every monitor through a MultiMonitorCaptureBackend in
+    monitor_layout. A backend that fails mid-recording is replaced by its
+    fallback, if it has one. The backend is not pickled, so a capture process
+    can be given the source and open a backend of its own.
+    """
+
+    def __init__(self, backend="pyautogui", options=None, region=None, window_title="Zoom Meeting",
+                 window_poll_interval=2.0, monitor_layout="active"):
+        self.backend = backend
+        self.options = options
+        self.region = region
+        self.window_title = window_title
+        self.window_poll_interval = window_poll_interval
+        self.monitor_layout = monitor_layout
+        self.monitors = []
+        self.capture = None
+        self.closed = True
+        self.next_window_check = 0.0
+
+    def __getstate__(self):
+        return {**self.__dict__, "capture": None, "closed": True}
+
+    @property
+    def width(self):
+        return self.capture.width
+
+    @property
+    def height(self):
+        return self.capture.height
+
+    @property
+    def reuses_buffer(self):
+        return self.capture.reuses_buffer
+
+    def open(self):
+        """Open the capture backend and check that it can grab"""
+        self.capture = self._open_backend()
+        self.closed = False
+        self.next_window_check = time.monotonic() + self.window_poll_interval
+        self.capture.grab()
+
+    def grab(self):
+        """Capture one frame, switching to the fallback backend if this one fails"""
+        try:
+            return self.capture.grab()
+        except Exception as e:
+            if not self._fall_back(e):
+                raise
+            return self.capture.grab()
+
+    def follow_window(self):
+        """Track the meeting window once every window_poll_interval"""
+        if self.region == "window" and time.monotonic() >= self.next_window_check:
+            self.track_window()
+            self.next_window_check = time.monotonic() + self.window_poll_interval
+
+    def track_window(self):
+        """Follow the meeting window if it has moved or been resized"""
+        if self.region != "window":
+            return
+        region = find_window_region(self.window_title)
+        if region:
+            region = clamp_region(region, self.monitors)
+        current = (self.capture.left, self.capture.top, self.capture.width, self.capture.height)
+        if region and region != current:
+            logger.info(f"Meeting window moved to {region}")
+            self.capture.set_region(region)
+
+    def close(self):
+        """Release the backend; it stays readable for the recording's metrics"""
+        if not self.closed:
+            self.capture.close()
+        self.closed = True
+
+    def _fall_back(self, error):
+        """Replace a backend that failed mid-recording with its fallback; False if it has none"""
+        fallback = getattr(CAPTURE_BACKENDS.get(self.backend), "fallback", None)
+        if fallback is None:
+            return False
+        logger.warning(f"Capture backend '{self.backend}' failed ({str(error)}), switching to '{fallback}'")
+        try:
+            self.capture.close()
+        except Exception:
+            pass
+        self.backend = fallback
+        self.capture = self._open_backend()
+        return True
+
+    def _open_backend(self):
+        """Create and open the capture backend for the capture region"""
+        if self.region != "monitors":
+            return create_capture_backend(self.backend, self._resolve_region(), self.options)
+
+        if self.backend == "synthetic":
+            # Generated monitors; the capture options can lay them out
+            self.monitors = []
+            monitors = (self.options or {}).get("monitors", [[0, 0, 1280, 720]])
+        else:
+            self.monitors = screeninfo.get_monitors()
+            monitors = [(monitor.x, monitor.y, monitor.width, monitor.height) for monitor in self.monitors]
+        capture = MultiMonitorCaptureBackend(monitors, self.backend, self.options, self.monitor_layout,
+                                             self.window_title, self.window_poll_interval)
+        capture.open()
+        logger.info(f"Capturing {len(monitors)} monitors, {self.monitor_layout} layout "
+                    f"({capture.width}x{capture.height})")
+        return capture
+
+    def _resolve_region(self):
+        """Work out the screen rectangle to capture"""
+        if self.backend == "synthetic":
+            # Generated frames need no screen; the capture options can override the size
+            self.monitors = []
+            if self.region and self.region != "window":
+                return tuple(int(v) for v in self.region)
+            return (0, 0, 1280, 720)
+
+        self.monitors = screeninfo.get_monitors()
+        monitor = self.monitors[0]
+        screen_region = (monitor.x, monitor.y, monitor.width, monitor.height)
+
+        if self.region == "window":
+            region = find_window_region(self.window_title)
+            if region:
+                region = clamp_region(region, self.monitors)
+            if region:
+                logger.info(f"Capturing '{self.window_title}' window at {region}")
+                return region
+            logger.warning(f"Window '{self.window_title}' not found, capturing the full screen")
+            return screen_region
+
+        if self.region:
+            region = clamp_region(tuple(int(v) for v in self.region), self.monitors)
+            if region:
+                return region
+            logger.warning(f"Capture region {self.region} is off screen, capturing the full screen")
+        return screen_region
+
+
+class JoinButtonDetector:
+    """Watches the screen for Zoom's "Join with Computer Audio" button and clicks it.
+
+    The screen is grabbed through a capture backend, converted to grayscale
+    and downscaled by search_scale before template matching. The template is
+    loaded once per file and kept as a small pyramid of scales, so buttons
+    rendered at other DPI settings still match and each poll stays cheap.
+    """
+
+    TEMPLATE_SCALES = (0.75, 1.0, 1.25, 1.5, 2.0)
+    _template_cache = {}
+    _template_lock = threading.Lock()
+
+    def __init__(self, template_path="join_audio_button.png", threshold=0.8, search_scale=0.5,
+                 capture_backend="pyautogui"):
+        self.template_path = template_path
+        self.threshold = threshold
+        self.search_scale = search_scale
+        self.capture_backend = capture_backend
+
+    def _templates(self):
+        key = (os.path.abspath(self.template_path), self.search_scale)
+        with self._template_lock:
+            templates = self._template_cache.get(key)
+            if templates is None:
+                template = cv2.imread(self.template_path, cv2.IMREAD_GRAYSCALE)
+                if template is None:
+                    raise FileNotFoundError(f"Cannot read button template {self.template_path}")
+                templates = []
+                for scale in self.TEMPLATE_SCALES:
+                    size = (int(template.shape[1] * scale * self.search_scale),
+                            int(template.shape[0] * scale * self.search_scale))
+                    if size[0] >= 8 and size[1] >= 8:
+                        templates.append(cv2.resize(template, size, interpolation=cv2.INTER_AREA))
+                self._template_cache[key] = templates
+            return templates
+
+    def locate(self, capture):
+        """Return the screen position of the button's centre, or None if it is not visible"""
+        position = self.match(capture.grab())
+        if position is None:
+            return None
+        return capture.left + position[0], capture.top + position[1]
+
+    def match(self, frame):
+        """Return the position of the template's centre within frame, or None if it is not visible"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, None, fx=self.search_scale, fy=self.search_scale, interpolation=cv2.INTER_AREA)
+
+        best = None
+        for template in self._templates():
+            if template.shape[0] > small.shape[0] or template.shape[1] > small.shape[1]:
+                continue
+            _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(small, template, cv2.TM_CCOEFF_NORMED))
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, location, template.shape)
+        if best is None:
+            return None
+
+        _, (x, y), (height, width) = best
+        return int((x + width / 2) / self.search_scale), int((y + height / 2) / self.search_scale)
+
+    def wait_and_click(self, region, timeout=60, poll_interval=0.25, stop_event=None):
+        """Click the button as soon as it appears, until it is gone or timeout expires.
+
+        Returns the monotonic time of the click that made the button disappear,
+        or None if it was never clicked.
+        """
+        deadline = time.monotonic() + timeout
+        clicked_at = None
+        capture = create_capture_backend(self.capture_backend, region)
+        try:
+            while time.monotonic() < deadline:
+                position = self.locate(capture)
+                if position is None and clicked_at is not None:
+                    return clicked_at
+                if position is not None:
+                    pyautogui.click(*position)
+                    clicked_at = time.monotonic()
+                    logger.info(f"Clicked 'Join with Computer Audio' at {position}")
+                # After a click give Zoom a moment to react before clicking again
+                wait = poll_interval if clicked_at is None else max(poll_interval, 1.0)
+                if stop_event is not None:
+                    if stop_event.wait(wait):
+                        break
+                else:
+                    time.sleep(wait)
+        finally:
+            capture.close()
+        return clicked_at
+
+
+class StreamingWavWriter:
+    """WAV file writer that appends audio as it arrives.
+
+    The RIFF and data chunk sizes are patched every few seconds, so memory use
+    stays constant and a crash still leaves a playable file that is at most one
+    header interval short.
+    """
+
+    def __init__(self, path, channels, sample_width, rate, header_interval=5.0):
+        self.path = path
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.header_interval = header_interval
+        self.data_size = 0
+
+        self.file = open(path, 'wb')
+        self._write_header()
+        self.last_header_time = time.monotonic()
+
+    def _write_header(self):
+        """Write the 44-byte PCM header for the data written so far"""
+        data_size = min(self.data_size, 0xFFFFFFFF - 36)
+        block_align = self.channels * self.sample_width
+        header = struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, self.channels, self.rate,
+            self.rate * block_align, block_align, self.sample_width * 8,
+            b'data', data_size
+        )
+        self.file.seek(0)
+        self.file.write(header)
+        self.file.seek(0, os.SEEK_END)
+
+    def write(self, data):
+        """Append raw PCM frames, refreshing the header periodically"""
+        self.file.write(data)
+        self.data_size += len(data)
+
+        if time.monotonic() - self.last_header_time >= self.header_interval:
+            self._write_header()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.last_header_time = time.monotonic()
+
+    def close(self):
+        """Write the final header and close the file"""
+        if self.file.closed:
+            return
+        self._write_header()
+        self.file.close()
+
+
+def _ebml_element(element_id, payload):
+    """Encode an EBML element with an 8-byte size field"""
+    return element_id + (0x01 << 56 | len(payload)).to_bytes(8, 'big') + payload
+
+
+def _ebml_uint(element_id, value):
+    """Encode an unsigned integer EBML element"""
+    return _ebml_element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), 'big'))
+
+
+class MatroskaVideoStream:
+    """Minimal streaming Matroska writer for timestamped raw BGR frames.
+
+    Lets frames be piped to ffmpeg with their own timestamps, so static
+    periods can be skipped entirely and the output has a variable frame rate.
+    Segment and clusters use unknown sizes, as in live streams, and a new
+    cluster is started before the 16-bit block timestamp offset overflows.
+    """
+
+    UNKNOWN_SIZE = b'\x01\xff\xff\xff\xff\xff\xff\xff'
+    CLUSTER_SPAN_MS = 30000
+
+    def __init__(self, stream, width, height):
+        self.stream = stream
+        self.cluster_timestamp = None
+
+        ebml_header = _ebml_element(b'\x1a\x45\xdf\xa3',
+            _ebml_uint(b'\x42\x86', 1) + _ebml_uint(b'\x42\xf7', 1) +
+            _ebml_uint(b'\x42\xf2', 4) + _ebml_uint(b'\x42\xf3', 8) +
+            _ebml_element(b'\x42\x82', b'matroska') +
+            _ebml_uint(b'\x42\x87', 4) + _ebml_uint(b'\x42\x85', 2))
+        info = _ebml_element(b'\x15\x49\xa9\x66',
+            _ebml_uint(b'\x2a\xd7\xb1', 1000000) +
+            _ebml_element(b'\x4d\x80', b'zoom_recorder') +
+            _ebml_element(b'\x57\x41', b'zoom_recorder'))
+        video = _ebml_element(b'\xe0',
+            _ebml_uint(b'\xb0', width) + _ebml_uint(b'\xba', height) +
+            _ebml_element(b'\x2e\xb5\x24', b'BGR\x18'))
+        track = _ebml_element(b'\xae',
+            _ebml_uint(b'\xd7', 1) + _ebml_uint(b'\x73\xc5', 1) + _ebml_uint(b'\x83', 1) +
+            _ebml_element(b'\x86', b'V_UNCOMPRESSED') + video)
+        tracks = _ebml_element(b'\x16\x54\xae\x6b', track)
+
+        self.stream.write(ebml_header + b'\x18\x53\x80\x67' + self.UNKNOWN_SIZE + info + tracks)
+
+    def write_frame(self, frame, timestamp):
+        """Write one contiguous BGR frame presented at timestamp seconds"""
+        timestamp_ms = int(round(timestamp * 1000))
+        if (self.cluster_timestamp is None
+                or timestamp_ms - self.cluster_timestamp > self.CLUSTER_SPAN_MS
+                or timestamp_ms < self.cluster_timestamp):
+            self.cluster_timestamp = timestamp_ms
+            self.stream.write(b'\x1f\x43\xb6\x75' + self.UNKNOWN_SIZE +
+                              _ebml_uint(b'\xe7', timestamp_ms))
+
+        # SimpleBlock: track 1, relative timestamp, keyframe flag, then the pixels
+        block_header = b'\x81' + struct.pack('>hB', timestamp_ms - self.cluster_timestamp, 0x80)
+        size = len(block_header) + frame.nbytes
+        self.stream.write(b'\xa3' + (0x01 << 56 | size).to_bytes(8, 'big') + block_header)
+        self.stream.write(frame.data)
+
+
+DEFAULT_ENCODE_PROFILE = {
+    "preset": "veryfast",
+    "crf": 23,
+    "audio_bitrate": "128k",
+    "faststart": True,
+}
+
+
+def build_encode_args(profile=None, container="mp4"):
+    """FFmpeg output arguments for an encode profile (preset, CRF, audio bitrate, fast-start)"""
+    profile = {**DEFAULT_ENCODE_PROFILE, **(profile or {})}
+    args = [
+        "-c:v", "libx264", "-preset", str(profile["preset"]), "-crf", str(profile["crf"]),
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", str(profile["audio_bitrate"]),
+    ]
+    if profile["faststart"] and container == "mp4":
+        args += ["-movflags", "+faststart"]
+    return args
+
+
+def build_track_args(tracks, audio_input=1):
+    """FFmpeg arguments cutting a tiled monitor canvas into one video track per [x, y, width, height]"""
+    graph = [f"[0:v]split={len(tracks)}" + "".join(f"[s{index}]" for index in range(len(tracks)))]
+    maps = []
+    for index, (x, y, width, height) in enumerate(tracks):
+        graph.append(f"[s{index}]crop={width}:{height}:{x}:{y}[v{index}]")
+        maps += ["-map", f"[v{index}]"]
+    return ["-filter_complex", ";".join(graph), *maps, "-map", f"{audio_input}:a"]
+
+
+class FFmpegDirectEncoder:
+    """Single long-running ffmpeg process that encodes raw frames and PCM audio to MP4.
+
+    Timestamped raw BGR frames are streamed to ffmpeg's stdin as Matroska and
+    PCM audio to a second pipe passed as an extra file descriptor, so the MP4 is
+    finished as soon as both pipes are closed instead of after a second
+    transcode pass. Frames only need to be written when the picture changes.
+    With video False only the audio pipe is opened, and with tracks (a list of
+    [x, y, width, height]) the frames are cut into one video track per region.
+    Requires a POSIX system for the inherited audio pipe.
+
+    ffmpeg only reads audio as far ahead of the encoded video as its scheduler
+    allows, so while the video pipe is idle the audio pipe backs up. The
+    video input is therefore not probed (which would read seconds of frames
+    before any audio), and with low_delay, for sparse frames from a static
+    screen, x264 encodes without lookahead so each frame is output at once.
+    """
+
+    def __init__(self, output_file, width, height, channels, rate, encode_profile=None,
+                 segment_seconds=None, segment_start=0, video=True, tracks=None, low_delay=False):
+        self.output_file = output_file
+        self.video = video
+        self.low_delay = low_delay
+        self.tracks = tracks
+        self.segment_seconds = segment_seconds
+        self.segment_start = segment_start
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rate = rate
+        self.encode_profile = encode_profile
+        self.process = None
+        self.audio_pipe = None
+
+    def start(self):
+        """Launch ffmpeg with the video and audio input pipes"""
+        audio_read, audio_write = os.pipe()
+        cmd = ["ffmpeg", "-y", "-loglevel", "error"]
+        if self.video:
+            # The Matroska header describes the stream fully
+            cmd += ["-thread_queue_size", "32", "-analyzeduration", "0", "-probesize", "32",
+                    "-f", "matroska", "-i", "pipe:0"]
+        cmd += [
+            "-thread_queue_size", "256",
+            "-f", "s16le", "-ar", str(self.rate), "-ac", str(self.channels),
+            "-i", f"pipe:{audio_read}",
+        ]
+        if self.video and self.tracks:
+            cmd += [*build_track_args(self.tracks), "-vsync", "vfr"]
+        elif self.video:
+            cmd += ["-vf", "crop=trunc(iw/2)*2:trunc(ih/2)*2", "-vsync", "vfr"]
+        if self.video and self.low_delay:
+            cmd += ["-tune", "zerolatency"]
+        if self.segment_seconds:
+            # Rolling MPEG-TS segments cut on forced keyframes, joined later by stream copy
+            cmd += [
+                *build_encode_args(self.encode_profile, container="mpegts"),
+                "-force_key_frames", f"expr:gte(t,n_forced*{self.segment_seconds})",
+                "-f", "segment", "-segment_time", str(self.segment_seconds),
+                "-segment_format", "mpegts", "-reset_timestamps", "1",
+                "-segment_start_number", str(self.segment_start),
+                self.output_file
+            ]
+        else:
+            cmd += [*build_encode_args(self.encode_profile), self.output_file]
+        logger.info(f"Starting direct FFmpeg encoder: {' '.join(cmd)}")
+
+        self.stderr_file = tempfile.TemporaryFile()
+        try:
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE if self.video else subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL, stderr=self.stderr_file,
+                                            pass_fds=(audio_read,))
+        except Exception:
+            os.close(audio_write)
+            self.stderr_file.close()
+            raise
+        finally:
+            os.close(audio_read)
+        self.audio_pipe = os.fdopen(audio_write, 'wb')
+        if self.video:
+            self.video_stream = MatroskaVideoStream(self.process.stdin, self.width, self.height)
+
+    def write_video(self, frame, timestamp):
+        """Write one BGR frame shown from timestamp seconds until the next frame"""
+        self.video_stream.write_frame(frame, timestamp)
+
+    def write_audio(self, data):
+        """Write raw PCM audio to the encoder"""
+        self.audio_pipe.write(data)
+
+    def close_video(self):
+        """Signal the end of the video stream"""
+        if self.process.stdin is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+    def close_audio(self):
+        """Signal the end of the audio stream"""
+        try:
+            self.audio_pipe.close()
+        except OSError:
+            pass
+
+    def abort(self):
+        """Kill ffmpeg without finishing the output"""
+        self.process.kill()
+        self.close_video()
+        self.close_audio()
+        self.process.wait()
+        self.stderr_file.close()
+
+    def close(self):
+        """Close both pipes and wait for ffmpeg to finish the file"""
+        self.close_video()
+        self.close_audio()
+
+        returncode = self.process.wait()
+        if returncode != 0:
+            self.stderr_file.seek(0)
+            logger.error(f"FFmpeg encoder exited with code {returncode}: "
+                         f"{self.stderr_file.read().decode(errors='replace')}")
+        self.stderr_file.close()
+        return returncode == 0
+
+
+class RecordingOutput:
+    """Base class for where a RecordingPipeline writes its frames and audio.
+
+    open() is given the frame size (None for audio only) and the audio format
+    once the capture is ready. The encode and audio stages call write_video()
+    and write_audio(), then close_video() and close_audio() as each ends, and
+    finish() follows once both have. segment_files, join_files and
+    join_reencode then describe what is left for the recorder to join.
+    An output with a fallback is replaced by that one if it cannot be opened.
+    """
+
+    direct = False
+    # Frames carry their own timestamps, so missed ticks need not be filled in
+    variable_frame_rate = False
+
+    def __init__(self, output_file, segment_seconds=None):
+        self.output_file = output_file
+        self.segment_seconds = segment_seconds
+        self.fallback = None
+        self.segment_files = []
+        self.join_files = []
+        self.join_reencode = None
+        self.encode_succeeded = False
+        # Intermediate files opened so far, so sizing and cleanup need not list the directory
+        self.temp_files = []
+
+    def open(self, width, height, channels, rate, sample_width=2, tracks=None):
+        """Open the output files or encoder"""
+        raise NotImplementedError
+
+    def write_video(self, frame, timestamp):
+        """Write one BGR frame shown from timestamp seconds"""
+        raise NotImplementedError
+
+    def write_audio(self, data):
+        """Write raw PCM audio"""
+        raise NotImplementedError
+
+    def close_video(self):
+        """Signal the end of the video stream"""
+        pass
+
+    def close_audio(self):
+        """Signal the end of the audio stream"""
+        pass
+
+    def finish(self):
+        """Finish the output once both streams have ended"""
+        pass
+
+    def abort(self):
+        """Release the output without finishing it"""
+        pass
+
+    def output_paths(self):
+        """Media files written so far"""
+        return list(dict.fromkeys(self.temp_files + self.segment_files))
+
+
+class TwoPassOutput(RecordingOutput):
+    """Temporary AVI and WAV files, encoded to the final MP4 in a second pass.
+
+    With segment_seconds both are rotated on the same tick and sample
+    boundaries into `{output_file}_segNNN` files, and
+    on_segment_done(temp_video, temp_audio, output_path) is called as soon as
+    both halves of a segment are closed, so it can be encoded while the
+    meeting continues.
+    """
+
+    def __init__(self, output_file, fps, segment_seconds=None, on_segment_done=None):
+        super().__init__(output_file, segment_seconds)
+        self.fps = fps
+        self.on_segment_done = on_segment_done
+        self.temp_video_file = f"{output_file}_temp.avi"
+        self.temp_audio_file = f"{output_file}_temp.wav"
+        self.video = True
+        self.video_writer = None
+        self.audio_writer = None
+        self.frames_written = 0
+        self.audio_bytes = 0
+
+        # Which halves of each segment have been closed
+        self.segments_lock = threading.Lock()
+        self.segment_parts = {}
+        self.video_segment = None
+        self.audio_segment = None
+
+    def open(self, width, height, channels, rate, sample_width=2, tracks=None):
+        self.video = width is not None
+        self.size = (width, height)
+        self.channels = channels
+        self.rate = rate
+        self.sample_width = sample_width
+        if not self.video:
+            self.temp_video_file = None
+
+        if self.segment_seconds:
+            self.ticks_per_segment = max(1, int(round(self.segment_seconds * self.fps)))
+            self.bytes_per_segment = int(self.segment_seconds * rate) * channels * sample_width
+            if self.video:
+                self._open_video_segment(0)
+            self._open_audio_segment(0)
+        else:
+            self.audio_writer = StreamingWavWriter(self.temp_audio_file, channels, sample_width, rate)
+            self.temp_files.append(self.temp_audio_file)
+            if self.video:
+                self.video_writer = self._open_video_writer(self.temp_video_file)
+
+        if self.video_writer is not None and not self.video_writer.isOpened():
+            raise RuntimeError(f"Cannot open video output for {self.output_file}")
+
+    def write_video(self, frame, timestamp):
+        if self.segment_seconds:
+            segment = self.frames_written // self.ticks_per_segment
+            if segment != self.video_segment:
+                self._close_video_segment()
+                self._open_video_segment(segment)
+        self.video_writer.write(frame)
+        self.frames_written += 1
+
+    def write_audio(self, data):
+        """Write an audio chunk, splitting it where a segment boundary falls inside it"""
+        if not self.segment_seconds:
+            self.audio_writer.write(data)
+            return
+        while data:
+            room = self.bytes_per_segment - self.audio_bytes % self.bytes_per_segment
+            self.audio_writer.write(data[:room])
+            self.audio_bytes += len(data[:room])
+            data = data[room:]
+            if self.audio_bytes % self.bytes_per_segment == 0:
+                self._close_audio_segment()
+                self._open_audio_segment(self.audio_bytes // self.bytes_per_segment)
+
+    def close_video(self):
+        if self.segment_seconds:
+            self._close_video_segment()
+        elif self.video_writer is not None:
+            self.video_writer.release()
+
+    def close_audio(self):
+        if self.segment_seconds:
+            self._close_audio_segment()
+        elif self.audio_writer is not None:
+            self.audio_writer.close()
+
+    def finish(self):
+        self.close_video()
+        self.close_audio()
+        if self.segment_seconds:
+            self._finish_segments()
+
+    def abort(self):
+        if self.video_writer is not None:
+            self.video_writer.release()
+        if self.audio_writer is not None:
+            self.audio_writer.close()
+
+    def _open_video_writer(self, path):
+        fourcc = cv2.VideoWriter_fourcc(*"XVID")
+        writer = cv2.VideoWriter(path, fourcc, self.fps, self.size)
+        self.temp_files.append(path)
+        return writer
+
+    def _segment_name(self, segment):
+        return f"{self.output_file}_seg{segment:03d}"
+
+    def _open_video_segment(self, segment):
+        self.video_writer = self._open_video_writer(f"{self._segment_name(segment)}_temp.avi")
+        self.video_segment = segment
+
+    def _close_video_segment(self):
+        if self.video_segment is not None:
+            self.video_writer.release()
+            self._segment_part_closed(self.video_segment, "video")
+            self.video_segment = None
+
+    def _open_audio_segment(self, segment):
+        self.audio_writer = StreamingWavWriter(f"{self._segment_name(segment)}_temp.wav", self.channels,
+                                               self.sample_width, self.rate)
+        self.temp_files.append(f"{self._segment_name(segment)}_temp.wav")
+        self.audio_segment = segment
+
+    def _close_audio_segment(self):
+        if self.audio_segment is not None:
+            self.audio_writer.close()
+            self._segment_part_closed(self.audio_segment, "audio")
+            self.audio_segment = None
+
+    def _segment_part_closed(self, segment, part):
+        """Record a closed segment half and hand the segment on once both are closed"""
+        with self.segments_lock:
+            parts = self.segment_parts.setdefault(segment, set())
+            parts.add(part)
+            complete = len(parts) == (2 if self.video else 1)
+        if complete:
+            self._segment_done(segment)
+
+    def _segment_done(self, segment):
+        name = self._segment_name(segment)
+        self.segment_files.append(f"{name}.ts")
+        if self.on_segment_done:
+            try:
+                temp_video = f"{name}_temp.avi" if self.video else None
+                self.on_segment_done(temp_video, f"{name}_temp.wav", f"{name}.ts")
+            except Exception as e:
+                logger.error(f"Error handing off segment {name}: {str(e)}")
+
+    def _finish_segments(self):
+        """Resolve segments where only one stream reached the boundary before stopping"""
+        for segment, parts in sorted(self.segment_parts.items()):
+            if len(parts) == 2 or not self.video:
+                continue
+            name = self._segment_name(segment)
+            if "video" in parts:
+                # Audio ended early; give the video an empty track so it can still be muxed
+                StreamingWavWriter(f"{name}_temp.wav", self.channels, self.sample_width, self.rate).close()
+                self.temp_files.append(f"{name}_temp.wav")
+                self._segment_done(segment)
+            else:
+                # Audio ran a fraction of a tick past the last video frame
+                try:
+                    os.remove(f"{name}_temp.wav")
+                except OSError:
+                    pass
+        self.segment_files.sort()
+
+
+class DirectEncodeOutput(RecordingOutput):
+    """The final MP4, or MPEG-TS segments with segment_seconds, from FFmpegDirectEncoder in a single pass.
+
+    restart() starts a second encoder with another preset or size that the
+    video and audio streams both switch to at the same instant, so the
+    recording continues in a new part (`{output_file}_partNNN.mp4`, or the
+    next segment numbers). join_files then lists the parts to concatenate,
+    and join_reencode is set when their settings differ.
+    """
+
+    direct = True
+    variable_frame_rate = True
+    # Longer gaps between frames leave the audio pipe unread for long enough to lose audio
+    MAX_FRAME_GAP = 1.0
+
+    def __init__(self, output_file, encode_profile=None, segment_seconds=None, low_delay=False, fallback=None):
+        super().__init__(output_file, segment_seconds)
+        self.encode_profile = encode_profile
+        self.low_delay = low_delay
+        self.fallback = fallback
+        # Encoder parts; a restart moves each stream to a new encoder in turn
+        self.encoders = []
+        self.parts = []
+        self.switch = None
+        self.switch_lock = threading.Lock()
+        self.video_encoder = None
+        self.audio_encoder = None
+        self.video_offset = 0.0
+        self.audio_bytes = 0
+        self.finish_threads = []
+        self.part_results = []
+
+    @property
+    def base_preset(self):
+        return {**DEFAULT_ENCODE_PROFILE, **(self.encode_profile or {})}["preset"]
+
+    def open(self, width, height, channels, rate, sample_width=2, tracks=None):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rate = rate
+        self.block_align = channels * sample_width
+        output_path = f"{self.output_file}_seg%03d.ts" if self.segment_seconds else f"{self.output_file}.mp4"
+        encoder = FFmpegDirectEncoder(output_path, width, height, channels, rate, self.encode_profile,
+                                      self.segment_seconds, video=width is not None, tracks=tracks,
+                                      low_delay=self.low_delay)
+        encoder.start()
+        self.encoders = [encoder]
+        self.parts = [{"path": output_path, "size": (width, height), "preset": self.base_preset,
+                       "start": 0.0, "first_segment": 0, "segments": [], "next_segment": 0}]
+        self.video_encoder = self.audio_encoder = encoder
+        if encoder.process.poll() is not None:
+            raise RuntimeError(f"FFmpeg encoder exited with code {encoder.process.returncode}")
+
+    def write_video(self, frame, timestamp):
+        switch = self.switch
+        if switch and timestamp >= switch["time"] and self.video_encoder is not switch["encoder"]:
+            self._switch("video", switch)
+        encoder = self.video_encoder
+        if frame.shape[1] != encoder.width or frame.shape[0] != encoder.height:
+            # Captured at the size in use before a restart
+            frame = cv2.resize(frame, (encoder.width, encoder.height), interpolation=cv2.INTER_AREA)
+        encoder.write_video(frame, timestamp - self.video_offset)
+
+    def write_audio(self, data):
+        """Write an audio chunk, moving to a restarted encoder at its switch time"""
+        switch = self.switch
+        if switch and self.audio_encoder is not switch["encoder"]:
+            boundary = max(0, int(round(switch["time"] * self.rate)) * self.block_align - self.audio_bytes)
+            if boundary < len(data):
+                self.audio_encoder.write_audio(data[:boundary])
+                self.audio_bytes += boundary
+                data = data[boundary:]
+                self._switch("audio", switch)
+        self.audio_encoder.write_audio(data)
+        self.audio_bytes += len(data)
+
+    def close_video(self):
+        if self.video_encoder:
+            self.video_encoder.close_video()
+
+    def close_audio(self):
+        if self.audio_encoder:
+            self.audio_encoder.close_audio()
+
+    def restart(self, preset, scale, at):
+        """Start an encoder with a new preset and size for both streams to switch to at `at` seconds.
+
+        Returns the new frame size, or None if the encoder could not be started.
+        """
+        if self.switch is not None:
+            logger.warning("Previous encoder switch still pending, keeping the current settings")
+            return None
+        width = max(2, int(self.width * scale) // 2 * 2)
+        height = max(2, int(self.height * scale) // 2 * 2)
+        profile = {**(self.encode_profile or {}), "preset": preset}
+        if self.segment_seconds:
+            # Number on from every segment the old encoder can cut up to the switch, whether or not
+            # ffmpeg has opened it yet, leaving a gap in case it still opens one more
+            part = self.parts[-1]
+            segment_start = part["first_segment"] + int((at - part["start"]) // self.segment_seconds) + 2
+            output_path = f"{self.output_file}_seg%03d.ts"
+        else:
+            segment_start = 0
+            output_path = f"{self.output_file}_part{len(self.parts):03d}.mp4"
+        encoder = FFmpegDirectEncoder(output_path, width, height, self.channels, self.rate, profile,
+                                      self.segment_seconds, segment_start, low_delay=self.low_delay)
+        try:
+            encoder.start()
+        except Exception as e:
+            logger.error(f"Could not start an encoder with preset {preset} at {width}x{height}: {str(e)}")
+            return None
+
+        self.encoders.append(encoder)
+        self.parts.append({"path": output_path, "size": (width, height), "preset": preset,
+                           "start": at, "first_segment": segment_start, "segments": [], "next_segment": segment_start})
+        self.switch = {"time": at, "encoder": encoder}
+        return width, height
+
+    def finish(self):
+        for thread in self.finish_threads:
+            thread.join()
+        # The current encoder, and any whose switch was still pending
+        self.part_results += [encoder.close() for encoder in self.encoders if encoder.process.returncode is None]
+        self.encode_succeeded = all(self.part_results)
+        if self.segment_seconds:
+            self.segment_files = sorted(self._segments())
+        elif len(self.parts) > 1:
+            first_part = f"{self.output_file}_part000.mp4"
+            try:
+                os.replace(f"{self.output_file}.mp4", first_part)
+            except OSError as e:
+                logger.error(f"Could not rename the first part of {self.output_file}: {str(e)}")
+            self.join_files = [first_part] + [part["path"] for part in self.parts[1:]]
+        if len({(part["size"], part["preset"]) for part in self.parts}) > 1:
+            self.join_reencode = {"size": list(self.parts[0]["size"]), "encode_profile": self.encode_profile}
+
+    def abort(self):
+        for encoder in self.encoders:
+            encoder.abort()
+
+    def output_paths(self):
+        paths = super().output_paths()
+        if self.segment_seconds:
+            paths += self._segments()
+        else:
+            paths += [part["path"] for part in self.parts] + self.join_files
+        return list(dict.fromkeys(paths))
+
+    def _segments(self):
+        """Segment files each encoder has opened, checking only for the next one it may have started"""
+        segments = []
+        parts = list(self.parts)
+        for number, part in enumerate(parts):
+            # Numbers from the next part's first segment on are that encoder's
+            end = parts[number + 1]["first_segment"] if number + 1 < len(parts) else float("inf")
+            while part["next_segment"] < end and os.path.exists(part["path"] % part["next_segment"]):
+                part["segments"].append(part["path"] % part["next_segment"])
+                part["next_segment"] += 1
+            segments += part["segments"]
+        return segments
+
+    def _switch(self, stream, switch):
+        """Move one stream to the restarted encoder, finishing the old one once both streams have moved"""
+        encoder = switch["encoder"]
+        with self.switch_lock:
+            if stream == "video":
+                old = self.video_encoder
+                old.close_video()
+                self.video_encoder = encoder
+                self.video_offset = switch["time"]
+            else:
+                old = self.audio_encoder
+                old.close_audio()
+                self.audio_encoder = encoder
+            if self.video_encoder is not encoder or self.audio_encoder is not encoder:
+                return
+            self.switch = None
+        # ffmpeg may take a while to finish the old part; the streams carry on meanwhile
+        thread = threading.Thread(target=lambda: self.part_results.append(old.close()), name="encoder-finish")
+        thread.daemon = True
+        thread.start()
+        self.finish_threads.append(thread)
+
+
+class FrameChangeDetector:
+    """Detects picture changes on a downsampled copy of each frame.
+
+    Frames are area-averaged down by `scale` and compared with the last frame
+    that counted as changed; any cell that moves by more than pixel_threshold
+    is a change. Comparing against the last changed frame rather than the
+    previous one stops slow fades from slipping through a frame at a time.
+    """
+
+    def __init__(self, scale=8, pixel_threshold=8):
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.reference = None
+
+    def has_changed(self, frame):
+        """Return True if frame differs visibly from the last changed frame"""
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (max(1, width // self.scale), max(1, height // self.scale)),
+                           interpolation=cv2.INTER_AREA)
+
+        if self.reference is None or small.shape != self.reference.shape:
+            self.reference = small
+            return True
+
+        if cv2.absdiff(small, self.reference).max() > self.pixel_threshold:
+            self.reference = small
+            return True
+        return False
+
+
+class MeetingEndDetector:
+    """Decides from cheap measures of the captured streams when a meeting has ended.
+
+    Audio loudness is the RMS over a sliding window of audio_window seconds,
+    and picture activity the mean absolute difference between frames sampled
+    every frame_interval seconds and downscaled by `scale`. The meeting counts
+    as ended once the audio has stayed below silence_rms and the picture below
+    motion_threshold for grace_seconds, or once the optional end dialog
+    template has been seen for dialog_grace_seconds. Times are seconds since
+    the recording started; nothing ends a recording within min_seconds.
+    """
+
+    def __init__(self, rate, channels, silence_rms=100, motion_threshold=1.0, grace_seconds=120,
+                 min_seconds=300, audio_window=1.0, frame_interval=1.0, scale=16, dialog_template=None,
+                 dialog_threshold=0.8, dialog_interval=5.0, dialog_grace_seconds=10, tail_seconds=2.0):
+        self.rate = rate
+        self.channels = channels
+        self.silence_rms = silence_rms
+        self.motion_threshold = motion_threshold
+        self.grace_seconds = grace_seconds
+        self.min_seconds = min_seconds
+        self.audio_window = audio_window
+        self.frame_interval = frame_interval
+        self.scale = scale
+        self.dialog_interval = dialog_interval
+        self.dialog_grace_seconds = dialog_grace_seconds
+        self.tail_seconds = tail_seconds
+        self.dialog = (JoinButtonDetector(dialog_template, threshold=dialog_threshold)
+                       if dialog_template else None)
+
+        self.audio_blocks = collections.deque()
+        self.audio_energy = 0.0
+        self.audio_samples = 0
+        self.rms = 0.0
+        self.last_sound = 0.0
+
+        self.reference = None
+        self.motion = 0.0
+        self.last_motion = 0.0
+        self.next_frame_check = 0.0
+        self.next_dialog_check = 0.0
+        self.dialog_seen = None
+
+    def add_audio(self, data, end_time):
+        """Account for a chunk of 16-bit PCM audio ending at end_time"""
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32)
+        energy = float(np.dot(samples, samples))
+        self.audio_blocks.append((end_time, energy, len(samples)))
+        self.audio_energy += energy
+        self.audio_samples += len(samples)
+        while self.audio_blocks and self.audio_blocks[0][0] < end_time - self.audio_window:
+            _, energy, count = self.audio_blocks.popleft()
+            self.audio_energy -= energy
+            self.audio_samples -= count
+
+        self.rms = (max(0.0, self.audio_energy) / self.audio_samples) ** 0.5 if self.audio_samples else 0.0
+        if self.rms >= self.silence_rms:
+            self.last_sound = end_time
+
+    def add_frame(self, frame, timestamp):
+        """Sample a captured BGR frame, at most once per frame_interval"""
+        if timestamp < self.next_frame_check:
+            return
+        self.next_frame_check = timestamp + self.frame_interval
+
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (max(1, width // self.scale), max(1, height // self.scale)),
+                           interpolation=cv2.INTER_AREA)
+        if self.reference is not None and small.shape == self.reference.shape:
+            self.motion = float(cv2.absdiff(small, self.reference).mean())
+            if self.motion >= self.motion_threshold:
+                self.last_motion = timestamp
+        else:
+            self.last_motion = timestamp
+        self.reference = small
+
+        if self.dialog is not None and timestamp >= self.next_dialog_check:
+            self.next_dialog_check = timestamp + self.dialog_interval
+            if self.dialog.match(frame) is None:
+                self.dialog_seen = None
+            elif self.dialog_seen is None:
+                self.dialog_seen = timestamp
+
+    def check(self, elapsed):
+        """Return (end time, reason) once the meeting has ended, otherwise None"""
+        if elapsed < self.min_seconds:
+            return None
+        if self.dialog_seen is not None and elapsed - self.dialog_seen >= self.dialog_grace_seconds:
+            return self.dialog_seen, "end dialog shown"
+        quiet_since = max(self.last_sound, self.last_motion)
+        if elapsed - quiet_since >= self.grace_seconds:
+            return (min(elapsed, quiet_since + self.tail_seconds),
+                    f"silent and static for {elapsed - quiet_since:.0f} s")
+        return None
+
+
+class RecordingIndexer:
+    """Thumbnail strip and slide-change keyframe index built from the frames being recorded.
+
+    At most once per check_interval seconds a frame is shrunk to thumb_width
+    pixels wide. One thumbnail every strip_interval seconds goes into the
+    strip. When the mean absolute difference of its grayscale from the last
+    keyframe exceeds change_threshold, and min_keyframe_gap seconds have
+    passed, the frame is added to the keyframe index. A keyframe is timed at
+    the first frame after the previous check, so seeking to it never lands
+    after the slide appeared. Thumbnails are kept as JPEG bytes; times are
+    seconds since the recording started.
+    """
+
+    def __init__(self, thumb_width=160, strip_interval=60.0, check_interval=1.0, change_threshold=12.0,
+                 min_keyframe_gap=5.0, max_keyframes=2000, jpeg_quality=70):
+        self.thumb_width = thumb_width
+        self.strip_interval = strip_interval
+        self.check_interval = check_interval
+        self.change_threshold = change_threshold
+        self.min_keyframe_gap = min_keyframe_gap
+        self.max_keyframes = max_keyframes
+        self.jpeg_quality = jpeg_quality
+        self.strip = []
+        self.keyframes = []
+        self.reference = None
+        self.last_keyframe = None
+        self.next_check = 0.0
+        self.next_strip = 0.0
+        self.first_unchecked = None
+
+    def _encode(self, thumb):
+        ok, data = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return data.tobytes()
+
+    def add_frame(self, frame, timestamp):
+        """Sample a recorded BGR frame, at most once per check_interval"""
+        if self.first_unchecked is None:
+            self.first_unchecked = timestamp
+        if timestamp < self.next_check:
+            return
+        self.next_check = timestamp + self.check_interval
+        changed_since, self.first_unchecked = self.first_unchecked, None
+
+        height, width = frame.shape[:2]
+        thumb_height = max(2, round(height * self.thumb_width / width))
+        thumb = cv2.resize(frame, (self.thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        if timestamp >= self.next_strip:
+            self.next_strip = timestamp + self.strip_interval
+            self.strip.append((round(timestamp, 3), self._encode(thumb)))
+
+        gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        if self.reference is None or gray.shape != self.reference.shape:
+            changed = True
+        else:
+            changed = (float(cv2.absdiff(gray, self.reference).mean()) > self.change_threshold
+                       and timestamp - self.last_keyframe >= self.min_keyframe_gap)
+        if changed and len(self.keyframes) < self.max_keyframes:
+            self.reference = gray
+            self.last_keyframe = timestamp
+            self.keyframes.append((round(changed_since, 3), self._encode(thumb)))
+
+
+class AudioClockAligner:
+    """Keeps captured audio on the pipeline's monotonic clock.
+
+    Every chunk comes with the monotonic time at which it was read. Its
+    lateness is that time minus the end of the chunk in the audio written so
+    far; reads can only be late, so the minimum lateness over a window measures
+    how far the sound card's clock has drifted. A gap before the first chunk is
+    filled with silence, and drift beyond tolerance is corrected by resampling
+    the following chunks by at most max_correction, which is inaudible.
+    """
+
+    def __init__(self, rate, channels, sample_width, start_time, tolerance=0.02,
+                 window=2.0, max_correction=0.005):
+        self.rate = rate
+        self.channels = channels
+        self.dtype = np.dtype(f"<i{sample_width}")
+        self.start_time = start_time
+        self.tolerance = tolerance
+        self.window = window
+        self.max_correction = max_correction
+
+        self.samples_written = 0
+        self.window_end = None
+        self.window_lateness = None
+        self.pending = 0
+
+        # Reported per recording
+        self.lead_in = 0.0
+        self.drift = 0.0
+        self.max_drift = 0.0
+        self.corrected_samples = 0
+
+    def align(self, data, timestamp):
+        """Return the chunk read at timestamp, padded or resampled onto the monotonic clock"""
+        samples = np.frombuffer(data, dtype=self.dtype).reshape(-1, self.channels)
+        elapsed = timestamp - self.start_time
+
+        if self.window_end is None:
+            # Audio that starts after the video gets leading silence
+            lead = int(round(elapsed * self.rate)) - len(samples)
+            if lead > 0:
+                self.lead_in = lead / self.rate
+                samples = np.concatenate((np.zeros((lead, self.channels), dtype=self.dtype), samples))
+            elif lead < 0:
+                # Drop audio buffered before the video started
+                self.lead_in = lead / self.rate
+                samples = samples[min(-lead, len(samples) - 1):]
+            self.window_end = timestamp + self.window
+
+        lateness = elapsed - (self.samples_written + len(samples)) / self.rate
+        if self.window_lateness is None or lateness < self.window_lateness:
+            self.window_lateness = lateness
+
+        if timestamp >= self.window_end:
+            self.drift = self.window_lateness
+            self.max_drift = max(self.max_drift, abs(self.drift))
+            if abs(self.drift) > self.tolerance:
+                self.pending = int(round(self.drift * self.rate))
+            self.window_end = timestamp + self.window
+            self.window_lateness = None
+
+        if self.pending:
+            limit = max(1, int(len(samples) * self.max_correction))
+            adjust = max(-limit, min(limit, self.pending))
+            self.pending -= adjust
+            self.corrected_samples += abs(adjust)
+            samples = self._resample(samples, len(samples) + adjust)
+
+        self.samples_written += len(samples)
+        return samples.tobytes()
+
+    def _resample(self, samples, length):
+        """Linearly resample a (frames, channels) block to length frames"""
+        positions = np.linspace(0, len(samples) - 1, length)
+        source = np.arange(len(samples))
+        resampled = np.empty((length, self.channels), dtype=self.dtype)
+        for channel in range(self.channels):
+            resampled[:, channel] = np.round(np.interp(positions, source, samples[:, channel]))
+        return resampled
+
+
+class PipelineMetrics:
+    """Count, average and maximum duration of each timed pipeline stage"""
+
     def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Zoom Meeting Scheduler and Recorder")
-        self.setMinimumSize(800, 600)
-        
-        # Initialize recorder backend
-        self.recorder = ZoomMeetingRecorder()
-        
-        # Create main widget and layout
-        main_widget = QWidget()
-        self.setCentralWidget(main_widget)
-        main_layout = QVBoxLayout(main_widget)
-        
-        # Create form for adding meetings
-        form_widget = QWidget()
-        form_layout = QVBoxLayout(form_widget)
-        
-        # Meeting name input
-        name_layout = QHBoxLayout()
-        name_layout.addWidget(QLabel("Meeting Name:"))
-        self.name_input = QLineEdit()
-        name_layout.addWidget(self.name_input)
-        form_layout.addLayout(name_layout)
-        
-        # Zoom link input
-        link_layout = QHBoxLayout()
-        link_layout.addWidget(QLabel("Zoom Link:"))
-        self.link_input = QLineEdit()
-        link_layout.addWidget(self.link_input)
-        form_layout.addLayout(link_layout)
-        
-        # Time and duration inputs
-        time_layout = QHBoxLayout()
-        time_layout.addWidget(QLabel("Time:"))
-        self.time_input = QTimeEdit()
-        self.time_input.setDisplayFormat("HH:mm")
-        self.time_input.setTime(QTime(9, 0))
-        time_layout.addWidget(self.time_input)
-        
-        time_layout.addWidget(QLabel("Duration (minutes):"))
-        self.duration_input = QSpinBox()
-        self.duration_input.setRange(5, 240)
-        self.duration_input.setValue(60)
-        time_layout.addWidget(self.duration_input)
-        form_layout.addLayout(time_layout)
-        
-        # Day selection
-        days_layout = QHBoxLayout()
-        days_layout.addWidget(QLabel("Days:"))
-        
-        self.day_checkboxes = {}
-        days = ["Sunday","Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        for day in days:
-            cb = QCheckBox(day)
-            self.day_checkboxes[day] = cb
-            days_layout.addWidget(cb)
-        
-        form_layout.addLayout(days_layout)
-        
-        # Add meeting button
-        add_button_layout = QHBoxLayout()
-        add_button = QPushButton("Add Meeting")
-        add_button.clicked.connect(self.add_meeting)
-        add_button_layout.addStretch()
-        add_button_layout.addWidget(add_button)
-        form_layout.addLayout(add_button_layout)
-        
-        main_layout.addWidget(form_widget)
-        
-        # Create table for meetings list
-        self.meetings_table = QTableWidget(0, 5)
-        self.meetings_table.setHorizontalHeaderLabels(["Meeting Name", "Zoom Link", "Time", "Duration", "Days"])
-        self.meetings_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.meetings_table.setSelectionBehavior(QTableWidget.SelectRows)
-        
-        # Add table buttons
-        table_buttons_layout = QHBoxLayout()
-        delete_button = QPushButton("Delete Selected")
-        delete_button.clicked.connect(self.delete_selected_meeting)
-        table_buttons_layout.addWidget(delete_button)
-        
-        save_button = QPushButton("Save Meetings")
-        save_button.clicked.connect(self.save_meetings)
-        table_buttons_layout.addWidget(save_button)
-        
-        main_layout.addWidget(self.meetings_table)
-        main_layout.addLayout(table_buttons_layout)
-        
-        # Status section
-        status_layout = QHBoxLayout()
-        self.status_label = QLabel("Service status: Stopped")
-        status_layout.addWidget(self.status_label)
-        
-        self.start_service_button = QPushButton("Start Service")
-        self.start_service_button.clicked.connect(self.toggle_service)
-        self.service_running = False
-        status_layout.addWidget(self.start_service_button)
-        
-        main_layout.addLayout(status_layout)
-        
-        # Load existing meetings
-        self.load_meetings()
-        
-        # Update timer to check for active recordings
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_status)
-        self.update_timer.start(5000)  # Update every 5 seconds
-    
-    def add_meeting(self):
-        """Add meeting to the table"""
-        name = self.name_input.text()
-        link = self.link_input.text()
-        time = self.time_input.time().toString("HH:mm")
-        duration = self.duration_input.value()
-        
-        # Validate inputs
-        if not name or not link:
-            QMessageBox.warning(self, "Input Error", "Meeting name and Zoom link are required.")
-            return
-        
-        if not link.startswith("https://") or "zoom.us" not in link:
-            QMessageBox.warning(self, "Input Error", "Please enter a valid Zoom meeting link.")
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        """Add one timing sample for stage"""
+        with self.lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def set(self, stage, count, total, longest):
+        """Replace a stage's timings with totals gathered elsewhere"""
+        with self.lock:
+            self.stages[stage] = [count, total, longest]
+
+    def snapshot(self):
+        """Timings per stage in milliseconds"""
+        with self.lock:
+            return {
+                stage: {"count": count, "avg_ms": round(total / count * 1000, 3),
+                        "max_ms": round(longest * 1000, 3)}
+                for stage, (count, total, longest) in self.stages.items()
+            }
+
+
+def process_rss():
+    """Resident memory of this process in bytes, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class SystemCpuSampler:
+    """System-wide CPU usage between successive samples.
+
+    Reads /proc/stat where it exists; elsewhere the load average per CPU is
+    used as an approximation. sample() returns a percentage, or None when
+    neither is available.
+    """
+
+    def __init__(self):
+        self.previous = self._read_proc_stat()
+
+    @staticmethod
+    def _read_proc_stat():
+        try:
+            with open("/proc/stat", 'r') as f:
+                values = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        return sum(values), idle
+
+    def sample(self):
+        """CPU usage in percent since the previous sample"""
+        current = self._read_proc_stat()
+        if current is not None and self.previous is not None:
+            total = current[0] - self.previous[0]
+            idle = current[1] - self.previous[1]
+            self.previous = current
+            return 100.0 * (total - idle) / total if total > 0 else None
+        try:
+            return 100.0 * os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (OSError, AttributeError):
+            return None
+
+
+class AdaptiveQualityController:
+    """Chooses a recording quality level from how well the pipeline keeps up.
+
+    Levels run from full quality down through lower capture rates, then faster
+    encoder presets, then smaller output sizes, never going past min_fps, the
+    last of presets or min_scale. Each check is given the achieved share of the
+    target fps, how full the video queue is, whether frames were dropped and
+    the system CPU usage: any sign of overload steps one level down at once,
+    while stepping back up needs recover_checks healthy checks in a row.
+    """
+
+    def __init__(self, fps, base_preset, adjust_encoder=True, min_fps=5, presets=("superfast", "ultrafast"),
+                 min_scale=0.5, cpu_high=85, cpu_low=60, recover_checks=3):
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.recover_checks = recover_checks
+        self.healthy_checks = 0
+        self.level = 0
+
+        # Lower capture rates first: they apply at once and cost the least picture quality
+        stride = 1
+        self.levels = [{"stride": 1, "preset": base_preset, "scale": 1.0}]
+        while fps / (stride + 1) >= min_fps:
+            stride += 1
+            self.levels.append({"stride": stride, "preset": base_preset, "scale": 1.0})
+        if adjust_encoder:
+            for preset in presets:
+                self.levels.append({"stride": stride, "preset": preset, "scale": 1.0})
+            scale = 1.0
+            while scale > min_scale:
+                scale = max(min_scale, scale - 0.25)
+                self.levels.append({"stride": stride, "preset": self.levels[-1]["preset"], "scale": scale})
+
+    def check(self, fps_ratio, queue_fill, dropped, cpu):
+        """Return the level to record at next and the reason it changed, if it did"""
+        reasons = []
+        if fps_ratio < 0.9:
+            reasons.append(f"{fps_ratio:.0%} of target fps")
+        if queue_fill > 0.5:
+            reasons.append(f"video queue {queue_fill:.0%} full")
+        if dropped:
+            reasons.append(f"{dropped} frames dropped")
+        if cpu is not None and cpu > self.cpu_high:
+            reasons.append(f"CPU {cpu:.0f}%")
+
+        if reasons:
+            self.healthy_checks = 0
+            if self.level + 1 < len(self.levels):
+                self.level += 1
+                return self.level, ", ".join(reasons)
+            return self.level, None
+
+        if fps_ratio >= 0.97 and queue_fill < 0.1 and (cpu is None or cpu < self.cpu_low):
+            self.healthy_checks += 1
+            if self.healthy_checks >= self.recover_checks and self.level > 0:
+                self.healthy_checks = 0
+                self.level -= 1
+                return self.level, "headroom" if cpu is None else f"headroom, CPU {cpu:.0f}%"
+        else:
+            self.healthy_checks = 0
+        return self.level, None
+
+
+class AdaptiveQuality:
+    """Checks a recording pipeline every interval seconds and applies the level an AdaptiveQualityController picks.
+
+    A new capture rate applies from the next tick; a new preset or size
+    restarts the pipeline's encoder, which only a direct encode output can
+    do. Every change is logged and kept in changes.
+    """
+
+    def __init__(self, fps, base_preset, interval=5, **options):
+        self.fps = fps
+        self.base_preset = base_preset
+        self.interval = interval
+        self.options = options
+        self.controller = None
+        self.changes = []
+
+    def prepare(self, adjust_encoder):
+        """Work out the quality levels, with encoder settings among them if the encoder can be restarted"""
+        self.controller = AdaptiveQualityController(self.fps, self.base_preset, adjust_encoder=adjust_encoder,
+                                                    **self.options)
+
+    def run(self, pipeline):
+        """Quality-control stage: check the pipeline's load until it stops"""
+        cpu_sampler = SystemCpuSampler()
+        last_check = time.monotonic()
+        last_captured, last_dropped, _ = pipeline.capture_load()
+
+        while not pipeline.stop_event.wait(self.interval):
+            captured, dropped, queue_fill = pipeline.capture_load()
+            now = time.monotonic()
+            stride = self.controller.levels[self.controller.level]["stride"]
+            expected = self.fps / stride * (now - last_check)
+            fps_ratio = (captured - last_captured) / expected if expected > 0 else 1.0
+            previous = self.controller.level
+            level, reason = self.controller.check(fps_ratio, queue_fill, dropped - last_dropped,
+                                                  cpu_sampler.sample())
+            last_check, last_captured, last_dropped = now, captured, dropped
+            if reason is None:
+                continue
+            try:
+                self._apply(pipeline, previous, level, reason)
+            except Exception as e:
+                logger.error(f"Error changing recording quality: {str(e)}")
+                self.controller.level = previous
+
+    def _apply(self, pipeline, previous, level, reason):
+        old, new = self.controller.levels[previous], self.controller.levels[level]
+        restart = (new["preset"], new["scale"]) != (old["preset"], old["scale"])
+        size = pipeline.set_quality(new["stride"], new["preset"], new["scale"], restart)
+        if size is None:
+            self.controller.level = previous
             return
-        
-        # Get selected days
-        selected_days = []
-        for day, checkbox in self.day_checkboxes.items():
-            if checkbox.isChecked():
-                selected_days.append(day)
-        
-        if not selected_days:
-            QMessageBox.warning(self, "Input Error", "Please select at least one day.")
+
+        fps = self.fps / new["stride"]
+        width, height = size
+        logger.info(f"Adaptive quality level {previous} -> {level} ({reason}): "
+                    f"{fps:g} fps, preset {new['preset']}, {width}x{height}")
+        self.changes.append({
+            "elapsed": round(time.monotonic() - pipeline.start_time, 1),
+            "level": level,
+            "reason": reason,
+            "fps": round(fps, 2),
+            "preset": new["preset"],
+            "size": [width, height],
+        })
+
+
+def lock_file(path):
+    """Create or open path and lock it without waiting.
+
+    Returns the open file, which holds the lock until unlock_file() or until
+    the process exits, or None if another process holds it.
+    """
+    handle = open(path, "a+")
+    try:
+        if os.name == 'nt':
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def unlock_file(handle):
+    """Remove a file locked with lock_file() and release its lock"""
+    try:
+        os.remove(handle.name)
+    except OSError:
+        pass
+    handle.close()
+
+
+def file_locked(path):
+    """True if a running process holds the lock on path; a lock file left by a dead one is removed"""
+    if not os.path.exists(path):
+        return False
+    handle = lock_file(path)
+    if handle is None:
+        return True
+    unlock_file(handle)
+    return False
+
+
+def _lower_worker_priority():
+    """Process pool initializer: run post-processing below live capture"""
+    try:
+        if hasattr(os, "nice"):
+            os.nice(10)
+    except OSError:
+        pass
+
+
+def run_postprocess_job(job):
+    """Run one post-processing FFmpeg job; called in a pool worker process.
+
+    "combine" jobs encode a temp video and audio pair; "concat" jobs join
+    finished segments into one MP4 by stream copy, or re-encode them to a
+    single size when the recording changed resolution or preset part-way;
+    "trim" jobs copy an MP4 without its tail. A job's duration, if set, cuts
+    the output at that many seconds. A combine job's tracks cut the video into
+    one track per monitor; the copies keep every track.
+    """
+    output_path = job["output_path"]
+    if job.get("type") == "trim":
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-i", job["input_path"],
+            "-map", "0", "-c", "copy", "-movflags", "+faststart",
+        ]
+    elif job.get("type") == "concat":
+        list_file = f"{output_path}.concat.txt"
+        with open(list_file, 'w') as f:
+            for segment in job["segments"]:
+                if os.path.exists(segment):
+                    path = os.path.abspath(segment).replace("'", "'\\''")
+                    f.write(f"file '{path}'\n")
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file]
+        if job.get("reencode"):
+            width, height = job["reencode"]["size"]
+            cmd += ["-vf", f"scale={width}:{height}", *build_encode_args(job["reencode"].get("encode_profile"))]
+        else:
+            cmd += ["-map", "0", "-c", "copy", "-bsf:a", "aac_adtstoasc", "-movflags", "+faststart"]
+    else:
+        container = "mpegts" if output_path.endswith(".ts") else "mp4"
+        cmd = ["ffmpeg", "-y", "-loglevel", "error"]
+        # Audio-only recordings have no temp video
+        for path in (job["temp_video_file"], job["temp_audio_file"]):
+            if path:
+                cmd += ["-i", path]
+        if job.get("tracks"):
+            cmd += build_track_args(job["tracks"])
+        cmd += build_encode_args(job.get("encode_profile"), container)
+    if job.get("duration"):
+        cmd += ["-t", f"{job['duration']:.3f}"]
+    cmd.append(output_path)
+    creationflags = getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0)
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            creationflags=creationflags)
+    return result.returncode, result.stderr.decode(errors="replace")[-2000:]
+
+
+class PostProcessingQueue:
+    """Persistent queue of FFmpeg jobs that turn temp recordings into MP4 files.
+
+    Jobs are kept in a locked per-queue JSON state file in the recordings
+    directory and run in a low-priority process pool; a concat job waits for
+    the jobs making its segments. resume() requeues jobs of queues that have
+    gone and temp files of crashed recordings. on_done(output_path, succeeded)
+    is called as each job finishes.
+    """
+
+    STATE_PATTERN = re.compile(r"^postprocess_queue(\..+)?\.json$")
+    SEGMENT_PATTERN = re.compile(r"^(?P<base>.+)_seg(?P<index>\d{3})$")
+    _instances = itertools.count()
+
+    def __init__(self, recordings_path, max_workers=1, on_done=None):
+        self.recordings_path = recordings_path
+        self.on_done = on_done
+        owner = f"{socket.gethostname()}-{os.getpid()}-{next(self._instances)}"
+        self.state_file = os.path.join(recordings_path, f"postprocess_queue.{owner}.json")
+        self.state_lock = lock_file(f"{self.state_file}.lock")
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.submitted = set()
+        self.executor = None
+
+    @staticmethod
+    def _load_state(state_file):
+        try:
+            with open(state_file, 'r') as f:
+                jobs = json.load(f)
+            # Jobs written before segmented recording were keyed by output name without extension
+            for key, job in list(jobs.items()):
+                if "output_path" not in job:
+                    job["output_path"] = f"{job.pop('output_file')}.mp4"
+                    job["type"] = "combine"
+                    jobs[job["output_path"]] = jobs.pop(key)
+            return jobs
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read post-processing queue {state_file}: {str(e)}")
+            return {}
+
+    def _save_state(self):
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(self.jobs, f, indent=4)
+        os.replace(temp_file, self.state_file)
+
+    def _add(self, job):
+        with self.lock:
+            self.jobs[job["output_path"]] = job
+            self._save_state()
+        logger.info(f"Queued post-processing of {job['output_path']}")
+        self._submit_ready()
+
+    def enqueue(self, temp_video_file, temp_audio_file, output_path, encode_profile=None, duration=None,
+                tracks=None):
+        """Persist a job combining a temp video/audio pair and schedule it"""
+        job = {
+            "type": "combine",
+            "temp_video_file": temp_video_file,
+            "temp_audio_file": temp_audio_file,
+            "output_path": output_path,
+            "encode_profile": encode_profile,
+            "duration": duration,
+            "queued_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        if tracks:
+            job["tracks"] = tracks
+        self._add(job)
+
+    def enqueue_concat(self, segments, output_path, reencode=None, duration=None):
+        """Persist a job joining segment files once they all exist.
+
+        The join is a stream copy unless reencode gives the {"size": [w, h],
+        "encode_profile": ...} to encode segments of mixed settings to.
+        """
+        job = {
+            "type": "concat",
+            "segments": list(segments),
+            "output_path": output_path,
+            "duration": duration,
+            "queued_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        if reencode:
+            job["reencode"] = reencode
+        self._add(job)
+
+    def enqueue_trim(self, input_path, output_path, duration):
+        """Persist a job copying the first duration seconds of an MP4 to output_path"""
+        self._add({
+            "type": "trim",
+            "input_path": input_path,
+            "output_path": output_path,
+            "duration": duration,
+            "queued_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+
+    @staticmethod
+    def _job_inputs(job):
+        """Files a job reads, removed once it succeeds"""
+        if job.get("type") == "concat":
+            return job["segments"]
+        if job.get("type") == "trim":
+            return [job["input_path"]]
+        return [path for path in (job["temp_video_file"], job["temp_audio_file"]) if path]
+
+    def resume(self):
+        """Queue unfinished jobs and orphaned temp files left by a previous run.
+
+        Files of recordings still locked by a running recorder, and the inputs
+        and outputs of jobs in a running queue's state file, are left alone.
+        """
+        with self.lock:
+            names = os.listdir(self.recordings_path)
+            # Take over the state files of queues whose process has gone
+            live = set()
+            adopted = []
+            for name in names:
+                state_file = os.path.join(self.recordings_path, name)
+                if not self.STATE_PATTERN.match(name) or state_file == self.state_file:
+                    continue
+                handle = lock_file(f"{state_file}.lock")
+                jobs = self._load_state(state_file)
+                if handle is None:
+                    for job in jobs.values():
+                        live.add(job["output_path"])
+                        live.update(self._job_inputs(job))
+                    continue
+                for output_path, job in jobs.items():
+                    self.jobs.setdefault(output_path, job)
+                adopted.append((state_file, handle))
+
+            recording_locked = {}
+
+            def in_use(recording, *paths):
+                if recording not in recording_locked:
+                    recording_locked[recording] = file_locked(f"{recording}.lock")
+                return recording_locked[recording] or any(path in live for path in paths)
+
+            # Bases of segmented recordings that captured video
+            video_segments = {match.group("base") for match in
+                              (self.SEGMENT_PATTERN.match(name[:-len("_temp.avi")])
+                               for name in names if name.endswith("_temp.avi")) if match}
+            for name in names:
+                if not name.endswith("_temp.wav"):
+                    continue
+                output_file = os.path.join(self.recordings_path, name[:-len("_temp.wav")])
+                temp_video_file = f"{output_file}_temp.avi"
+                is_segment = self.SEGMENT_PATTERN.match(os.path.basename(output_file))
+                output_path = f"{output_file}.ts" if is_segment else f"{output_file}.mp4"
+                recording = os.path.join(self.recordings_path, is_segment.group("base")) if is_segment else output_file
+                if output_path in self.jobs or in_use(recording, output_path, f"{output_file}_temp.wav"):
+                    continue
+                if os.path.basename(temp_video_file) not in names:
+                    # Audio-only, unless it is audio that ran past the last segment of a video recording
+                    if is_segment and is_segment.group("base") in video_segments:
+                        continue
+                    temp_video_file = None
+                logger.info(f"Found unfinished recording {output_file}")
+                self.jobs[output_path] = {
+                    "type": "combine",
+                    "temp_video_file": temp_video_file,
+                    "temp_audio_file": f"{output_file}_temp.wav",
+                    "output_path": output_path,
+                    "encode_profile": None,
+                    "queued_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                }
+
+            # Join the segments of any interrupted segmented recording
+            segments = {}
+            for path in list(self.jobs) + [os.path.join(self.recordings_path, n) for n in names]:
+                match = self.SEGMENT_PATTERN.match(os.path.basename(path)[:-3]) if path.endswith(".ts") else None
+                if match:
+                    base = os.path.join(os.path.dirname(path), match.group("base"))
+                    segments.setdefault(base, set()).add(path)
+            for base, paths in segments.items():
+                output_path = f"{base}.mp4"
+                if output_path not in self.jobs and not in_use(base, output_path, *paths):
+                    logger.info(f"Found unfinished segmented recording {base}")
+                    self.jobs[output_path] = {
+                        "type": "concat",
+                        "segments": sorted(paths),
+                        "output_path": output_path,
+                        "queued_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                    }
+
+            for job in list(self.jobs.values()):
+                if job.get("type") != "concat" and not all(os.path.exists(path) for path in self._job_inputs(job)):
+                    logger.warning(f"Dropping post-processing of {job['output_path']}: temp files missing")
+                    del self.jobs[job["output_path"]]
+            self._save_state()
+            for state_file, handle in adopted:
+                logger.info(f"Adopted post-processing jobs from {state_file}")
+                try:
+                    os.remove(state_file)
+                except OSError:
+                    pass
+                unlock_file(handle)
+
+        self._submit_ready()
+
+    def _submit_ready(self):
+        """Submit every job whose inputs are ready and that is not running yet"""
+        futures = []
+        with self.lock:
+            for job in self.jobs.values():
+                output_path = job["output_path"]
+                if output_path in self.submitted:
+                    continue
+                # Concat jobs wait for the jobs that produce their segments
+                if job.get("type") == "concat" and any(s in self.jobs for s in job["segments"]):
+                    continue
+                if self.executor is None:
+                    self.executor = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=_lower_worker_priority)
+                self.submitted.add(output_path)
+                futures.append((job, self.executor.submit(run_postprocess_job, job)))
+
+        for job, future in futures:
+            future.add_done_callback(lambda f, job=job: self._job_done(job, f))
+
+    def _job_done(self, job, future):
+        output_path = job["output_path"]
+        try:
+            returncode, stderr = future.result()
+        except Exception as e:
+            logger.error(f"Post-processing of {output_path} failed: {str(e)}")
+            with self.lock:
+                self.submitted.discard(output_path)
             return
-        
-        # Add to table
-        row_position = self.meetings_table.rowCount()
-        self.meetings_table.insertRow(row_position)
-        self.meetings_table.setItem(row_position, 0, QTableWidgetItem(name))
-        self.meetings_table.setItem(row_position, 1, QTableWidgetItem(link))
-        self.meetings_table.setItem(row_position, 2, QTableWidgetItem(time))
-        self.meetings_table.setItem(row_position, 3, QTableWidgetItem(str(duration)))
-        self.meetings_table.setItem(row_position, 4, QTableWidgetItem(", ".join(selected_days)))
-        
-        # Clear form
-        self.name_input.clear()
-        self.link_input.clear()
-        self.time_input.setTime(QTime(9, 0))
-        self.duration_input.setValue(60)
-        for checkbox in self.day_checkboxes.values():
-            checkbox.setChecked(False)
-    
-    def delete_selected_meeting(self):
-        """Delete the selected meeting from the table"""
-        selected_rows = set(index.row() for index in self.meetings_table.selectedIndexes())
-        for row in sorted(selected_rows, reverse=True):
-            self.meetings_table.removeRow(row)
-    
-    def save_meetings(self):
-        """Save meetings to config file"""
-        meetings = []
-        for row in range(self.meetings_table.rowCount()):
-            name = self.meetings_table.item(row, 0).text()
-            link = self.meetings_table.item(row, 1).text()
-            time = self.meetings_table.item(row, 2).text()
-            duration = int(self.meetings_table.item(row, 3).text())
-            days = [day.strip() for day in self.meetings_table.item(row, 4).text().split(",")]
-            
-            meetings.append({
-                "name": name,
-                "join_url": link,
-                "schedule": time,
-                "duration_minutes": duration,
-                "days": days
-            })
-        
-        # Update config
-        self.recorder.config["meetings"] = meetings
-        self.recorder.save_config()
-        
-        QMessageBox.information(self, "Success", "Meetings saved successfully.")
-    
-    def load_meetings(self):
-        """Load meetings from config file"""
-        meetings = self.recorder.config.get("meetings", [])
-        
-        for meeting in meetings:
-            row_position = self.meetings_table.rowCount()
-            self.meetings_table.insertRow(row_position)
-            self.meetings_table.setItem(row_position, 0, QTableWidgetItem(meeting["name"]))
-            self.meetings_table.setItem(row_position, 1, QTableWidgetItem(meeting["join_url"]))
-            self.meetings_table.setItem(row_position, 2, QTableWidgetItem(meeting["schedule"]))
-            self.meetings_table.setItem(row_position, 3, QTableWidgetItem(str(meeting["duration_minutes"])))
-            self.meetings_table.setItem(row_position, 4, QTableWidgetItem(", ".join(meeting["days"])))
-    
-    def toggle_service(self):
-        """Start or stop the recording service"""
-        if not self.service_running:
-            if self.meetings_table.rowCount() == 0:
-                QMessageBox.warning(self, "No Meetings", "Please add at least one meeting before starting the service.")
-                return
-            
-            # Save meetings before starting
-            self.save_meetings()
-            
-            # Start recorder service in background thread
-            self.service_thread = threading.Thread(target=self.recorder.run_scheduler)
-            self.service_thread.daemon = True
-            self.service_thread.start()
-            
-            self.service_running = True
-            self.start_service_button.setText("Stop Service")
-            self.status_label.setText("Service status: Running")
+
+        if returncode == 0:
+            logger.info(f"Successfully created {output_path}")
+            # Remove the inputs
+            temp_files = self._job_inputs(job)
+            if job.get("type") == "concat":
+                temp_files = temp_files + [f"{output_path}.concat.txt"]
+            for temp_file in temp_files:
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
         else:
-            # Stop service
-            self.recorder.stop_scheduler()
-            self.service_running = False
-            self.start_service_button.setText("Start Service")
-            self.status_label.setText("Service status: Stopped")
-    
-    def update_status(self):
-        """Update status display with current recorder status"""
-        if self.service_running:
-            if self.recorder.recording_active:
-                current_meeting = self.recorder.current_meeting["name"] if self.recorder.current_meeting else "Unknown"
-                self.status_label.setText(f"Service status: Recording meeting '{current_meeting}'")
+            logger.error(f"Error post-processing {output_path} with FFmpeg: {stderr}")
+            logger.info(f"Keeping the input files of {output_path}.")
+
+        with self.lock:
+            self.jobs.pop(output_path, None)
+            self.submitted.discard(output_path)
+            self._save_state()
+        if self.on_done:
+            try:
+                self.on_done(output_path, returncode == 0)
+            except Exception as e:
+                logger.error(f"Error after post-processing {output_path}: {str(e)}")
+        self._submit_ready()
+
+    def pending(self):
+        """Number of jobs not yet finished"""
+        with self.lock:
+            return len(self.jobs)
+
+    def is_pending(self, output_path):
+        """True while a job producing output_path is queued or running"""
+        with self.lock:
+            return output_path in self.jobs
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool; unfinished jobs stay in the queue file for the next start"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if wait and self.state_lock is not None:
+            # Nothing runs any more, so another recorder may adopt what is left
+            with self.lock:
+                if not self.jobs:
+                    try:
+                        os.remove(self.state_file)
+                    except OSError:
+                        pass
+                unlock_file(self.state_lock)
+                self.state_lock = None
+
+
+class RecordingPipeline:
+    """Paced screen capture, audio capture and encode stages for a single recording."""
+
+    def __init__(self, output_file, output=None, screen=None, fps=15, queue_seconds=2, output_size=None,
+                 change_detector=None, max_frame_gap=1.0, audio_source="pyaudio", audio_rate=44100,
+                 audio_channels=2, audio_chunk=1024, audio_buffer_seconds=2.0, av_sync=True, sync_tolerance=0.02,
+                 capture_pool=None, quality=None, end_detector=None, indexer=None):
+        self.output_file = output_file
+        self.output = output if output is not None else TwoPassOutput(output_file, fps)
+        # Without a screen only the audio stages run
+        self.screen = screen
+        self.capture_video = screen is not None
+        self.capture_pool = capture_pool
+        self.quality = quality
+        self.end_detector = end_detector
+        self.indexer = indexer
+        # Regions of the per-monitor tracks the encoder cuts from a "tracks" canvas
+        self.video_tracks = None
+        # Set in a capture process: its ring, and which share of the ticks it takes
+        self.frame_ring = None
+        self.capture_worker = 0
+        self.capture_worker_count = 1
+        self.capture_stride = 1
+        self.audio_source = audio_source
+        self.av_sync = av_sync
+        self.sync_tolerance = sync_tolerance
+        self.audio_aligner = None
+        self.fps = fps
+        self.output_size = tuple(output_size) if output_size else None
+        self.change_detector = change_detector
+        self.max_frame_gap = max_frame_gap
+        # The first stage error, for the session to report
+        self.error = None
+        self.prepared = False
+        self.audio = None
+        self.audio_stream = None
+
+        # Audio settings
+        self.sample_width = 2  # 16-bit PCM
+        self.channels = audio_channels
+        self.rate = audio_rate
+        self.chunk = audio_chunk
+        self.block_align = self.channels * self.sample_width
+        self.audio_ring = AudioRingBuffer(max(self.chunk * 4, int(self.rate * audio_buffer_seconds)) * self.block_align,
+                                          self.rate * self.block_align)
+
+        # Bounded queue between the video stages
+        self.video_queue = queue.Queue(maxsize=max(1, int(fps * queue_seconds)))
+
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.start_time = None
+        self.stop_time = None
+
+        # Frame accounting
+        self.frames_captured = 0
+        self.frames_written = 0
+        self.frames_duplicated = 0
+        self.frames_dropped = 0
+        self.frames_unchanged = 0
+        self.ticks_missed = 0
+        self.audio_overflows = 0
+        self.audio_underflows = 0
+
+        self.stage_metrics = PipelineMetrics()
+        self.last_rate_sample = None
+        self.recent_fps = 0.0
+
+    def prepare(self):
+        """Open and check the capture backend, audio device, encoder and output files.
+
+        Everything that can fail or take time happens here, so it can be done
+        ahead of the meeting and start() only has to launch the stage threads.
+        """
+        self.prepared = True
+        if self.screen is None:
+            self.width = self.height = None
+        else:
+            self.screen.open()
+            self.width, self.height = self.output_size or (self.screen.width, self.screen.height)
+            if self.screen.region == "monitors" and self.screen.monitor_layout == "tracks":
+                self.video_tracks = self.screen.capture.track_regions(self.width, self.height)
+            if self.capture_pool:
+                # The capture processes open their own; this one only checked the screen can be grabbed
+                self.screen.close()
+                self.capture_pool.start(self._capture_settings(), self.width, self.height)
+
+        # Audio is delivered to a callback; opened stopped, so nothing is captured before start()
+        if self.audio_source == "synthetic":
+            self.audio = None
+            self.audio_stream = SyntheticAudioStream(self.channels, self.rate, self.chunk, self._audio_callback)
+        else:
+            self.audio = pyaudio.PyAudio()
+            self.audio_stream = self.audio.open(format=self.audio.get_format_from_width(self.sample_width),
+                                                channels=self.channels,
+                                                rate=self.rate, input=True,
+                                                frames_per_buffer=self.chunk, start=False,
+                                                stream_callback=self._audio_callback)
+
+        try:
+            self.output.open(self.width, self.height, self.channels, self.rate, self.sample_width, self.video_tracks)
+        except Exception as e:
+            if self.output.fallback is None:
+                raise
+            logger.error(f"Could not open {type(self.output).__name__}, falling back to "
+                         f"{type(self.output.fallback).__name__}: {str(e)}")
+            self.output.abort()
+            self.output = self.output.fallback
+            self.output.open(self.width, self.height, self.channels, self.rate, self.sample_width, self.video_tracks)
+
+        self.capture_size = (self.width, self.height)
+        if self.quality:
+            # Only the direct encoder can be restarted with another preset or size, and only with one track
+            self.quality.prepare(adjust_encoder=self.output.direct and not self.video_tracks)
+
+    def start(self):
+        """Start all pipeline stages, opening the devices first unless prepare() already did"""
+        if not self.prepared:
+            self.prepare()
+        elif self.screen and not self.screen.closed:
+            # The meeting window may only have appeared since prepare()
+            self.screen.track_window()
+
+        self.audio_stream.start_stream()
+        self.start_time = time.monotonic()
+        if self.av_sync:
+            self.audio_aligner = AudioClockAligner(self.rate, self.channels, self.sample_width,
+                                                   self.start_time, tolerance=self.sync_tolerance)
+        stages = [("audio-write", self._write_audio)]
+        if self.capture_pool:
+            self.capture_pool.set_start_time(self.start_time)
+            stages.append(("video-encode", self._encode_video))
+        elif self.screen:
+            stages += [("video-capture", self._capture_video), ("video-encode", self._encode_video)]
+        if self.quality:
+            stages.append(("quality-control", lambda: self.quality.run(self)))
+        for name, target in stages:
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+        if self.capture_pool:
+            logger.info(f"Recording pipeline started at {self.fps} fps ({self.width}x{self.height}), "
+                        f"{self.capture_pool.processes} capture processes")
+        elif self.screen:
+            logger.info(f"Recording pipeline started at {self.fps} fps ({self.width}x{self.height})")
+        else:
+            logger.info(f"Recording pipeline started, audio only ({self.rate} Hz, {self.channels} channels)")
+
+    def abort(self):
+        """Release everything prepare() opened and remove its files, without recording"""
+        if self.screen:
+            self.screen.close()
+        if self.capture_pool:
+            self.capture_pool.stop()
+            self.capture_pool.close()
+        if self.audio_stream:
+            self.audio_stream.close()
+        if self.audio:
+            self.audio.terminate()
+        self.output.abort()
+        for path in self.output_paths():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stop(self):
+        """Stop capturing, drain the queues and close the output files"""
+        self.stop_time = time.monotonic()
+        # No more audio callbacks once the stream is stopped, so the writer can drain the ring
+        self.audio_stream.stop_stream()
+        self.stop_event.set()
+        # The capture processes close their rings as they finish, which ends the encode stage
+        if self.capture_pool:
+            self.capture_pool.stop()
+        for thread in self.threads:
+            thread.join()
+        if self.capture_pool:
+            # The final counters, before the shared memory goes
+            self._collect_capture_stats()
+            self.capture_pool.close()
+
+        if self.screen:
+            self.screen.close()
+
+        self.audio_stream.close()
+        if self.audio:
+            self.audio.terminate()
+
+        self.output.finish()
+
+        logger.info(f"Video frames: {self.frames_captured} captured, {self.frames_written} written, "
+                    f"{self.frames_duplicated} duplicated, {self.frames_dropped} dropped, "
+                    f"{self.frames_unchanged} unchanged, {self.ticks_missed} ticks missed")
+        logger.info(f"Audio: {self.audio_overflows} input overflows, {self.audio_underflows} input underflows, "
+                    f"{self.audio_ring.overflows} chunks dropped by a full buffer")
+        if self.quality and self.quality.changes:
+            controller = self.quality.controller
+            logger.info(f"Adaptive quality: {len(self.quality.changes)} changes, "
+                        f"finished at level {controller.level} of {len(controller.levels) - 1}")
+        if self.error:
+            logger.error(f"Recording pipeline of {self.output_file} failed: {self.error}")
+        if self.audio_aligner:
+            aligner = self.audio_aligner
+            logger.info(f"A/V sync: audio lead-in {aligner.lead_in * 1000:.0f} ms, "
+                        f"drift {aligner.drift * 1000:.0f} ms (max {aligner.max_drift * 1000:.0f} ms), "
+                        f"{aligner.corrected_samples / self.rate * 1000:.0f} ms corrected")
+
+    def output_paths(self):
+        """Media files written for this recording so far"""
+        return self.output.output_paths()
+
+    def output_size_bytes(self):
+        """Total size of the files written for this recording so far"""
+        total = 0
+        for path in self.output_paths():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def metrics(self):
+        """Snapshot of the pipeline's performance counters"""
+        now = time.monotonic()
+        elapsed = max(1e-6, (self.stop_time or now) - (self.start_time or now))
+        self._collect_capture_stats()
+
+        # Achieved fps since the previous snapshot, at least a second apart
+        if self.last_rate_sample is None or now - self.last_rate_sample[0] >= 1.0:
+            previous = self.last_rate_sample or (self.start_time or now, 0)
+            self.last_rate_sample = (now, self.frames_captured)
+            self.recent_fps = (self.frames_captured - previous[1]) / max(1e-6, now - previous[0])
+
+        output_bytes = self.output_size_bytes()
+        metrics = {
+            "elapsed": round(elapsed, 1),
+            "target_fps": self.fps,
+            "fps": round(self.frames_captured / elapsed, 2),
+            "recent_fps": round(self.recent_fps, 2),
+            "frames": {
+                "captured": self.frames_captured,
+                "written": self.frames_written,
+                "duplicated": self.frames_duplicated,
+                "dropped": self.frames_dropped,
+                "unchanged": self.frames_unchanged,
+                "ticks_missed": self.ticks_missed,
+            },
+            "audio_overflows": self.audio_overflows,
+            "audio_underflows": self.audio_underflows,
+            "audio_buffer_overflows": self.audio_ring.overflows,
+            "queues": {"video": self.capture_pool.depth() if self.capture_pool else self.video_queue.qsize(),
+                       "audio_buffer_ms": round(self.audio_ring.fill() / self.block_align / self.rate * 1000, 1)},
+            "stages": self.stage_metrics.snapshot(),
+            "rss_bytes": process_rss(),
+            "output_bytes": output_bytes,
+            "output_kbps": round(output_bytes * 8 / elapsed / 1000, 1),
+        }
+        if self.error:
+            metrics["error"] = self.error
+        if self.audio_aligner:
+            metrics["av_sync"] = {
+                "lead_in_ms": round(self.audio_aligner.lead_in * 1000, 1),
+                "drift_ms": round(self.audio_aligner.drift * 1000, 1),
+                "max_drift_ms": round(self.audio_aligner.max_drift * 1000, 1),
+                "corrected_ms": round(self.audio_aligner.corrected_samples / self.rate * 1000, 1),
+            }
+        if self.quality and self.quality.controller:
+            controller = self.quality.controller
+            metrics["quality"] = {
+                "level": controller.level,
+                "fps": round(self.fps / self.capture_stride, 2),
+                "preset": controller.levels[controller.level]["preset"],
+                "size": list(self.capture_size),
+                "changes": list(self.quality.changes),
+            }
+        # With capture processes the monitor in use is only known to them
+        capture = self.screen.capture if self.screen and not self.capture_pool else None
+        if isinstance(capture, MultiMonitorCaptureBackend):
+            metrics["monitors"] = {"count": len(capture.monitors), "layout": capture.layout}
+            if capture.layout == "active":
+                metrics["monitors"]["active"] = capture.active + 1
+        if self.end_detector:
+            detector = self.end_detector
+            metrics["end_detection"] = {
+                "audio_rms": round(detector.rms, 1),
+                "motion": round(detector.motion, 2),
+                "quiet_seconds": round(max(0.0, elapsed - max(detector.last_sound, detector.last_motion)), 1),
+            }
+        if self.indexer:
+            metrics["index"] = {"thumbnails": len(self.indexer.strip), "keyframes": len(self.indexer.keyframes)}
+        return metrics
+
+    def meeting_ended(self):
+        """(end time in seconds, reason) once the meeting appears to be over, otherwise None"""
+        if self.end_detector is None or self.start_time is None:
+            return None
+        return self.end_detector.check(time.monotonic() - self.start_time)
+
+    def capture_load(self):
+        """(frames captured, frames dropped, share of the video queue in use) for the quality control"""
+        self._collect_capture_stats()
+        if self.capture_pool:
+            queue_fill = self.capture_pool.depth() / self.capture_pool.capacity()
+        else:
+            queue_fill = self.video_queue.qsize() / self.video_queue.maxsize
+        return self.frames_captured, self.frames_dropped, queue_fill
+
+    def set_quality(self, stride, preset, scale, restart):
+        """Capture every stride-th tick, first restarting the encoder with preset and scale if restart is set.
+
+        Returns the frame size from now on, or None if the encoder could not be restarted.
+        """
+        if restart:
+            size = self.output.restart(preset, scale, time.monotonic() - self.start_time)
+            if size is None:
+                return None
+            self.capture_size = size
+        self.capture_stride = stride
+        if self.capture_pool:
+            self.capture_pool.set_capture(stride, *self.capture_size)
+        return self.capture_size
+
+    def _capture_settings(self):
+        """RecordingPipeline arguments for a capture process"""
+        return {"output_file": self.output_file, "screen": self.screen, "fps": self.fps,
+                "change_detector": self.change_detector, "max_frame_gap": self.max_frame_gap}
+
+    def _sync_frame_ring(self):
+        """In a capture process: share the counters and stage timings, and pick up new capture settings"""
+        ring = self.frame_ring
+        ring.set_value("captured", self.frames_captured)
+        ring.set_value("dropped", self.frames_dropped)
+        ring.set_value("unchanged", self.frames_unchanged)
+        ring.set_value("ticks_missed", self.ticks_missed)
+        with self.stage_metrics.lock:
+            for stage, (count, total, longest) in self.stage_metrics.stages.items():
+                ring.set_value(f"{stage}_count", count)
+                ring.set_value(f"{stage}_total", total)
+                ring.set_value(f"{stage}_max", longest)
+        self.capture_stride = int(ring.value("stride"))
+        self.capture_size = (int(ring.value("width")), int(ring.value("height")))
+
+    def _collect_capture_stats(self):
+        """Take the counters the capture processes have shared"""
+        stats = self.capture_pool.collect(self.stage_metrics) if self.capture_pool else None
+        if stats is None:
+            return
+        self.frames_captured = stats["captured"]
+        self.frames_dropped = stats["dropped"]
+        self.frames_unchanged = stats["unchanged"]
+        self.ticks_missed = stats["ticks_missed"]
+        if self.error is None and stats["failed"]:
+            self.error = "Error during video capture in a capture process"
+
+    def _capture_video(self):
+        """Grab one frame per tick and hand it to the encoder"""
+        frame_interval = 1.0 / self.fps
+        max_gap_ticks = max(1, int(self.max_frame_gap * self.fps))
+        next_index = self.capture_stride * self.capture_worker
+        last_sent_index = None
+
+        try:
+            while not self.stop_event.is_set():
+                # Sleep until the next tick, waking early if the pipeline stops
+                delay = self.start_time + next_index * frame_interval - time.monotonic()
+                if delay > 0 and self.stop_event.wait(delay):
+                    break
+
+                self.screen.follow_window()
+                grab_start = time.monotonic()
+                timestamp = grab_start - self.start_time
+                frame = self.screen.grab()
+                self.frames_captured += 1
+                convert_start = time.monotonic()
+                self.stage_metrics.record("grab", convert_start - grab_start)
+
+                # Skip unchanged frames unless the encoder is due a refresh
+                if self.change_detector is not None:
+                    changed = self.change_detector.has_changed(frame)
+                    detect_end = time.monotonic()
+                    self.stage_metrics.record("detect", detect_end - convert_start)
+                    convert_start = detect_end
+                    if (not changed and last_sent_index is not None
+                            and next_index - last_sent_index < max_gap_ticks):
+                        self.frames_unchanged += 1
+                        next_index = self._advance_tick(next_index)
+                        continue
+
+                width, height = self.capture_size
+                if self.frame_ring is not None:
+                    # Convert straight into shared memory; with every slot in use the encoder is behind
+                    slot = self.frame_ring.reserve(width, height)
+                    if slot is None:
+                        self.frames_dropped += 1
+                        next_index = self._advance_tick(next_index)
+                        continue
+                    self._convert_frame(frame, width, height, slot)
+                    self.stage_metrics.record("convert", time.monotonic() - convert_start)
+                    self.frame_ring.publish(next_index, timestamp)
+                    last_sent_index = next_index
+                    next_index = self._advance_tick(next_index)
+                    continue
+
+                frame = self._convert_frame(frame, width, height)
+                self.stage_metrics.record("convert", time.monotonic() - convert_start)
+                try:
+                    self.video_queue.put_nowait((next_index, frame, timestamp))
+                    last_sent_index = next_index
+                except queue.Full:
+                    # The encoder is behind; the previous frame covers the gap
+                    self.frames_dropped += 1
+
+                next_index = self._advance_tick(next_index)
+        except Exception as e:
+            self._stage_failed(f"Error during video capture: {str(e)}")
+            # The encode stage repeats the last frame until the recording stops
+            self.stop_event.wait()
+        finally:
+            if self.frame_ring is not None:
+                self._sync_frame_ring()
+                self.frame_ring.set_value("failed", self.error is not None)
+                self.frame_ring.close()
             else:
-                next_meeting = self.recorder.get_next_meeting_info()
-                if next_meeting:
-                    self.status_label.setText(f"Service status: Waiting for next meeting at {next_meeting['time']} ({next_meeting['name']})")
-                else:
-                    self.status_label.setText("Service status: Running (no upcoming meetings)")
-    
-    def closeEvent(self, event):
-        """Handle window close event"""
-        if self.service_running:
-            reply = QMessageBox.question(self, 'Confirm Exit', 
-                'The recording service is still running. Stop service and exit?',
-                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-            
-            if reply == QMessageBox.Yes:
-                self.recorder.stop_scheduler()
-                event.accept()
+                self.video_queue.put(None)
+
+    def _stage_failed(self, message):
+        """Log a stage error, keeping the first for stop() and the session"""
+        logger.error(message)
+        if self.error is None:
+            self.error = message
+
+    def _convert_frame(self, frame, width, height, out=None):
+        """Scale a grabbed frame to width x height and convert it to BGR, into out if given.
+
+        A frame of another aspect ratio, such as a meeting window sized after
+        prepare() or resized mid-meeting, is scaled to fit and letterboxed.
+        """
+        scale = min(width / frame.shape[1], height / frame.shape[0])
+        fit_width, fit_height = round(frame.shape[1] * scale), round(frame.shape[0] * scale)
+        if abs(fit_width - width) > 1 or abs(fit_height - height) > 1:
+            if out is None:
+                out = np.zeros((height, width, 3), dtype=np.uint8)
             else:
-                event.ignore()
-        else:
-            event.accept()
+                out.fill(0)
+            left, top = (width - fit_width) // 2, (height - fit_height) // 2
+            out[top:top + fit_height, left:left + fit_width] = self._convert_frame(frame, fit_width, fit_height)
+            return out
+
+        # Scale first so the conversion touches fewer pixels
+        resized = frame.shape[1] != width or frame.shape[0] != height
+        if resized:
+            frame = cv2.resize(frame, (width, height), dst=None if frame.shape[2] == 4 else out,
+                               interpolation=cv2.INTER_AREA)
+        if frame.shape[2] == 4:
+            return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=out)
+        if out is not None and not resized:
+            np.copyto(out, frame)
+            return out
+        if self.screen.reuses_buffer and not resized:
+            return frame.copy()
+        return frame
+
+    def _advance_tick(self, index):
+        """Return the next tick to capture, skipping ticks that have already passed"""
+        if self.frame_ring is not None:
+            self._sync_frame_ring()
+        current_tick = int((time.monotonic() - self.start_time) * self.fps)
+        if current_tick > index:
+            self.ticks_missed += (current_tick - index) // self.capture_worker_count
+            index = current_tick
+        # A reduced capture rate only grabs every capture_stride-th tick
+        if self.capture_worker_count == 1:
+            return index + self.capture_stride
+        # Capture processes take turns; keep to this one's share of the ticks
+        step = self.capture_stride * self.capture_worker_count
+        index += self.capture_stride
+        index += (self.capture_stride * self.capture_worker - index) % step
+        # The encode stage may now pass over any tick before this one
+        self.frame_ring.set_value("upcoming", index)
+        return index
+
+    def _write_frame(self, frame, timestamp):
+        """Write one frame shown from timestamp seconds to the output"""
+        write_start = time.monotonic()
+        self.output.write_video(frame, timestamp)
+        self.frames_written += 1
+        self.stage_metrics.record("write", time.monotonic() - write_start)
+
+    def _encode_video(self):
+        """Write captured frames, duplicating the previous frame for missed ticks at a constant rate"""
+        last_frame = None
+        last_timestamp = 0.0
+        failed = False
+        variable_frame_rate = self.output.variable_frame_rate
+
+        while True:
+            item = self.capture_pool.next_frame() if self.capture_pool else self.video_queue.get()
+            if item is None:
+                break
+            index, frame, timestamp = item
+            if self.end_detector:
+                self.end_detector.add_frame(frame, timestamp)
+            if self.indexer:
+                index_start = time.monotonic()
+                self.indexer.add_frame(frame, timestamp)
+                self.stage_metrics.record("index", time.monotonic() - index_start)
+            if failed:
+                # Keep draining so the capture stage never blocks on a dead encoder
+                continue
+            if last_frame is None:
+                last_frame = frame
+            try:
+                if not variable_frame_rate:
+                    while self.frames_written < index:
+                        self._write_frame(last_frame, self.frames_written / self.fps)
+                        self.frames_duplicated += 1
+                self._write_frame(frame, timestamp)
+                last_frame = frame
+                last_timestamp = timestamp
+            except Exception as e:
+                self._stage_failed(f"Error during video encoding: {str(e)}")
+                failed = True
+
+        # Extend the last frame so the video lasts as long as the recording did
+        if last_frame is not None and not failed:
+            total_frames = int((self.stop_time - self.start_time) * self.fps)
+            try:
+                if variable_frame_rate:
+                    end_timestamp = (total_frames - 1) / self.fps
+                    if end_timestamp > last_timestamp:
+                        self._write_frame(last_frame, end_timestamp)
+                        self.frames_duplicated += 1
+                else:
+                    while self.frames_written < total_frames:
+                        self._write_frame(last_frame, self.frames_written / self.fps)
+                        self.frames_duplicated += 1
+            except Exception as e:
+                self._stage_failed(f"Error during video encoding: {str(e)}")
+
+        # Close the video stream now; a direct encoder waits for both streams to end
+        self.output.close_video()
+
+    def _audio_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: count device errors and copy the samples into the ring"""
+        if status & PA_INPUT_OVERFLOW:
+            self.audio_overflows += 1
+        if status & PA_INPUT_UNDERFLOW:
+            self.audio_underflows += 1
+        self.audio_ring.write(in_data, time.monotonic())
+        return None, PA_CONTINUE
+
+    def _write_audio(self):
+        """Drain the audio ring to the output until the stream has stopped"""
+        failed = False
+        max_bytes = self.chunk * 4 * self.block_align
+        poll_interval = self.chunk / self.rate / 2
+        while True:
+            audio_data, timestamp = self.audio_ring.read(max_bytes, self.block_align)
+            if not audio_data:
+                if self.stop_event.is_set():
+                    break
+                time.sleep(poll_interval)
+                continue
+            if failed:
+                continue
+            try:
+                write_start = time.monotonic()
+                if self.audio_aligner:
+                    audio_data = self.audio_aligner.align(audio_data, timestamp)
+                if self.end_detector:
+                    self.end_detector.add_audio(audio_data, timestamp - self.start_time)
+                self.output.write_audio(audio_data)
+                self.stage_metrics.record("audio_write", time.monotonic() - write_start)
+            except Exception as e:
+                self._stage_failed(f"Error writing audio: {str(e)}")
+                failed = True
+
+        self.output.close_audio()
+
+
+def create_recording_pipeline(output_file, fps=15, direct_encode=False, capture_video=True,
+                              capture_backend="pyautogui", capture_options=None, capture_region=None,
+                              window_title="Zoom Meeting", window_poll_interval=2.0, monitor_layout="active",
+                              skip_duplicate_frames=False, change_threshold=8, max_frame_gap=1.0,
+                              encode_profile=None, segment_seconds=None, on_segment_done=None,
+                              audio_rate=44100, audio_channels=2, adaptive_quality=None, end_detection=None,
+                              thumbnails=None, capture_processes=0, frame_slots=4, **settings):
+    """Build a RecordingPipeline and its collaborators from recording settings.
+
+    direct_encode writes the MP4 in a single pass, falling back to a second
+    pass if the encoder cannot start. adaptive_quality, end_detection and
+    thumbnails are True or a dict of settings for AdaptiveQuality,
+    MeetingEndDetector and RecordingIndexer. Any other settings are passed to
+    RecordingPipeline.
+    """
+    output = TwoPassOutput(output_file, fps, segment_seconds, on_segment_done)
+    if direct_encode:
+        output = DirectEncodeOutput(output_file, encode_profile, segment_seconds,
+                                    low_delay=skip_duplicate_frames, fallback=output)
+        if skip_duplicate_frames and max_frame_gap > DirectEncodeOutput.MAX_FRAME_GAP:
+            logger.info(f"Writing a frame at least every {DirectEncodeOutput.MAX_FRAME_GAP} s instead of "
+                        f"{max_frame_gap} s to keep the direct encoder reading audio")
+            max_frame_gap = DirectEncodeOutput.MAX_FRAME_GAP
+
+    screen = quality = indexer = capture_pool = None
+    if capture_video:
+        screen = ScreenSource(capture_backend, capture_options, capture_region, window_title,
+                              window_poll_interval, monitor_layout)
+        if adaptive_quality:
+            options = adaptive_quality if isinstance(adaptive_quality, dict) else {}
+            base_preset = {**DEFAULT_ENCODE_PROFILE, **(encode_profile or {})}["preset"]
+            quality = AdaptiveQuality(fps, base_preset, **options)
+        if thumbnails:
+            indexer = RecordingIndexer(**(thumbnails if isinstance(thumbnails, dict) else {}))
+        if capture_processes:
+            capture_pool = CaptureProcessPool(capture_processes, frame_slots)
+    end_detector = None
+    if end_detection:
+        options = end_detection if isinstance(end_detection, dict) else {}
+        end_detector = MeetingEndDetector(audio_rate, audio_channels, **options)
+
+    return RecordingPipeline(output_file, output, screen, fps=fps, max_frame_gap=max_frame_gap,
+                             change_detector=FrameChangeDetector(pixel_threshold=change_threshold)
+                             if skip_duplicate_frames else None,
+                             audio_rate=audio_rate, audio_channels=audio_channels, capture_pool=capture_pool,
+                             quality=quality, end_detector=end_detector, indexer=indexer, **settings)
+
+
+def _run_capture_process(settings, ring, worker, workers, log_file=None):
+    """Capture process: grab, convert and publish every workers-th tick, starting at tick worker"""
+    # Interrupts are for the recording process, which stops this one through the ring
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # A spawned process starts without the recording process's logging setup
+    if log_file:
+        configure_logging(log_file)
+    pipeline = RecordingPipeline(**settings)
+    pipeline.frame_ring = ring
+    pipeline.capture_worker = worker
+    pipeline.capture_worker_count = workers
+    pipeline._sync_frame_ring()
+    try:
+        pipeline.screen.open()
+    except Exception as e:
+        logger.error(f"Capture process {worker} could not start capturing: {str(e)}")
+        return
+
+    # A flag rather than a multiprocessing.Event, which a killed process can leave locked;
+    # a recording process that dies without stopping the capture stops it too
+    def watch():
+        parent = multiprocessing.parent_process()
+        while not ring.value("stop") and parent.is_alive():
+            parent.join(0.05)
+        pipeline.stop_event.set()
+
+    threading.Thread(target=watch, name="capture-stop", daemon=True).start()
+    ring.set_value("state", SharedFrameRing.READY)
+    try:
+        while not ring.value("start_time") and not pipeline.stop_event.wait(0.002):
+            pass
+        pipeline.start_time = ring.value("start_time")
+        pipeline._capture_video()
+    finally:
+        pipeline.screen.close()
+        ring.unlink()
+
+
+class RecordingSession:
+    """One meeting recording: its meeting info, output file, recording thread and stop signal"""
+
+    def __init__(self, meeting_info, output_file):
+        self.meeting_info = meeting_info.copy()
+        self.meeting_info['output_file'] = output_file
+        self.output_file = output_file
+        self.stop_event = threading.Event()
+        self.finished = threading.Event()
+        self.thread = None
+        self.pipeline = None
+        # Held while the recording's files are being written, so resume() elsewhere leaves them alone
+        self.lock = None
+        # Set when the recording stopped because the meeting appeared to end
+        self.meeting_end = None
+        # Set when a pipeline stage or the recording itself failed
+        self.error = None
+
+    def metrics(self):
+        """Performance counters of the running pipeline, or None before it starts"""
+        pipeline = self.pipeline
+        return pipeline.metrics() if pipeline else None
+
+    @property
+    def name(self):
+        return self.meeting_info["name"]
+
+    def lock_files(self):
+        """Mark the recording's files as in use for other recorders sharing the directory"""
+        self.lock = lock_file(f"{self.output_file}.lock")
+        if self.lock is None:
+            logger.warning(f"Another recorder is already writing {self.output_file}")
+
+    def unlock_files(self):
+        """Release the files once post-processing has them, or they are removed"""
+        if self.lock is not None:
+            unlock_file(self.lock)
+            self.lock = None
+
+    def is_active(self):
+        """Return True while the session is recording"""
+        return not self.stop_event.is_set()
+
+    def stop(self):
+        """Ask the recording thread to stop"""
+        self.stop_event.set()
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class MeetingTimeline:
+    """Heap of upcoming (datetime, meeting) occurrences for the weekly schedule.
+
+    Every meeting/day pair has exactly one entry holding its next occurrence.
+    When an entry fires it is pushed back one week later, so the soonest
+    meeting is always a peek at the top of the heap.
+    """
+
+    def __init__(self, meetings, now=None):
+        now = now or datetime.datetime.now()
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.heap = []
+
+        for meeting in meetings:
+            meeting_time = datetime.datetime.strptime(meeting["schedule"], "%H:%M").time()
+            for day in meeting["days"]:
+                if day not in WEEKDAYS:
+                    logger.warning(f"Ignoring unknown day '{day}' for meeting '{meeting['name']}'")
+                    continue
+                when = self._next_occurrence(now, WEEKDAYS.index(day), meeting_time)
+                self.heap.append((when, next(self.counter), meeting))
+        heapq.heapify(self.heap)
+
+    @staticmethod
+    def _next_occurrence(now, weekday, meeting_time):
+        """First datetime at or after now that falls on weekday at meeting_time"""
+        days_ahead = (weekday - now.weekday()) % 7
+        when = datetime.datetime.combine(now.date() + datetime.timedelta(days=days_ahead), meeting_time)
+        if when < now:
+            when += datetime.timedelta(days=7)
+        return when
+
+    def __len__(self):
+        return len(self.heap)
+
+    def occurrences(self):
+        """All upcoming (datetime, meeting) occurrences in time order"""
+        with self.lock:
+            # The counter breaks ties, so meetings sharing a time slot are never compared
+            return [(when, meeting) for when, _, meeting in sorted(self.heap)]
+
+    def peek(self):
+        """Return the next (datetime, meeting) occurrence without removing it"""
+        with self.lock:
+            if not self.heap:
+                return None
+            when, _, meeting = self.heap[0]
+            return when, meeting
+
+    def pop_due(self, now):
+        """Remove and return all occurrences up to now, rescheduling each for the following week"""
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                when, _, meeting = self.heap[0]
+                heapq.heapreplace(self.heap, (when + datetime.timedelta(days=7), next(self.counter), meeting))
+                due.append((when, meeting))
+        return due
+
+
+def create_sqlite_schema(path, schema):
+    """Create the tables and indexes of schema in the SQLite database at path if they do not exist"""
+    db = sqlite3.connect(path, timeout=30)
+    try:
+        db.executescript(schema)
+    finally:
+        db.close()
+
+
+@contextlib.contextmanager
+def sqlite_transaction(path, write=True):
+    """Run a block in one transaction on a fresh connection to the SQLite database at path.
+
+    Writes begin immediately, taking the write lock up front so that
+    read-modify-write blocks in several processes queue up instead of failing
+    to upgrade their locks; reads are deferred and only share the database
+    while they run. The transaction commits when the block ends and rolls
+    back if it raises.
+    """
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    try:
+        db.execute("BEGIN IMMEDIATE" if write else "BEGIN DEFERRED")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+    finally:
+        db.close()
+
+
+class MeetingJobQueue:
+    """SQLite-backed queue of meeting occurrences shared by recorder workers.
+
+    A coordinator adds each occurrence as it comes due. Workers claim jobs
+    under a lease that they renew with heartbeats while recording; when a
+    worker stops heartbeating, its job can be claimed by another worker until
+    the meeting is over, up to max_attempts claims in all. Every change runs in
+    an immediate transaction on a fresh connection, so worker processes on one
+    machine, or hosts sharing the database on a filesystem with working locks,
+    never claim the same job twice.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            meeting TEXT NOT NULL,
+            start_ts REAL NOT NULL,
+            end_ts REAL NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, start_ts);
+        CREATE TABLE IF NOT EXISTS workers (
+            id TEXT PRIMARY KEY,
+            capacity INTEGER NOT NULL,
+            active INTEGER NOT NULL,
+            last_seen REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, lease_seconds=60, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        create_sqlite_schema(self.path, self.SCHEMA)
+
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        job["meeting"] = json.loads(job["meeting"])
+        job["scheduled_at"] = datetime.datetime.fromtimestamp(job["start_ts"])
+        return job
+
+    def add(self, meeting, when):
+        """Queue one occurrence of a meeting; adding it again has no effect"""
+        job_id = f"{meeting['name']}@{when.isoformat(timespec='minutes')}"
+        start = when.timestamp()
+        end = start + int(meeting["duration_minutes"]) * 60
+        with sqlite_transaction(self.path) as db:
+            added = db.execute("INSERT OR IGNORE INTO jobs (id, meeting, start_ts, end_ts, updated) "
+                               "VALUES (?, ?, ?, ?, ?)",
+                               (job_id, json.dumps(meeting), start, end, time.time())).rowcount
+        if added:
+            logger.info(f"Queued job {job_id}")
+        return job_id
+
+    def claim(self, worker_id, pre_roll=0):
+        """Claim the earliest job starting within pre_roll seconds whose meeting is not over yet.
+
+        Pending jobs and claimed jobs with an expired lease qualify. Returns the
+        job, including its meeting and scheduled_at, or None.
+        """
+        now = time.time()
+        with sqlite_transaction(self.path) as db:
+            row = db.execute("SELECT * FROM jobs WHERE start_ts <= ? AND end_ts > ? AND attempts < ? "
+                             "AND (state = 'pending' OR (state = 'claimed' AND lease_expires < ?)) "
+                             "ORDER BY start_ts LIMIT 1",
+                             (now + pre_roll, now, self.max_attempts, now)).fetchone()
+            if row is None:
+                return None
+            if row["state"] == "claimed":
+                logger.warning(f"Lease of {row['worker']} on job {row['id']} expired, taking over")
+            db.execute("UPDATE jobs SET state = 'claimed', worker = ?, lease_expires = ?, "
+                       "attempts = attempts + 1, updated = ? WHERE id = ?",
+                       (worker_id, now + self.lease_seconds, now, row["id"]))
+            job = self._job(row)
+        job.update(state="claimed", worker=worker_id, attempts=job["attempts"] + 1)
+        return job
+
+    def heartbeat(self, job_id, worker_id):
+        """Renew a lease; returns False if the job is no longer held by worker_id"""
+        now = time.time()
+        with sqlite_transaction(self.path) as db:
+            return db.execute("UPDATE jobs SET lease_expires = ?, updated = ? "
+                              "WHERE id = ? AND worker = ? AND state = 'claimed'",
+                              (now + self.lease_seconds, now, job_id, worker_id)).rowcount == 1
+
+    def finish(self, job_id, worker_id, state="done"):
+        """Mark a held job done or failed"""
+        with sqlite_transaction(self.path) as db:
+            db.execute("UPDATE jobs SET state = ?, lease_expires = NULL, updated = ? WHERE id = ? AND worker = ?",
+                       (state, time.time(), job_id, worker_id))
+
+    def release(self, job_id, worker_id):
+        """Give a held job back so another worker can claim it straight away"""
+        with sqlite_transaction(self.path) as db:
+            db.execute("UPDATE jobs SET state = 'pending', worker = NULL, lease_expires = NULL, updated = ? "
+                       "WHERE id = ? AND worker = ? AND state = 'claimed'",
+                       (time.time(), job_id, worker_id))
+
+    def expire(self):
+        """Mark jobs that were never recorded to the end as missed once their meeting is over"""
+        now = time.time()
+        with sqlite_transaction(self.path) as db:
+            rows = db.execute("SELECT id FROM jobs WHERE end_ts <= ? AND (state = 'pending' OR "
+                              "(state = 'claimed' AND lease_expires < ?))", (now, now)).fetchall()
+            db.execute("UPDATE jobs SET state = 'missed', updated = ? WHERE end_ts <= ? AND (state = 'pending' OR "
+                       "(state = 'claimed' AND lease_expires < ?))", (now, now, now))
+        for row in rows:
+            logger.warning(f"Job {row['id']} was not recorded to the end")
+
+    def register_worker(self, worker_id, capacity, active):
+        """Record that a worker is alive and how many meetings it is recording"""
+        with sqlite_transaction(self.path) as db:
+            db.execute("INSERT OR REPLACE INTO workers (id, capacity, active, last_seen) VALUES (?, ?, ?, ?)",
+                       (worker_id, capacity, active, time.time()))
+
+    def status(self):
+        """All jobs and workers, for display"""
+        with sqlite_transaction(self.path, write=False) as db:
+            jobs = [self._job(row) for row in db.execute("SELECT * FROM jobs ORDER BY start_ts")]
+            workers = [dict(row) for row in db.execute("SELECT * FROM workers ORDER BY id")]
+        return jobs, workers
+
+
+class RecordingCatalog:
+    """SQLite catalog of finished recordings with their thumbnails and slide-change keyframes.
+
+    Each recording has one row: meeting, media file, schedule slot, real
+    start and end, duration, size, status ("processing" while its MP4 is
+    still being made, then "ready" or "failed") and the pipeline stats. Its
+    thumbnail strip and keyframe index are JPEG rows in the thumbnails table,
+    so recordings can be listed, previewed and seeked without opening the
+    media. Changes run in immediate transactions on a fresh connection, as in
+    MeetingJobQueue, and queries in deferred ones that never wait for the
+    write lock, so recorders and viewers can share the database.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS recordings (
+            id INTEGER PRIMARY KEY,
+            meeting TEXT NOT NULL,
+            path TEXT NOT NULL UNIQUE,
+            scheduled_at TEXT,
+            joined_at TEXT,
+            started TEXT NOT NULL,
+            ended TEXT NOT NULL,
+            duration REAL NOT NULL,
+            size_bytes INTEGER,
+            status TEXT NOT NULL,
+            stats TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS recordings_started ON recordings (started);
+        CREATE INDEX IF NOT EXISTS recordings_meeting ON recordings (meeting, started);
+        CREATE TABLE IF NOT EXISTS thumbnails (
+            recording_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            time REAL NOT NULL,
+            image BLOB NOT NULL,
+            PRIMARY KEY (recording_id, kind, time)
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        create_sqlite_schema(self.path, self.SCHEMA)
+
+    @staticmethod
+    def _recording(row):
+        recording = dict(row)
+        recording["stats"] = json.loads(recording["stats"])
+        return recording
+
+    def add(self, recording, strip=(), keyframes=()):
+        """Catalog a recording with its (time, JPEG) strip and keyframes, replacing any entry for its path"""
+        with sqlite_transaction(self.path) as db:
+            old = db.execute("SELECT id FROM recordings WHERE path = ?", (recording["path"],)).fetchone()
+            if old is not None:
+                db.execute("DELETE FROM thumbnails WHERE recording_id = ?", (old["id"],))
+                db.execute("DELETE FROM recordings WHERE id = ?", (old["id"],))
+            recording_id = db.execute(
+                "INSERT INTO recordings (meeting, path, scheduled_at, joined_at, started, ended, duration, "
+                "size_bytes, status, stats) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (recording["meeting"], recording["path"], recording.get("scheduled_at"),
+                 recording.get("joined_at"), recording["started"], recording["ended"], recording["duration"],
+                 recording.get("size_bytes"), recording["status"], json.dumps(recording.get("stats", {})))
+            ).lastrowid
+            db.executemany("INSERT OR REPLACE INTO thumbnails (recording_id, kind, time, image) VALUES (?, ?, ?, ?)",
+                           [(recording_id, "strip", t, image) for t, image in strip] +
+                           [(recording_id, "keyframe", t, image) for t, image in keyframes])
+        return recording_id
+
+    def media_done(self, path, succeeded):
+        """Mark the recording whose media file is path ready, with its size, or failed"""
+        try:
+            size = os.path.getsize(path) if succeeded else None
+        except OSError:
+            size = None
+        with sqlite_transaction(self.path) as db:
+            return db.execute("UPDATE recordings SET status = ?, size_bytes = COALESCE(?, size_bytes) "
+                              "WHERE path = ?", ("ready" if succeeded else "failed", size, path)).rowcount == 1
+
+    def search(self, query=None, limit=100):
+        """Newest recordings first, optionally those whose meeting, file or start time contains query"""
+        sql = "SELECT * FROM recordings"
+        params = []
+        if query:
+            pattern = f"%{query}%"
+            sql += " WHERE meeting LIKE ? OR path LIKE ? OR started LIKE ? OR scheduled_at LIKE ?"
+            params += [pattern] * 4
+        sql += " ORDER BY started DESC LIMIT ?"
+        with sqlite_transaction(self.path, write=False) as db:
+            return [self._recording(row) for row in db.execute(sql, params + [limit])]
+
+    def get(self, recording_id):
+        """One recording by id, or None"""
+        with sqlite_transaction(self.path, write=False) as db:
+            row = db.execute("SELECT * FROM recordings WHERE id = ?", (recording_id,)).fetchone()
+        return self._recording(row) if row is not None else None
+
+    def thumbnails(self, recording_id, kind=None):
+        """(time, JPEG) thumbnails of a recording in time order, of one kind ("strip" or "keyframe") or both"""
+        sql = "SELECT time, image FROM thumbnails WHERE recording_id = ?"
+        params = [recording_id]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with sqlite_transaction(self.path, write=False) as db:
+            return [(row["time"], bytes(row["image"])) for row in db.execute(sql + " ORDER BY time", params)]
+
+    def keyframe_times(self, recording_id):
+        """Start times of the slides of a recording, for seeking"""
+        with sqlite_transaction(self.path, write=False) as db:
+            return [row["time"] for row in db.execute("SELECT time FROM thumbnails WHERE recording_id = ? "
+                                                      "AND kind = 'keyframe' ORDER BY time", (recording_id,))]
+
+
+# Built-in recording profiles a meeting can select with "profile"; entries in the
+# config's "recording_profiles" override their settings or add new profiles
+RECORDING_PROFILES = {
+    "full": {},
+    "slides": {
+        "fps": 2,
+        "skip_duplicate_frames": True,
+        "max_frame_gap": 10.0,
+        "thumbnails": True,
+        "encode_profile": {"crf": 28, "audio_bitrate": "96k"},
+    },
+    "audio": {
+        "audio_only": True,
+        "audio_rate": 16000,
+        "audio_channels": 1,
+        "encode_profile": {"audio_bitrate": "48k"},
+    },
+}
 
 
 class ZoomMeetingRecorder:
+    # Upper bound on one scheduler sleep, so wall-clock changes (DST, suspend) are noticed
+    MAX_SCHEDULER_SLEEP = 900
+
     def __init__(self, config_file="config.json"):
         """Initialize the Zoom meeting recorder"""
+        self.config_file = config_file
         self.config = self._load_config(config_file)
         self.recordings_path = self.config.get("recordings_path", "recordings")
         
@@ -287,14 +3783,68 @@ class ZoomMeetingRecorder:
         if not os.path.exists(self.recordings_path):
             os.makedirs(self.recordings_path)
         
-        # Track active recordings and scheduler
-        self.recording_active = False
+        # Track active recording sessions and scheduler
+        self.sessions = []
+        self.sessions_lock = threading.Lock()
+        self.metrics_file = os.path.join(self.recordings_path, "metrics.json")
+        self.metrics_lock = threading.Lock()
         self.scheduler_running = False
-        self.current_meeting = None
+
+        # Scheduled tasks run on a worker pool so they never block the scheduler loop
+        self.executor = None
+        self.overlap_policy = self.config.get("overlap_policy", "queue")
+        self.meeting_slot = threading.Semaphore(1)
+        self.tasks_lock = threading.Lock()
+        self.running_tasks = 0
+        self.tasks_cancelled = threading.Event()
+
+        # Upcoming meeting occurrences, built lazily from the config
+        self.timeline = None
+        self.timeline_lock = threading.Lock()
+        self.scheduler_wakeup = threading.Event()
+        # (name, datetime) of occurrences dispatched during their pre-roll; a rebuilt timeline still has them
+        self.dispatched = set()
+
+        # Coordinator and worker modes share meetings through a job queue
+        self.job_queue = None
+        self.coordinating = False
+        self.worker_id = self.config.get("worker_id") or f"{socket.gethostname()}-{os.getpid()}"
+        self.worker_jobs = set()
+
+        # Finished recordings are catalogued with their thumbnails, opened on first use
+        self.catalog = None
+        self.catalog_lock = threading.Lock()
+
+        # State changes are pushed to listeners such as the GUI; meeting edits are saved one at a time
+        self.listeners = []
+        self.config_lock = threading.Lock()
         
         # Check for FFmpeg
         self.has_ffmpeg = self._check_ffmpeg()
+
+        # Two-pass recordings are combined in the background; the queue is created once the recorder
+        # runs, not for one-off queries, and picks up leftovers from a crash
+        self.postprocess_queue = None
+        self.postprocess_lock = threading.Lock()
     
+    def get_postprocess_queue(self):
+        """The post-processing queue, created on first use and resuming what a previous run left"""
+        with self.postprocess_lock:
+            if self.postprocess_queue is None:
+                self.postprocess_queue = PostProcessingQueue(self.recordings_path,
+                                                             self.config.get("postprocess_workers", 1),
+                                                             on_done=self._media_done)
+                if self.has_ffmpeg:
+                    self.postprocess_queue.resume()
+            return self.postprocess_queue
+
+    def shutdown(self, wait=True):
+        """Stop post-processing; unfinished jobs stay queued for the next start"""
+        with self.postprocess_lock:
+            postprocess_queue = self.postprocess_queue
+        if postprocess_queue is not None:
+            postprocess_queue.shutdown(wait=wait)
+
     def _check_ffmpeg(self):
         """Check if FFmpeg is available in the system"""
         try:
@@ -322,179 +3872,491 @@ class ZoomMeetingRecorder:
     
     def save_config(self):
         """Save configuration to file"""
-        with open("config.json", 'w') as f:
+        temp_file = f"{self.config_file}.tmp"
+        with open(temp_file, 'w') as f:
             json.dump(self.config, f, indent=4)
+        os.replace(temp_file, self.config_file)
+        self.reload_schedule()
+
+    def add_meeting(self, meeting, save=True):
+        """Append a meeting to the schedule and save the config.
+
+        With save False the schedule is updated but the config is not written,
+        so an editor can save a batch of changes once with save_config().
+        The same goes for update_meeting() and remove_meetings().
+        """
+        with self.config_lock:
+            # A new list, so the scheduler thread never sees one being changed
+            self.config["meetings"] = self.config.get("meetings", []) + [meeting]
+            self._meetings_changed(save)
+
+    def update_meeting(self, index, changes, save=True):
+        """Change settings of the meeting at index and save the config"""
+        with self.config_lock:
+            meetings = list(self.config.get("meetings", []))
+            meetings[index] = {**meetings[index], **changes}
+            self.config["meetings"] = meetings
+            self._meetings_changed(save)
+
+    def remove_meetings(self, indices, save=True):
+        """Remove the meetings at the given indices and save the config"""
+        indices = set(indices)
+        with self.config_lock:
+            self.config["meetings"] = [meeting for index, meeting in enumerate(self.config.get("meetings", []))
+                                       if index not in indices]
+            self._meetings_changed(save)
+
+    def _meetings_changed(self, save):
+        if save:
+            self.save_config()
+        else:
+            self.reload_schedule()
+
+    def add_listener(self, callback):
+        """Have callback(event, data) called on every state change.
+
+        Events are "scheduler" ({"running": bool}), "waiting" (the next
+        meeting as from get_next_meeting_info, or None), "joining",
+        "recording", "finalizing" and "finished" ({"meeting": name,
+        "output_file": ...}, with "error" set if the recording failed), "metrics" (the metrics.json snapshot) and
+        "postprocessed" ({"output_path": ..., "succeeded": bool}). Callbacks run
+        on the recorder's threads, so they must be quick and thread-safe, such
+        as emitting a Qt signal.
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, event, data=None):
+        for callback in list(self.listeners):
+            try:
+                callback(event, data)
+            except Exception as e:
+                logger.error(f"Error in {event} listener: {str(e)}")
     
     def join_meeting(self, join_url):
-        """Join a Zoom meeting using the join URL"""
+        """Join a Zoom meeting using the join URL.
+
+        Returns the wall-clock time at which the meeting was joined, as soon as
+        the computer audio button has been clicked, or when join_timeout runs
+        out without it appearing (Zoom may be set to join audio automatically).
+        """
         logger.info(f"Joining meeting: {join_url}")
+        launched_at = time.monotonic()
+        if not self.config.get("launch_zoom", True):
+            # Test rigs record synthetic sources without a Zoom client
+            return datetime.datetime.now()
         
         # Open Zoom meeting link using the default browser
         if os.name == 'nt':  # Windows
             os.system(f'start {join_url}')
         elif os.name == 'posix':  # Mac/Linux
             os.system(f'open "{join_url}"')
-            
-        # Wait for Zoom to launch
-        time.sleep(10)
-        
-        # Look for and click the "Join with Computer Audio" button
+
+        # Click "Join with Computer Audio" as soon as the meeting window shows it
         try:
-            join_audio_btn = pyautogui.locateOnScreen('join_audio_button.png', confidence=0.8)
-            if join_audio_btn:
-                pyautogui.click(join_audio_btn)
-                logger.info("Clicked 'Join with Computer Audio'")
-            else:
+            monitor = screeninfo.get_monitors()[0]
+            detector = JoinButtonDetector(self.config.get("join_button_template", "join_audio_button.png"),
+                                          threshold=self.config.get("join_match_threshold", 0.8),
+                                          search_scale=self.config.get("join_search_scale", 0.5),
+                                          capture_backend=self.config.get("capture_backend", "pyautogui"))
+            clicked_at = detector.wait_and_click((monitor.x, monitor.y, monitor.width, monitor.height),
+                                                 timeout=self.config.get("join_timeout", 15),
+                                                 poll_interval=self.config.get("join_poll_interval", 0.25),
+                                                 stop_event=self.tasks_cancelled)
+            if clicked_at is None:
                 logger.warning("Could not find 'Join with Computer Audio' button")
+            else:
+                logger.info(f"Joined meeting audio {clicked_at - launched_at:.1f} s after launching Zoom")
         except Exception as e:
             logger.error(f"Error when joining audio: {str(e)}")
-            
-        # Wait for meeting to fully connect
-        time.sleep(5)
-        
+
         logger.info("Successfully joined the meeting")
-        return True
+        return datetime.datetime.now()
     
-    def start_recording(self, meeting_info):
-        """Start screen and audio recording of the meeting"""
-        if self.recording_active:
-            logger.warning("Recording already in progress")
-            return False
-            
-        meeting_name = meeting_info["name"]
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(self.recordings_path, f"{meeting_name}_{timestamp}")
-        
-        logger.info(f"Starting recording to {output_file}")
-        self.recording_active = True
-        self.current_meeting = meeting_info.copy()
-        self.current_meeting['output_file'] = output_file
-        
+    @property
+    def recording_active(self):
+        """True while at least one session is recording"""
+        return bool(self.get_active_sessions())
+
+    @property
+    def current_meeting(self):
+        """Meeting info of the most recently started active session"""
+        sessions = self.get_active_sessions()
+        return sessions[-1].meeting_info if sessions else None
+
+    def get_active_sessions(self):
+        """Return the sessions that are currently recording"""
+        with self.sessions_lock:
+            return [session for session in self.sessions if session.is_active()]
+
+    def _output_file(self, meeting_info, when=None):
+        """Output path (without extension) for a recording of the meeting starting at when"""
+        timestamp = (when or datetime.datetime.now()).strftime("%Y%m%d_%H%M%S")
+        name = f"{meeting_info['name']}_{timestamp}"
+        # A worker taking over a job must not overwrite what the previous attempt recorded
+        if meeting_info.get("attempt", 1) > 1:
+            name += f"_attempt{meeting_info['attempt']}"
+        return os.path.join(self.recordings_path, name)
+
+    def prepare_recording(self, meeting_info, scheduled_at=None):
+        """Open the capture backend, audio device, encoder and output files ahead of a meeting.
+
+        Returns a session that start_recording can start within milliseconds.
+        Raises if anything cannot be opened, so problems show up before the
+        meeting begins.
+        """
+        session = RecordingSession(meeting_info, self._output_file(meeting_info, scheduled_at))
+        session.lock_files()
+        session.pipeline = self._create_pipeline(session)
+        try:
+            session.pipeline.prepare()
+        except Exception:
+            session.pipeline.abort()
+            session.unlock_files()
+            raise
+        logger.info(f"Recording of '{session.name}' prepared to {session.output_file}")
+        return session
+
+    def start_recording(self, meeting_info, session=None):
+        """Start screen and audio recording of the meeting, returning its session.
+
+        A session from prepare_recording is started with its devices already open.
+        """
+        with self.sessions_lock:
+            if any(s.is_active() and s.name == meeting_info["name"] for s in self.sessions):
+                logger.warning(f"Recording of '{meeting_info['name']}' already in progress")
+                if session is not None:
+                    session.pipeline.abort()
+                    session.unlock_files()
+                return None
+
+            if session is None:
+                session = RecordingSession(meeting_info, self._output_file(meeting_info))
+                session.lock_files()
+            else:
+                session.meeting_info.update(meeting_info)
+            self.sessions.append(session)
+
+        logger.info(f"Starting recording to {session.output_file}")
+
         # Start recording in a separate thread
-        recording_thread = threading.Thread(
+        session.thread = threading.Thread(
             target=self._record_screen_and_audio,
-            args=(output_file,)
+            args=(session,)
         )
-        recording_thread.daemon = True
-        recording_thread.start()
-        
-        return True
+        session.thread.daemon = True
+        session.thread.start()
+
+        return session
     
-    def _record_screen_and_audio(self, output_file):
+    def recording_profiles(self):
+        """Recording profiles by name: the built-in ones merged with those in the config"""
+        profiles = {name: dict(settings) for name, settings in RECORDING_PROFILES.items()}
+        for name, settings in self.config.get("recording_profiles", {}).items():
+            profiles[name] = {**profiles.get(name, {}), **settings}
+        return profiles
+
+    def _recording_profile(self, meeting_info):
+        """Settings of the meeting's recording profile, given by name or inline"""
+        profile = meeting_info.get("profile", self.config.get("default_profile", "full"))
+        if isinstance(profile, dict):
+            return profile
+        profiles = self.recording_profiles()
+        if profile not in profiles:
+            logger.warning(f"Unknown recording profile '{profile}', using the global settings")
+        return profiles.get(profile, {})
+
+    def _meeting_setting(self, meeting_info, key, default=None):
+        """Look up a recording setting on the meeting, then its recording profile, then the global config"""
+        if key in meeting_info:
+            return meeting_info[key]
+        profile = self._recording_profile(meeting_info)
+        if key in profile:
+            return profile[key]
+        return self.config.get(key, default)
+
+    def _create_pipeline(self, session):
+        """Build the recording pipeline for a session from the meeting and global settings"""
+        meeting_info = session.meeting_info
+        # Encode in a single pass when FFmpeg can read both pipes
+        direct_encode = (self.has_ffmpeg and os.name == 'posix'
+                         and self._meeting_setting(meeting_info, "direct_encode", True))
+        encode_profile = self._encode_profile(meeting_info)
+        # Rolling segments need FFmpeg for the final concat
+        segment_minutes = self._meeting_setting(meeting_info, "segment_minutes", 0)
+        segment_seconds = segment_minutes * 60 if self.has_ffmpeg and segment_minutes else None
+        return create_recording_pipeline(
+            session.output_file, fps=self._meeting_setting(meeting_info, "fps", 15),
+            direct_encode=direct_encode,
+            capture_video=not self._meeting_setting(meeting_info, "audio_only", False),
+            capture_backend=self._meeting_setting(meeting_info, "capture_backend", "pyautogui"),
+            capture_options=self._meeting_setting(meeting_info, "capture_options"),
+            skip_duplicate_frames=self._meeting_setting(meeting_info, "skip_duplicate_frames", False),
+            change_threshold=self._meeting_setting(meeting_info, "change_threshold", 8),
+            max_frame_gap=self._meeting_setting(meeting_info, "max_frame_gap", 1.0),
+            capture_region=self._meeting_setting(meeting_info, "capture_region"),
+            output_size=self._meeting_setting(meeting_info, "output_size"),
+            window_title=self.config.get("zoom_window_title", "Zoom Meeting"),
+            encode_profile=encode_profile,
+            segment_seconds=segment_seconds,
+            av_sync=self._meeting_setting(meeting_info, "av_sync", True),
+            sync_tolerance=self._meeting_setting(meeting_info, "sync_tolerance", 0.02),
+            audio_source=self._meeting_setting(meeting_info, "audio_source", "pyaudio"),
+            audio_rate=self._meeting_setting(meeting_info, "audio_rate", 44100),
+            audio_channels=self._meeting_setting(meeting_info, "audio_channels", 2),
+            audio_chunk=self._meeting_setting(meeting_info, "audio_chunk", 1024),
+            audio_buffer_seconds=self._meeting_setting(meeting_info, "audio_buffer_seconds", 2.0),
+            adaptive_quality=self._meeting_setting(meeting_info, "adaptive_quality"),
+            end_detection=self._meeting_setting(meeting_info, "end_detection"),
+            monitor_layout=self._meeting_setting(meeting_info, "monitor_layout", "active"),
+            capture_processes=self._meeting_setting(meeting_info, "capture_processes", 0),
+            frame_slots=self._meeting_setting(meeting_info, "frame_slots", 4),
+            thumbnails=(self._meeting_setting(meeting_info, "thumbnails", False)
+                        if self.config.get("catalog", True) else None),
+            on_segment_done=lambda video, audio, output_path:
+                self.get_postprocess_queue().enqueue(video, audio, output_path, encode_profile,
+                                                     tracks=session.pipeline.video_tracks))
+
+    def _record_screen_and_audio(self, session):
         """Record screen and audio directly to MP4 if FFmpeg is available, otherwise save separate files"""
+        output_file = session.output_file
+        meeting_info = session.meeting_info
         try:
-            # Get screen size
-            monitor = get_monitors()[0]
-            width, height = monitor.width, monitor.height
-            
-            # Configure audio capture
-            audio_format = pyaudio.paInt16
-            channels = 2
-            rate = 44100
-            chunk = 1024
-            
-            audio = pyaudio.PyAudio()
-            audio_stream = audio.open(format=audio_format, channels=channels,
-                                    rate=rate, input=True,
-                                    frames_per_buffer=chunk)
-            
-            audio_frames = []
-            video_frames = []
-            
-            # Set up video writer
-            fourcc = cv2.VideoWriter_fourcc(*"XVID")
-            fps = 15
-            temp_video_file = f"{output_file}_temp.avi"
-            video_writer = cv2.VideoWriter(temp_video_file, fourcc, fps, (width, height))
-            
+            encode_profile = self._encode_profile(meeting_info)
+            if session.pipeline is None:
+                session.pipeline = self._create_pipeline(session)
+            pipeline = session.pipeline
+            start_latency = time.monotonic()
+            pipeline.start()
+            logger.info(f"Capture started {(time.monotonic() - start_latency) * 1000:.0f} ms after the start request")
+
             logger.info("Recording started")
             start_time = time.time()
-            
-            # Record until stopped
-            while self.recording_active:
-                # Record screen
-                screenshot = pyautogui.screenshot()
-                frame = np.array(screenshot)
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                video_writer.write(frame)
-                
-                # Record audio
-                audio_data = audio_stream.read(chunk)
-                audio_frames.append(audio_data)
-                
-            # Cleanup when recording is stopped
-            video_writer.release()
-            
-            # Save audio to WAV file
-            temp_audio_file = f"{output_file}_temp.wav"
-            wave_file = wave.open(temp_audio_file, 'wb')
-            wave_file.setnchannels(channels)
-            wave_file.setsampwidth(audio.get_sample_size(audio_format))
-            wave_file.setframerate(rate)
-            wave_file.writeframes(b''.join(audio_frames))
-            wave_file.close()
-            
-            # Clean up audio resources
-            audio_stream.stop_stream()
-            audio_stream.close()
-            audio.terminate()
-            
-            # Combine audio and video using FFmpeg if available
-            if self.has_ffmpeg:
-                mp4_file = f"{output_file}.mp4"
-                cmd = [
-                    "ffmpeg", "-y",
-                    "-i", temp_video_file,
-                    "-i", temp_audio_file,
-                    "-c:v", "libx264",
-                    "-c:a", "aac",
-                    "-strict", "experimental",
-                    mp4_file
-                ]
-                logger.info(f"Combining audio and video with FFmpeg: {' '.join(cmd)}")
-                result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                
-                if result.returncode == 0:
-                    logger.info(f"Successfully created MP4 file: {mp4_file}")
-                    # Remove temp files
-                    os.remove(temp_video_file)
-                    os.remove(temp_audio_file)
+            self._notify("recording", {"meeting": session.name, "output_file": output_file})
+
+            # Record until stopped or the meeting ends, publishing live metrics meanwhile
+            metrics_interval = self.config.get("metrics_interval", 5)
+            trim_at = None
+            while not session.stop_event.wait(metrics_interval):
+                self.write_metrics()
+                ended = pipeline.meeting_ended()
+                if ended:
+                    trim_at, reason = ended
+                    logger.info(f"Meeting '{session.name}' appears to have ended {trim_at:.0f} s into "
+                                f"the recording ({reason}), stopping")
+                    session.meeting_end = {"at": round(trim_at, 1), "reason": reason}
+                    break
+
+            self._notify("finalizing", {"meeting": session.name, "output_file": output_file})
+            pipeline.stop()
+            session.error = pipeline.error
+
+            output = pipeline.output
+            if output.segment_seconds:
+                # Join the segments by stream copy once the last ones are encoded
+                if not output.encode_succeeded and output.direct:
+                    logger.error(f"Direct encoding of {output_file} segments failed, keeping finished segments")
+                if output.segment_files:
+                    self.get_postprocess_queue().enqueue_concat(output.segment_files, f"{output_file}.mp4",
+                                                          output.join_reencode, trim_at)
+            elif output.direct:
+                if output.join_files:
+                    # Quality changes split the recording into parts
+                    if not output.encode_succeeded:
+                        logger.error(f"Direct encoding of part of {output_file} failed, joining the finished parts")
+                    self.get_postprocess_queue().enqueue_concat(output.join_files, f"{output_file}.mp4",
+                                                          output.join_reencode, trim_at)
+                elif output.encode_succeeded:
+                    logger.info(f"Successfully created MP4 file: {output_file}.mp4")
+                    if trim_at is not None:
+                        # Cut off the silent, static tail by stream copy
+                        untrimmed = f"{output_file}_untrimmed.mp4"
+                        os.replace(f"{output_file}.mp4", untrimmed)
+                        self.get_postprocess_queue().enqueue_trim(untrimmed, f"{output_file}.mp4", trim_at)
                 else:
-                    logger.error(f"Error combining files with FFmpeg: {result.stderr.decode()}")
-                    logger.info(f"Keeping separate audio and video files.")
+                    logger.error(f"Direct encoding of {output_file}.mp4 failed")
             else:
-                # If FFmpeg not available, rename the temp files to final names
-                final_video = f"{output_file}.avi"
-                final_audio = f"{output_file}.wav"
-                os.rename(temp_video_file, final_video)
-                os.rename(temp_audio_file, final_audio)
-                logger.info(f"Video saved to {final_video}")
-                logger.info(f"Audio saved to {final_audio}")
-            
+                self._combine_audio_video(output.temp_video_file, output.temp_audio_file,
+                                          f"{output_file}.mp4", encode_profile, trim_at, pipeline.video_tracks)
+
             # Calculate duration
             duration = time.time() - start_time
             logger.info(f"Recording finished. Duration: {duration:.2f} seconds")
-            
+            stats = self._write_recording_stats(session, start_time, duration)
+            self._catalog_recording(session, start_time, duration, stats)
+
         except Exception as e:
             logger.error(f"Error during recording: {str(e)}")
-    
-    def stop_recording(self):
-        """Stop the current recording"""
-        if not self.recording_active:
+            session.error = session.error or str(e)
+        finally:
+            session.stop()
+            session.unlock_files()
+            session.finished.set()
+            with self.sessions_lock:
+                self.sessions.remove(session)
+            self.write_metrics()
+            self._notify("finished", {"meeting": session.name, "output_file": output_file,
+                                      "error": session.error})
+
+    def get_metrics(self):
+        """Live pipeline metrics of every active session, keyed by output file"""
+        metrics = {}
+        for session in self.get_active_sessions():
+            session_metrics = session.metrics()
+            if session_metrics is not None:
+                metrics[session.output_file] = {"meeting": session.name, **session_metrics}
+        return metrics
+
+    def write_metrics(self):
+        """Write the live metrics of all recordings to metrics.json in the recordings directory"""
+        snapshot = {
+            "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+            "recordings": self.get_metrics(),
+            "postprocess_pending": self.postprocess_queue.pending() if self.postprocess_queue else 0,
+        }
+        try:
+            with self.metrics_lock:
+                temp_file = f"{self.metrics_file}.{os.getpid()}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(snapshot, f, indent=4)
+                os.replace(temp_file, self.metrics_file)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file: {str(e)}")
+        self._notify("metrics", snapshot)
+
+    def _write_recording_stats(self, session, start_time, duration):
+        """Write a stats sidecar summarizing how the recording performed"""
+        stats = {
+            "meeting": session.name,
+            "scheduled_at": session.meeting_info.get("scheduled_at"),
+            "joined_at": session.meeting_info.get("joined_at"),
+            "meeting_end": session.meeting_end,
+            "started": datetime.datetime.fromtimestamp(start_time).isoformat(timespec="seconds"),
+            "duration": round(duration, 2),
+            **session.pipeline.metrics(),
+        }
+        stats_file = f"{session.output_file}.stats.json"
+        try:
+            with open(stats_file, 'w') as f:
+                json.dump(stats, f, indent=4)
+        except OSError as e:
+            logger.warning(f"Could not write {stats_file}: {str(e)}")
+        return stats
+
+    def get_catalog(self):
+        """The recording catalog, or None when the config turns it off"""
+        with self.catalog_lock:
+            if self.catalog is None and self.config.get("catalog", True):
+                path = self.config.get("catalog_path") or os.path.join(self.recordings_path, "catalog.db")
+                self.catalog = RecordingCatalog(path)
+            return self.catalog
+
+    def _media_path(self, session):
+        """The file a finished recording ends up in"""
+        if self.has_ffmpeg:
+            return f"{session.output_file}.mp4"
+        return f"{session.output_file}.avi" if session.pipeline.capture_video else f"{session.output_file}.wav"
+
+    def _catalog_recording(self, session, start_time, duration, stats):
+        """Add a finished recording with its thumbnail strip and keyframes to the catalog"""
+        pipeline = session.pipeline
+        # A meeting that ended early is trimmed to its real length
+        length = session.meeting_end["at"] if session.meeting_end else duration
+        media_path = self._media_path(session)
+        indexer = pipeline.indexer
+        strip = [(t, image) for t, image in indexer.strip if t <= length] if indexer else []
+        keyframes = [(t, image) for t, image in indexer.keyframes if t <= length] if indexer else []
+        try:
+            catalog = self.get_catalog()
+            if catalog is None:
+                return
+            # Held against _media_done, so a job finishing meanwhile cannot leave the entry "processing"
+            with self.catalog_lock:
+                if self.postprocess_queue is not None and self.postprocess_queue.is_pending(media_path):
+                    status = "processing"
+                elif (os.path.exists(media_path) and not (output.direct and not output.encode_succeeded
+                                                          and not output.join_files and not output.segment_files)):
+                    status = "ready"
+                else:
+                    status = "failed"
+                recording_id = catalog.add({
+                    "meeting": session.name,
+                    "path": media_path,
+                    "scheduled_at": session.meeting_info.get("scheduled_at"),
+                    "joined_at": session.meeting_info.get("joined_at"),
+                    "started": datetime.datetime.fromtimestamp(start_time).isoformat(timespec="seconds"),
+                    "ended": datetime.datetime.fromtimestamp(start_time + length).isoformat(timespec="seconds"),
+                    "duration": round(length, 2),
+                    "size_bytes": os.path.getsize(media_path) if status == "ready" else None,
+                    "status": status,
+                    "stats": stats,
+                }, strip, keyframes)
+            logger.info(f"Catalogued recording {recording_id} of '{session.name}' ({status}, "
+                        f"{len(strip)} thumbnails, {len(keyframes)} keyframes)")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Could not catalog {media_path}: {str(e)}")
+
+    def _media_done(self, output_path, succeeded):
+        """Post-processing callback: update the catalog entry of a finished MP4"""
+        if not output_path.endswith(".mp4"):
+            return
+        self._notify("postprocessed", {"output_path": output_path, "succeeded": succeeded})
+        try:
+            catalog = self.get_catalog()
+            if catalog is None:
+                return
+            with self.catalog_lock:
+                catalog.media_done(output_path, succeeded)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update the catalog entry of {output_path}: {str(e)}")
+
+    def _encode_profile(self, meeting_info):
+        """Resolve the meeting's encode profile, given by name or inline"""
+        profile = self._meeting_setting(meeting_info, "encode_profile", "default")
+        if isinstance(profile, dict):
+            return profile
+        profiles = self.config.get("encode_profiles", {})
+        if profile not in profiles and profile != "default":
+            logger.warning(f"Unknown encode profile '{profile}', using defaults")
+        return profiles.get(profile)
+
+    def _combine_audio_video(self, temp_video_file, temp_audio_file, output_path, encode_profile=None,
+                             duration=None, tracks=None):
+        """Queue the temporary audio and video files for combining, or keep them separately without FFmpeg"""
+        if self.has_ffmpeg:
+            self.get_postprocess_queue().enqueue(temp_video_file, temp_audio_file, output_path, encode_profile,
+                                                 duration, tracks)
+        else:
+            # If FFmpeg not available, rename the temp files to final names
+            output_file = os.path.splitext(output_path)[0]
+            if temp_video_file:
+                final_video = f"{output_file}.avi"
+                os.rename(temp_video_file, final_video)
+                logger.info(f"Video saved to {final_video}")
+            final_audio = f"{output_file}.wav"
+            os.rename(temp_audio_file, final_audio)
+            logger.info(f"Audio saved to {final_audio}")
+
+    def stop_recording(self, session=None):
+        """Stop the given recording session, or every active session"""
+        sessions = [session] if session else self.get_active_sessions()
+        if not sessions:
             logger.warning("No active recording to stop")
             return False
-            
-        self.recording_active = False
-        logger.info("Stopping recording...")
-        
+
+        for s in sessions:
+            if s.is_active():
+                logger.info(f"Stopping recording of '{s.name}'...")
+                s.stop()
+
         # Wait for resources to be released
-        time.sleep(5)
-        
-        self.current_meeting = None
+        for s in sessions:
+            s.finished.wait(timeout=5)
         return True
     
     def leave_meeting(self):
         """Leave the current Zoom meeting by closing the Zoom process"""
+        if not self.config.get("launch_zoom", True):
+            return True
         logger.info("Leaving meeting by closing Zoom")
         
         try:
@@ -514,145 +4376,455 @@ class ZoomMeetingRecorder:
             logger.error(f"Error when terminating Zoom: {str(e)}")
             return False
     
-    def execute_scheduled_task(self, meeting_info):
-        """Execute the full meeting join, record, and leave workflow"""
+    def _acquire_meeting_slot(self, meeting_info):
+        """Apply the overlap policy and register the task; returns False if the meeting is skipped"""
+        if self.overlap_policy == "preempt":
+            # Register first so the preempted task does not close Zoom after we join
+            with self.tasks_lock:
+                self.running_tasks += 1
+            active = self.get_active_sessions()
+            if active:
+                logger.info(f"Preempting {', '.join(s.name for s in active)} for '{meeting_info['name']}'")
+                self.stop_recording()
+                self.leave_meeting()
+            return True
+
+        if self.overlap_policy != "concurrent":
+            # Queue behind the running meeting, but give up once this meeting would have ended
+            deadline = time.monotonic() + float(meeting_info["duration_minutes"]) * 60
+            if not self.meeting_slot.acquire(blocking=False):
+                logger.info(f"Meeting '{meeting_info['name']}' queued behind the current recording")
+                while not self.meeting_slot.acquire(timeout=1):
+                    if self.tasks_cancelled.is_set() or time.monotonic() >= deadline:
+                        logger.warning(f"Skipping meeting '{meeting_info['name']}': previous meeting still running")
+                        return False
+
+        with self.tasks_lock:
+            self.running_tasks += 1
+        return True
+
+    def _release_meeting_slot(self):
+        """Unregister the task and leave the meeting unless another task is still running in it.
+
+        The meeting is left before the slot is freed, and with tasks_lock held, so a
+        meeting waiting to start never joins a Zoom client that is about to be closed.
+        Returns True if this was the last task.
+        """
+        with self.tasks_lock:
+            self.running_tasks -= 1
+            last_task = self.running_tasks == 0
+            if last_task:
+                self.leave_meeting()
+        if self.overlap_policy not in ("concurrent", "preempt"):
+            self.meeting_slot.release()
+        return last_task
+
+    def dispatch_scheduled_task(self, meeting_info, scheduled_at=None):
+        """Hand a meeting to the worker pool without blocking the scheduler"""
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.config.get("max_workers", 4), thread_name_prefix="meeting")
+        logger.info(f"Dispatching scheduled task for meeting {meeting_info['name']}")
+        return self.executor.submit(self.execute_scheduled_task, meeting_info, scheduled_at)
+
+    def execute_scheduled_task(self, meeting_info, scheduled_at=None):
+        """Execute the full meeting join, record, and leave workflow.
+
+        When the task is dispatched ahead of scheduled_at, the recording is
+        prepared first and the meeting is joined at the scheduled time.
+        """
         logger.info(f"Executing scheduled task for meeting {meeting_info['name']}")
-        
+
+        if not self._acquire_meeting_slot(meeting_info):
+            return False
+
+        session = None
+        prepared = None
         try:
+            if scheduled_at is not None:
+                try:
+                    prepared = self.prepare_recording(meeting_info, scheduled_at)
+                except Exception as e:
+                    # Report now; start_recording tries again once the meeting has been joined
+                    logger.error(f"Could not prepare recording of '{meeting_info['name']}' "
+                                 f"before the meeting: {str(e)}")
+
+                delay = (scheduled_at - datetime.datetime.now()).total_seconds()
+                if delay > 0 and self.tasks_cancelled.wait(delay):
+                    logger.info(f"Meeting '{meeting_info['name']}' cancelled before it started")
+                    return False
+
             # Join the meeting
-            success = self.join_meeting(meeting_info["join_url"])
-            if not success:
+            self._notify("joining", {"meeting": meeting_info["name"]})
+            joined_at = self.join_meeting(meeting_info["join_url"])
+            if not joined_at:
                 logger.error("Failed to join meeting")
                 return False
-                
-            # Start recording
-            self.start_recording(meeting_info)
-            
+
+            # Start recording the moment the meeting is ready
+            recording_info = {**meeting_info, "joined_at": joined_at.isoformat(timespec="seconds")}
+            if scheduled_at is not None:
+                recording_info["scheduled_at"] = scheduled_at.isoformat(timespec="minutes")
+            session = self.start_recording(recording_info, prepared)
+            prepared = None
+            if not session:
+                return False
+
             # Record for the duration of the meeting
-            meeting_duration = int(meeting_info["duration_minutes"])
-            logger.info(f"Recording for {meeting_duration} minutes")
-            
-            # Wait for the meeting duration
-            time.sleep(meeting_duration * 60)
-            
+            meeting_duration = float(meeting_info["duration_minutes"])
+            logger.info(f"Recording for {meeting_duration:g} minutes")
+
+            # Wait for the meeting duration, or until the session is stopped early
+            if session.stop_event.wait(meeting_duration * 60):
+                if session.meeting_end:
+                    logger.info(f"Meeting '{meeting_info['name']}' ended early, leaving")
+                else:
+                    logger.info(f"Recording of '{meeting_info['name']}' was stopped early")
+
             # Stop recording and leave meeting
-            self.stop_recording()
-            self.leave_meeting()
-            
+            self.stop_recording(session)
+
             logger.info(f"Completed scheduled task for meeting {meeting_info['name']}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error executing scheduled task: {str(e)}")
             # Try to clean up
             try:
-                self.stop_recording()
-                self.leave_meeting()
+                if session:
+                    self.stop_recording(session)
             except:
                 pass
             return False
-    
+        finally:
+            if prepared is not None:
+                prepared.pipeline.abort()
+                prepared.unlock_files()
+            self._release_meeting_slot()
+
+    def _get_timeline(self):
+        """Return the meeting timeline, building it from the config if needed"""
+        with self.timeline_lock:
+            if self.timeline is None:
+                self.timeline = MeetingTimeline(self.config.get("meetings", []))
+            return self.timeline
+
+    def reload_schedule(self):
+        """Rebuild the timeline from the config and wake the scheduler"""
+        with self.timeline_lock:
+            self.timeline = None
+        self.scheduler_wakeup.set()
+
     def get_next_meeting_info(self):
         """Get information about the next scheduled meeting"""
-        meetings = self.config.get("meetings", [])
-        if not meetings:
-            return None
-        
+        timeline = self._get_timeline()
         now = datetime.datetime.now()
-        current_day = now.strftime("%A")
-        current_time_str = now.strftime("%H:%M")
-        
-        next_meeting = None
-        soonest_time_diff = float('inf')
-        
-        for meeting in meetings:
-            if current_day in meeting["days"]:
-                meeting_time = datetime.datetime.strptime(meeting["schedule"], "%H:%M").time()
-                meeting_datetime = datetime.datetime.combine(now.date(), meeting_time)
-                
-                # If meeting is today but already passed, skip it
-                if meeting_datetime < now:
-                    continue
-                
-                time_diff = (meeting_datetime - now).total_seconds()
-                if time_diff < soonest_time_diff:
-                    soonest_time_diff = time_diff
-                    next_meeting = meeting.copy()
-                    next_meeting["time"] = meeting["schedule"]
-        
-        # Check tomorrow if no meetings found today
-        if not next_meeting:
-            tomorrow = now + datetime.timedelta(days=1)
-            tomorrow_day = tomorrow.strftime("%A")
-            
-            for meeting in meetings:
-                if tomorrow_day in meeting["days"]:
-                    meeting_time = meeting["schedule"]
-                    next_meeting = meeting.copy()
-                    next_meeting["time"] = f"Tomorrow at {meeting_time}"
-                    break
-        
+
+        # Roll stale occurrences forward while nobody else is consuming them
+        if not self.scheduler_running:
+            timeline.pop_due(now)
+
+        entry = timeline.peek()
+        if entry is None:
+            return None
+
+        when, meeting = entry
+        next_meeting = meeting.copy()
+        next_meeting["datetime"] = when
+        days_ahead = (when.date() - now.date()).days
+        if days_ahead <= 0:
+            next_meeting["time"] = meeting["schedule"]
+        elif days_ahead == 1:
+            next_meeting["time"] = f"Tomorrow at {meeting['schedule']}"
+        else:
+            next_meeting["time"] = f"{when.strftime('%A')} at {meeting['schedule']}"
         return next_meeting
-    
+
     def run_scheduler(self):
         """Run the scheduler to execute meetings"""
         self.scheduler_running = True
+        self.tasks_cancelled.clear()
         logger.info("Starting scheduler")
-        
-        # Clear any existing jobs
-        schedule.clear()
-        
-        # Schedule all meetings
-        for meeting in self.config.get("meetings", []):
-            schedule_time = meeting["schedule"]
-            days = meeting["days"]
-            
-            # Create a job for each day
-            for day in days:
-                job = schedule.every()
-                
-                if day == "Monday":
-                    job = job.monday
-                elif day == "Tuesday":
-                    job = job.tuesday
-                elif day == "Wednesday":
-                    job = job.wednesday
-                elif day == "Thursday":
-                    job = job.thursday
-                elif day == "Friday":
-                    job = job.friday
-                elif day == "Saturday":
-                    job = job.saturday
-                elif day == "Sunday":
-                    job = job.sunday
-                
-                job.at(schedule_time).do(self.execute_scheduled_task, meeting)
-                logger.info(f"Scheduled meeting '{meeting['name']}' for {day} at {schedule_time}")
-        
-        # Run pending jobs in a loop
+        self._notify("scheduler", {"running": True})
+
+        if not self.coordinating:
+            self.get_postprocess_queue()
+        self.reload_schedule()
+        timeline = self._get_timeline()
+        for when, meeting in timeline.occurrences():
+            logger.info(f"Scheduled meeting '{meeting['name']}' for {when.strftime('%A')} at {meeting['schedule']}")
+
+        # Sleep until the next occurrence, a config reload or a stop request
         while self.scheduler_running:
-            schedule.run_pending()
-            time.sleep(1)
-        
+            self.scheduler_wakeup.clear()
+            timeline = self._get_timeline()
+            now = datetime.datetime.now()
+
+            # Meetings are dispatched pre_roll seconds early so their recording can be prepared
+            pre_roll = datetime.timedelta(seconds=self.config.get("pre_roll_seconds", 60))
+            # Occurrences that have started are never rebuilt into the timeline
+            self.dispatched = {key for key in self.dispatched if key[1] >= now}
+            for when, meeting in timeline.pop_due(now + pre_roll):
+                late = (now - when).total_seconds()
+                if late > int(meeting["duration_minutes"]) * 60:
+                    logger.warning(f"Skipping meeting '{meeting['name']}' at {when}: already over")
+                    continue
+                if (meeting["name"], when) in self.dispatched:
+                    continue
+                self.dispatched.add((meeting["name"], when))
+                if self.coordinating:
+                    self.get_job_queue().add(meeting, when)
+                else:
+                    self.dispatch_scheduled_task(meeting, when)
+            if self.coordinating:
+                self.get_job_queue().expire()
+
+            entry = timeline.peek()
+            timeout = self.MAX_SCHEDULER_SLEEP
+            if entry is not None:
+                timeout = min(timeout, max(0, (entry[0] - pre_roll - datetime.datetime.now()).total_seconds()))
+            self._notify("waiting", self.get_next_meeting_info())
+            self.scheduler_wakeup.wait(timeout)
+
         logger.info("Scheduler stopped")
-    
+
+    def get_job_queue(self):
+        """The shared meeting job queue used in coordinator and worker modes"""
+        if self.job_queue is None:
+            path = self.config.get("job_queue") or os.path.join(self.recordings_path, "meeting_jobs.db")
+            self.job_queue = MeetingJobQueue(path, lease_seconds=self.config.get("lease_seconds", 60),
+                                             max_attempts=self.config.get("max_job_attempts", 3))
+        return self.job_queue
+
+    def run_coordinator(self):
+        """Run the scheduler, queuing due meetings for the workers instead of recording them"""
+        logger.info(f"Coordinating meetings through {self.get_job_queue().path}")
+        self.coordinating = True
+        try:
+            self.run_scheduler()
+        finally:
+            self.coordinating = False
+
+    def run_worker(self):
+        """Claim and record meetings from the job queue until the scheduler is stopped.
+
+        Up to worker_capacity meetings are recorded at once, which needs the
+        concurrent overlap policy; with any other policy a second meeting would
+        wait for, or preempt, the first while holding its lease. The lease on
+        each is renewed while it runs; if it is lost, the recording stops
+        because another worker has taken the meeting over.
+        """
+        job_queue = self.get_job_queue()
+        capacity = self.config.get("worker_capacity", 1)
+        if capacity > 1 and self.overlap_policy != "concurrent":
+            logger.warning(f"worker_capacity {capacity} needs overlap_policy 'concurrent', "
+                           f"recording one meeting at a time")
+            capacity = 1
+        poll_interval = self.config.get("worker_poll_interval", 5)
+        pre_roll = self.config.get("pre_roll_seconds", 60)
+        # Workers may share the recordings directory
+        self.metrics_file = os.path.join(self.recordings_path, f"metrics.{self.worker_id}.json")
+        self.get_postprocess_queue()
+        self.scheduler_running = True
+        self.tasks_cancelled.clear()
+        logger.info(f"Worker {self.worker_id} started with capacity {capacity}")
+
+        while self.scheduler_running:
+            try:
+                job_queue.register_worker(self.worker_id, capacity, len(self.worker_jobs))
+                job = job_queue.claim(self.worker_id, pre_roll) if len(self.worker_jobs) < capacity else None
+            except sqlite3.Error as e:
+                logger.error(f"Job queue unavailable: {str(e)}")
+                job = None
+            if job is None:
+                self.scheduler_wakeup.wait(poll_interval)
+                self.scheduler_wakeup.clear()
+                continue
+
+            logger.info(f"Worker {self.worker_id} claimed job {job['id']} (attempt {job['attempts']})")
+            self.worker_jobs.add(job["id"])
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=capacity,
+                                                                      thread_name_prefix="meeting")
+            self.executor.submit(self._run_queued_job, job)
+
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def _run_queued_job(self, job):
+        """Record a claimed job while heartbeating its lease"""
+        job_queue = self.get_job_queue()
+        meeting_info = {**job["meeting"], "job_id": job["id"], "attempt": job["attempts"]}
+        remaining = job["end_ts"] - time.time()
+        if job["scheduled_at"] < datetime.datetime.now():
+            # Taken over, or claimed late: record what is left of the meeting
+            meeting_info["duration_minutes"] = round(remaining / 60, 2)
+
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(job_queue.lease_seconds / 3):
+                try:
+                    if job_queue.heartbeat(job["id"], self.worker_id):
+                        continue
+                except sqlite3.Error as e:
+                    logger.error(f"Could not renew lease on job {job['id']}: {str(e)}")
+                    continue
+                logger.warning(f"Lost lease on job {job['id']}, stopping its recording")
+                for session in self.get_active_sessions():
+                    if session.meeting_info.get("job_id") == job["id"]:
+                        self.stop_recording(session)
+                return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name="lease-heartbeat", daemon=True)
+        heartbeat_thread.start()
+        try:
+            succeeded = self.execute_scheduled_task(meeting_info, job["scheduled_at"])
+        finally:
+            done.set()
+            heartbeat_thread.join()
+            self.worker_jobs.discard(job["id"])
+            self.scheduler_wakeup.set()
+
+        try:
+            if self.tasks_cancelled.is_set():
+                # Shutting down: let another worker carry on with the meeting
+                job_queue.release(job["id"], self.worker_id)
+            else:
+                job_queue.finish(job["id"], self.worker_id, "done" if succeeded else "failed")
+        except sqlite3.Error as e:
+            logger.error(f"Could not update job {job['id']}: {str(e)}")
+
     def stop_scheduler(self):
         """Stop the scheduler"""
         self.scheduler_running = False
-        
+        self.tasks_cancelled.set()
+        self.scheduler_wakeup.set()
+
         # Stop any active recording
         if self.recording_active:
             self.stop_recording()
             self.leave_meeting()
-        
-        # Clear scheduled jobs
-        schedule.clear()
+
+        # Let running tasks finish their cleanup in the background
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
         logger.info("Scheduler and all jobs cleared")
+        self._notify("scheduler", {"running": False})
+
+
+def format_duration(seconds):
+    """H:MM:SS for a time or length in seconds"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def run_headless(recorder, run=None):
+    """Run the scheduler (or another loop such as run_worker) in the foreground until SIGINT or SIGTERM"""
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        recorder.stop_scheduler()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, handle_signal)
+
+    (run or recorder.run_scheduler)()
+
+    # Let recordings finish and running post-processing jobs complete; queued ones resume next start
+    for session in list(recorder.sessions):
+        session.finished.wait()
+    recorder.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schedule and record Zoom meetings")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the scheduler without the GUI (for unattended recorders)")
+    parser.add_argument("--config", default="config.json", help="configuration file (default config.json)")
+    parser.add_argument("--next", action="store_true", help="print the next scheduled meeting and exit")
+    parser.add_argument("--verbose", action="store_true", help="also log to the console")
+    parser.add_argument("--coordinator", action="store_true",
+                        help="queue scheduled meetings for recorder workers instead of recording them")
+    parser.add_argument("--worker", action="store_true", help="record meetings claimed from the job queue")
+    parser.add_argument("--queue", help="job queue database shared by the coordinator and workers")
+    parser.add_argument("--worker-id", help="name of this worker in the job queue (default host-pid)")
+    parser.add_argument("--jobs", action="store_true", help="print the job queue and workers and exit")
+    parser.add_argument("--recordings", nargs="?", const="", metavar="SEARCH",
+                        help="list catalogued recordings, or those whose meeting, file or date contains SEARCH")
+    parser.add_argument("--keyframes", type=int, metavar="ID",
+                        help="print the slide changes of a catalogued recording as seek times")
+    args = parser.parse_args(argv)
+
+    configure_logging(console=args.verbose)
+
+    recorder = ZoomMeetingRecorder(args.config)
+    if args.queue:
+        recorder.config["job_queue"] = args.queue
+    if args.worker_id:
+        recorder.worker_id = args.worker_id
+
+    # Read-only queries never start the post-processing queue, so only running modes have anything to stop
+    try:
+        return _run_command(args, recorder)
+    finally:
+        recorder.shutdown(wait=True)
+
+
+def _run_command(args, recorder):
+    """Carry out the command line's query or run mode"""
+    if args.jobs:
+        jobs, workers = recorder.get_job_queue().status()
+        for job in jobs:
+            print(f"{job['id']}: {job['state']}" + (f" by {job['worker']}" if job["worker"] else "") +
+                  f", {job['attempts']} attempts")
+        for worker in workers:
+            seen = datetime.datetime.fromtimestamp(worker["last_seen"]).isoformat(timespec="seconds")
+            print(f"worker {worker['id']}: {worker['active']}/{worker['capacity']} recording, last seen {seen}")
+        return 0
+
+    if args.recordings is not None or args.keyframes is not None:
+        catalog = recorder.get_catalog()
+        if catalog is None:
+            print("The recording catalog is turned off")
+            return 1
+        if args.keyframes is not None:
+            recording = catalog.get(args.keyframes)
+            if recording is None:
+                print(f"No recording {args.keyframes}")
+                return 1
+            print(f"{recording['path']} ({recording['meeting']}, {recording['started']})")
+            for seconds in catalog.keyframe_times(args.keyframes):
+                print(f"{format_duration(seconds)}  {seconds:.1f} s")
+            return 0
+        for recording in catalog.search(args.recordings):
+            size = f"{recording['size_bytes'] / 1e6:.1f} MB" if recording["size_bytes"] is not None else "-"
+            print(f"{recording['id']:>5}  {recording['started']}  {format_duration(recording['duration'])}  "
+                  f"{size:>10}  {recording['status']:<10}  {recording['meeting']}  {recording['path']}")
+        return 0
+
+    if args.coordinator:
+        run_headless(recorder, recorder.run_coordinator)
+        return 0
+    if args.worker:
+        run_headless(recorder, recorder.run_worker)
+        return 0
+
+    if args.next:
+        next_meeting = recorder.get_next_meeting_info()
+        print(f"{next_meeting['name']}: {next_meeting['time']}" if next_meeting else "No upcoming meetings")
+        return 0
+
+    if args.headless:
+        run_headless(recorder)
+        return 0
+
+    # The GUI pulls in Qt, so it is only imported when it is used
+    from zoom_recorder_gui import run_gui
+    return run_gui(recorder)
 
 
 if __name__ == '__main__':
-    # Create and show app
-    app = QApplication(sys.argv)
-    window = ZoomRecorderApp()
-    window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(main())
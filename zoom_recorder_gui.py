@@ -0,0 +1,521 @@
+import sys
+import shutil
+import threading
+import subprocess
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                            QLabel, QLineEdit, QTimeEdit, QSpinBox, QComboBox, QPushButton, 
+                            QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QMessageBox, QCheckBox,
+                            QDialog, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, QTime, QSize, QUrl, QObject, QTimer, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QPixmap, QIcon, QDesktopServices
+
+from zoom_recorder import ZoomMeetingRecorder, configure_logging, format_duration
+
+
+DAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def meeting_error(meeting, profiles, keys=None):
+    """Why a meeting's settings (or just those in keys) are invalid, or None if they are fine"""
+    def checked(key):
+        return keys is None or key in keys
+
+    if (checked("name") and not meeting["name"]) or (checked("join_url") and not meeting["join_url"]):
+        return "Meeting name and Zoom link are required."
+    if checked("join_url") and (not meeting["join_url"].startswith("https://") or "zoom.us" not in meeting["join_url"]):
+        return "Please enter a valid Zoom meeting link."
+    if checked("schedule") and not QTime.fromString(meeting["schedule"], "HH:mm").isValid():
+        return "Please enter the time as HH:MM."
+    if checked("duration_minutes") and not 5 <= meeting["duration_minutes"] <= 240:
+        return "The duration must be between 5 and 240 minutes."
+    if checked("days") and not meeting["days"]:
+        return "Please select at least one day."
+    if checked("days") and any(day not in DAYS for day in meeting["days"]):
+        return f"Days must be among {', '.join(DAYS)}."
+    if checked("profile") and isinstance(meeting.get("profile"), str) and meeting["profile"] not in profiles:
+        return f"Unknown recording profile '{meeting['profile']}'."
+    return None
+
+
+class RecorderSignals(QObject):
+    """Carries recorder events from its threads to the GUI thread as queued Qt signals"""
+    event = pyqtSignal(str, object)
+
+
+class MeetingsTableModel(QAbstractTableModel):
+    """Editable view of the recorder's meetings, with the live state of each.
+
+    Cells read the meetings in the recorder's config directly. Every edit,
+    addition or removal reschedules the meetings at once and is saved to the
+    config file SAVE_DELAY ms after the last of a burst of changes, or by
+    save(). Invalid edits are refused and reported through the invalid
+    signal, and a config that cannot be written through save_failed.
+    """
+
+    COLUMNS = ["Meeting Name", "Zoom Link", "Time", "Duration", "Days", "Profile", "Status"]
+    KEYS = ["name", "join_url", "schedule", "duration_minutes", "days", "profile"]
+    SAVE_DELAY = 500
+    invalid = pyqtSignal(str)
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, recorder, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        # Live state by meeting name: "Joining", "Recording", "Finalizing"
+        self.states = {}
+        self.unsaved = False
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DELAY)
+        self.save_timer.timeout.connect(self.save)
+
+    def meetings(self):
+        return self.recorder.config.get("meetings", [])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.meetings())
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() < len(self.KEYS):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        meeting = self.meetings()[index.row()]
+        if index.column() == len(self.KEYS):
+            return self.states.get(meeting["name"], "")
+        key = self.KEYS[index.column()]
+        if key == "days":
+            return ", ".join(meeting["days"])
+        if key == "duration_minutes":
+            return int(meeting["duration_minutes"]) if role == Qt.EditRole else str(meeting["duration_minutes"])
+        if key == "profile":
+            profile = meeting.get("profile", self.recorder.config.get("default_profile", "full"))
+            # An inline profile from the config is shown as "custom"
+            return profile if isinstance(profile, str) else "custom"
+        return meeting[key]
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or index.column() >= len(self.KEYS):
+            return False
+        meeting = self.meetings()[index.row()]
+        key = self.KEYS[index.column()]
+        if key == "days":
+            value = [day.strip().capitalize() for day in str(value).split(",") if day.strip()]
+        elif key == "duration_minutes":
+            try:
+                value = int(value)
+            except ValueError:
+                self.invalid.emit("The duration must be a number of minutes.")
+                return False
+        elif key == "profile" and value == "custom" and isinstance(meeting.get("profile"), dict):
+            return False
+        else:
+            value = str(value).strip()
+        if value == meeting.get(key):
+            return False
+
+        error = meeting_error({**meeting, key: value}, self.recorder.recording_profiles(), [key])
+        if error:
+            self.invalid.emit(error)
+            return False
+        self.recorder.update_meeting(index.row(), {key: value}, save=False)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self._changed()
+        return True
+
+    def add_meeting(self, meeting):
+        """Append a meeting and save it; returns False, reporting why, if it is invalid"""
+        error = meeting_error(meeting, self.recorder.recording_profiles())
+        if error:
+            self.invalid.emit(error)
+            return False
+        row = self.rowCount()
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.recorder.add_meeting(meeting, save=False)
+        self.endInsertRows()
+        self._changed()
+        return True
+
+    def remove_rows(self, rows):
+        """Remove the meetings in the given rows and save the rest"""
+        if not rows:
+            return
+        self.beginResetModel()
+        self.recorder.remove_meetings(rows, save=False)
+        self.endResetModel()
+        self._changed()
+
+    def _changed(self):
+        self.unsaved = True
+        self.save_timer.start()
+
+    def save(self):
+        """Write unsaved changes to the config file now"""
+        self.save_timer.stop()
+        if not self.unsaved:
+            return
+        try:
+            self.recorder.save_config()
+        except OSError as e:
+            self.save_failed.emit(f"Could not save the meetings to {self.recorder.config_file}: {str(e)}")
+            return
+        self.unsaved = False
+
+    def set_state(self, name, state):
+        """Show the live state of a meeting, or clear it with None"""
+        if state:
+            self.states[name] = state
+        else:
+            self.states.pop(name, None)
+        column = len(self.KEYS)
+        for row, meeting in enumerate(self.meetings()):
+            if meeting["name"] == name:
+                index = self.index(row, column)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+
+class RecordingsDialog(QDialog):
+    """Browse the recording catalog: search, preview thumbnails and play from a slide"""
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Recordings")
+        self.setMinimumSize(900, 600)
+        self.catalog = catalog
+        self.recordings = []
+        layout = QVBoxLayout(self)
+
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Search:"))
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Meeting name, file or date (e.g. 2024-05)")
+        self.search_input.textChanged.connect(self.refresh)
+        search_layout.addWidget(self.search_input)
+        layout.addLayout(search_layout)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Meeting", "Started", "Duration", "Size", "Status"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.itemSelectionChanged.connect(self.show_thumbnails)
+        layout.addWidget(self.table)
+
+        # Thumbnails come from the catalog; double-clicking one plays the recording from its time
+        self.lists = {}
+        for kind, title in (("keyframe", "Slides"), ("strip", "Timeline")):
+            layout.addWidget(QLabel(f"{title} (double-click to play from there):"))
+            thumbnails = QListWidget()
+            thumbnails.setViewMode(QListWidget.IconMode)
+            thumbnails.setFlow(QListWidget.LeftToRight)
+            thumbnails.setWrapping(False)
+            thumbnails.setIconSize(QSize(160, 90))
+            thumbnails.setFixedHeight(140)
+            thumbnails.itemDoubleClicked.connect(self.play_from)
+            layout.addWidget(thumbnails)
+            self.lists[kind] = thumbnails
+
+        self.refresh()
+
+    def refresh(self):
+        """List the recordings matching the search text"""
+        self.recordings = self.catalog.search(self.search_input.text().strip() or None)
+        self.table.setRowCount(0)
+        for recording in self.recordings:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            size = recording["size_bytes"]
+            self.table.setItem(row, 0, QTableWidgetItem(recording["meeting"]))
+            self.table.setItem(row, 1, QTableWidgetItem(recording["started"].replace("T", " ")))
+            self.table.setItem(row, 2, QTableWidgetItem(format_duration(recording["duration"])))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{size / 1e6:.1f} MB" if size is not None else ""))
+            self.table.setItem(row, 4, QTableWidgetItem(recording["status"]))
+        self.show_thumbnails()
+
+    def selected_recording(self):
+        rows = self.table.selectionModel().selectedRows()
+        return self.recordings[rows[0].row()] if rows else None
+
+    def show_thumbnails(self):
+        """Show the slides and thumbnail strip of the selected recording"""
+        recording = self.selected_recording()
+        for kind, thumbnails in self.lists.items():
+            thumbnails.clear()
+            if recording is None:
+                continue
+            for seconds, image in self.catalog.thumbnails(recording["id"], kind):
+                pixmap = QPixmap()
+                pixmap.loadFromData(image, "JPG")
+                item = QListWidgetItem(QIcon(pixmap), format_duration(seconds))
+                item.setData(Qt.UserRole, seconds)
+                thumbnails.addItem(item)
+
+    def play_from(self, item):
+        """Open the selected recording at the thumbnail's time"""
+        recording = self.selected_recording()
+        if recording is None:
+            return
+        if recording["status"] != "ready":
+            QMessageBox.warning(self, "Not Ready", f"The recording is {recording['status']}.")
+            return
+        # ffplay seeks straight to the time through the fast-start index; other players open at the start
+        if shutil.which("ffplay"):
+            subprocess.Popen(["ffplay", "-loglevel", "error", "-ss", f"{item.data(Qt.UserRole):.1f}",
+                              recording["path"]])
+        else:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(recording["path"]))
+
+
+class ZoomRecorderApp(QMainWindow):
+    # GUI implementation remains largely the same as before
+    def __init__(self, recorder=None):
+        super().__init__()
+        self.setWindowTitle("Zoom Meeting Scheduler and Recorder")
+        self.setMinimumSize(800, 600)
+        
+        # Initialize recorder backend
+        self.recorder = recorder or ZoomMeetingRecorder()
+        
+        # Create main widget and layout
+        main_widget = QWidget()
+        self.setCentralWidget(main_widget)
+        main_layout = QVBoxLayout(main_widget)
+        
+        # Create form for adding meetings
+        form_widget = QWidget()
+        form_layout = QVBoxLayout(form_widget)
+        
+        # Meeting name input
+        name_layout = QHBoxLayout()
+        name_layout.addWidget(QLabel("Meeting Name:"))
+        self.name_input = QLineEdit()
+        name_layout.addWidget(self.name_input)
+        form_layout.addLayout(name_layout)
+        
+        # Zoom link input
+        link_layout = QHBoxLayout()
+        link_layout.addWidget(QLabel("Zoom Link:"))
+        self.link_input = QLineEdit()
+        link_layout.addWidget(self.link_input)
+        form_layout.addLayout(link_layout)
+        
+        # Time and duration inputs
+        time_layout = QHBoxLayout()
+        time_layout.addWidget(QLabel("Time:"))
+        self.time_input = QTimeEdit()
+        self.time_input.setDisplayFormat("HH:mm")
+        self.time_input.setTime(QTime(9, 0))
+        time_layout.addWidget(self.time_input)
+        
+        time_layout.addWidget(QLabel("Duration (minutes):"))
+        self.duration_input = QSpinBox()
+        self.duration_input.setRange(5, 240)
+        self.duration_input.setValue(60)
+        time_layout.addWidget(self.duration_input)
+
+        time_layout.addWidget(QLabel("Profile:"))
+        self.profile_input = QComboBox()
+        self.profile_input.addItems(sorted(self.recorder.recording_profiles()))
+        self.profile_input.setCurrentText(self.recorder.config.get("default_profile", "full"))
+        time_layout.addWidget(self.profile_input)
+        form_layout.addLayout(time_layout)
+        
+        # Day selection
+        days_layout = QHBoxLayout()
+        days_layout.addWidget(QLabel("Days:"))
+        
+        self.day_checkboxes = {}
+        for day in DAYS:
+            cb = QCheckBox(day)
+            self.day_checkboxes[day] = cb
+            days_layout.addWidget(cb)
+        
+        form_layout.addLayout(days_layout)
+        
+        # Add meeting button
+        add_button_layout = QHBoxLayout()
+        add_button = QPushButton("Add Meeting")
+        add_button.clicked.connect(self.add_meeting)
+        add_button_layout.addStretch()
+        add_button_layout.addWidget(add_button)
+        form_layout.addLayout(add_button_layout)
+        
+        main_layout.addWidget(form_widget)
+        
+        # Meetings table, editable in place; changes are saved once editing pauses
+        self.meetings_model = MeetingsTableModel(self.recorder, self)
+        self.meetings_model.invalid.connect(lambda message: QMessageBox.warning(self, "Input Error", message))
+        self.meetings_model.save_failed.connect(lambda message: QMessageBox.warning(self, "Save Error", message))
+        self.meetings_table = QTableView()
+        self.meetings_table.setModel(self.meetings_model)
+        self.meetings_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.meetings_table.setSelectionBehavior(QTableView.SelectRows)
+        
+        # Add table buttons
+        table_buttons_layout = QHBoxLayout()
+        delete_button = QPushButton("Delete Selected")
+        delete_button.clicked.connect(self.delete_selected_meeting)
+        table_buttons_layout.addWidget(delete_button)
+
+        recordings_button = QPushButton("Recordings...")
+        recordings_button.clicked.connect(self.show_recordings)
+        table_buttons_layout.addWidget(recordings_button)
+        
+        main_layout.addWidget(self.meetings_table)
+        main_layout.addLayout(table_buttons_layout)
+        
+        # Status section
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel("Service status: Stopped")
+        status_layout.addWidget(self.status_label)
+        
+        self.start_service_button = QPushButton("Start Service")
+        self.start_service_button.clicked.connect(self.toggle_service)
+        self.service_running = False
+        status_layout.addWidget(self.start_service_button)
+        
+        main_layout.addLayout(status_layout)
+
+        # The recorder pushes its state changes; the signal queues them to this thread
+        self.waiting_text = "Running"
+        self.recording_texts = {}
+        self.recorder_signals = RecorderSignals()
+        self.recorder_signals.event.connect(self.on_recorder_event)
+        self.recorder.add_listener(self.recorder_signals.event.emit)
+    
+    def add_meeting(self):
+        """Add the meeting in the form to the schedule"""
+        meeting = {
+            "name": self.name_input.text().strip(),
+            "join_url": self.link_input.text().strip(),
+            "schedule": self.time_input.time().toString("HH:mm"),
+            "duration_minutes": self.duration_input.value(),
+            "days": [day for day, checkbox in self.day_checkboxes.items() if checkbox.isChecked()],
+            "profile": self.profile_input.currentText(),
+        }
+        if not self.meetings_model.add_meeting(meeting):
+            return
+        
+        # Clear form
+        self.name_input.clear()
+        self.link_input.clear()
+        self.time_input.setTime(QTime(9, 0))
+        self.duration_input.setValue(60)
+        self.profile_input.setCurrentText(self.recorder.config.get("default_profile", "full"))
+        for checkbox in self.day_checkboxes.values():
+            checkbox.setChecked(False)
+    
+    def delete_selected_meeting(self):
+        """Delete the selected meetings from the schedule"""
+        rows = {index.row() for index in self.meetings_table.selectionModel().selectedRows()}
+        self.meetings_model.remove_rows(rows)
+    
+    def show_recordings(self):
+        """Open the recording catalog browser"""
+        catalog = self.recorder.get_catalog()
+        if catalog is None:
+            QMessageBox.information(self, "Recordings", "The recording catalog is turned off in the config.")
+            return
+        RecordingsDialog(catalog, self).exec_()
+
+    def toggle_service(self):
+        """Start or stop the recording service"""
+        if not self.service_running:
+            if self.meetings_model.rowCount() == 0:
+                QMessageBox.warning(self, "No Meetings", "Please add at least one meeting before starting the service.")
+                return
+            
+            # Start recorder service in background thread
+            self.service_thread = threading.Thread(target=self.recorder.run_scheduler)
+            self.service_thread.daemon = True
+            self.service_thread.start()
+            
+            self.service_running = True
+            self.start_service_button.setText("Stop Service")
+        else:
+            # Stop service
+            self.recorder.stop_scheduler()
+            self.service_running = False
+            self.start_service_button.setText("Start Service")
+        self.update_status()
+    
+    def on_recorder_event(self, event, data):
+        """Update the meetings table and status from a recorder event, in the GUI thread"""
+        if event == "scheduler":
+            self.service_running = data["running"]
+            self.start_service_button.setText("Stop Service" if self.service_running else "Start Service")
+        elif event == "waiting":
+            if data:
+                self.waiting_text = f"Waiting for next meeting at {data['time']} ({data['name']})"
+            else:
+                self.waiting_text = "Running (no upcoming meetings)"
+        elif event in ("joining", "recording", "finalizing"):
+            self.meetings_model.set_state(data["meeting"], event.capitalize())
+            self.recording_texts[data["meeting"]] = f"{event.capitalize()} '{data['meeting']}'"
+        elif event == "finished":
+            self.meetings_model.set_state(data["meeting"], None)
+            self.recording_texts.pop(data["meeting"], None)
+        elif event == "metrics":
+            for metrics in data["recordings"].values():
+                # Snapshots can arrive after the recording has moved on
+                if self.meetings_model.states.get(metrics["meeting"]) != "Recording":
+                    continue
+                self.recording_texts[metrics["meeting"]] = (
+                    f"Recording '{metrics['meeting']}' ({metrics['recent_fps']:.1f}/{metrics['target_fps']} fps, "
+                    f"{metrics['frames']['dropped']} dropped, {metrics['audio_overflows']} audio overflows, "
+                    f"{metrics['output_kbps']:.0f} kbit/s)")
+        self.update_status()
+
+    def update_status(self):
+        """Show the latest recorder state in the status bar"""
+        if self.recording_texts:
+            self.status_label.setText(f"Service status: {', '.join(self.recording_texts.values())}")
+        elif self.service_running:
+            self.status_label.setText(f"Service status: {self.waiting_text}")
+        else:
+            self.status_label.setText("Service status: Stopped")
+    
+    def closeEvent(self, event):
+        """Handle window close event"""
+        self.meetings_model.save()
+        if self.service_running:
+            reply = QMessageBox.question(self, 'Confirm Exit', 
+                'The recording service is still running. Stop service and exit?',
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            
+            if reply == QMessageBox.Yes:
+                self.recorder.stop_scheduler()
+                event.accept()
+            else:
+                event.ignore()
+        else:
+            event.accept()
+
+
+def run_gui(recorder=None):
+    """Show the scheduler window and run the Qt event loop"""
+    app = QApplication(sys.argv)
+    window = ZoomRecorderApp(recorder)
+    window.show()
+    try:
+        return app.exec_()
+    finally:
+        window.recorder.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    configure_logging()
+    sys.exit(run_gui())